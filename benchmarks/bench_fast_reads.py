@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Parity and latency check for the asyncpg fast read path.
+
+Samples claims and users from DATABASE_URL, loads each one through Prisma
+(model_dump) and through services.fast_reads, reports any field that
+differs, then times both implementations.
+
+Usage: python benchmarks/bench_fast_reads.py [--sample 50] [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.services import fast_reads
+from src.services.database import get_db, close_db
+
+CLAIM_INCLUDE = {"user": True, "incident": True, "claimlist": True}
+
+
+def diff(expected, actual, path=""):
+    """Paths where two model_dump()-shaped values differ"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        paths = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in actual:
+                paths.append(f"{path}.{key} (missing)")
+            elif key not in expected:
+                paths.append(f"{path}.{key} (unexpected)")
+            else:
+                paths.extend(diff(expected[key], actual[key], f"{path}.{key}"))
+        return paths
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path} (length {len(expected)} != {len(actual)})"]
+        return [p for i, (e, a) in enumerate(zip(expected, actual)) for p in diff(e, a, f"{path}[{i}]")]
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+async def prisma_claim(prisma, claim_id):
+    claim = await prisma.claim.find_unique(where={"id": claim_id}, include=CLAIM_INCLUDE)
+    return claim.model_dump() if claim else None
+
+
+async def prisma_user_claims(prisma, user_id):
+    claims = await prisma.claim.find_many(where={"userId": user_id}, include=CLAIM_INCLUDE, order={"createdAt": "desc"})
+    return [claim.model_dump() for claim in claims]
+
+
+async def prisma_user(prisma, user_id):
+    user = await prisma.user.find_unique(where={"id": user_id}, include={"claimlist": True})
+    return user.model_dump() if user else None
+
+
+async def timed(fn, args_list, repeat):
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            await fn(*args)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sample", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    prisma = await get_db()
+    try:
+        claim_ids = [claim.id for claim in await prisma.claim.find_many(take=args.sample, order={"updatedAt": "desc"})]
+        user_ids = [user.id for user in await prisma.user.find_many(take=args.sample, order={"updatedAt": "desc"})]
+
+        checks = [
+            ("get_claim_by_id", claim_ids, lambda i: prisma_claim(prisma, i), fast_reads.fetch_claim),
+            ("get_user_claims", user_ids, lambda i: prisma_user_claims(prisma, i), fast_reads.fetch_user_claims),
+            ("get_user_by_id", user_ids, lambda i: prisma_user(prisma, i), lambda i: fast_reads.fetch_user("id", i)),
+        ]
+
+        failed = False
+        for name, ids, slow, fast in checks:
+            mismatches = 0
+            for entity_id in ids:
+                paths = diff(await slow(entity_id), await fast(entity_id))
+                if paths:
+                    mismatches += 1
+                    print(f"MISMATCH {name}({entity_id}):")
+                    for path in paths[:10]:
+                        print(f"    {path}")
+            failed = failed or mismatches > 0
+
+            prisma_ms = await timed(slow, [(i,) for i in ids], args.repeat)
+            fast_ms = await timed(fast, [(i,) for i in ids], args.repeat)
+            print(
+                f"{name:16} parity {len(ids) - mismatches}/{len(ids)}  "
+                f"prisma p50 {prisma_ms[0]:7.2f} ms p95 {prisma_ms[1]:7.2f} ms  "
+                f"asyncpg p50 {fast_ms[0]:7.2f} ms p95 {fast_ms[1]:7.2f} ms"
+            )
+
+        sys.exit(1 if failed else 0)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
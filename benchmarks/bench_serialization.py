@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the claim list response path.
+
+Compares FastAPI's default serialization (jsonable_encoder + json.dumps)
+against the trusted-data path used by the API (services.serialization.dumps)
+on synthetic claim lists shaped like Prisma model_dump() output.
+
+Usage: python benchmarks/bench_serialization.py [--claims 100] [--repeat 50]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fastapi.encoders import jsonable_encoder
+from services.serialization import dumps, orjson
+
+
+class ClaimStatus(str, Enum):
+    PENDING_INFORMATION = "PENDING_INFORMATION"
+    UNDER_REVIEW = "UNDER_REVIEW"
+
+
+def make_claim(index: int) -> dict:
+    now = datetime.now(timezone.utc) - timedelta(minutes=index)
+    user_id = str(uuid.uuid4())
+    return {
+        "id": str(uuid.uuid4()),
+        "status": ClaimStatus.PENDING_INFORMATION if index % 2 else ClaimStatus.UNDER_REVIEW,
+        "injured": True,
+        "relationship": None,
+        "otherRelationship": None,
+        "healthInsurance": index % 3 == 0,
+        "healthInsuranceNumber": None,
+        "isOver65": False,
+        "receiveMedicare": ["Medicare"] if index % 5 == 0 else [],
+        "assignedCaseManager": f"manager-{index % 7}",
+        "userId": user_id,
+        "incidentId": str(uuid.uuid4()),
+        "claimlistId": str(uuid.uuid4()),
+        "createdAt": now,
+        "updatedAt": now,
+        "user": {
+            "id": user_id,
+            "firstName": "Jane",
+            "lastName": f"Doe {index}",
+            "email": f"jane{index}@example.com",
+            "phone": f"+1555000{index:04d}",
+            "dateOfBirth": now - timedelta(days=12000),
+            "createdAt": now,
+            "updatedAt": now,
+        },
+        "incident": {
+            "id": str(uuid.uuid4()),
+            "datetime": now - timedelta(days=30),
+            "location": "5th Ave and 42nd St, New York, NY",
+            "description": "Rear-ended at a red light while stopped. " * 4,
+            "workRelated": False,
+            "reportCompleted": True,
+            "policeReportCompleted": True,
+            "reportNumber": f"RPT-{index:06d}",
+            "createdAt": now,
+            "updatedAt": now,
+        },
+        "claimlist": {"id": str(uuid.uuid4()), "name": f"Claims for Jane Doe {index}", "enable": True},
+    }
+
+
+def fastapi_default(payload: dict) -> bytes:
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def bench(fn, payload, repeat: int) -> float:
+    fn(payload)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--claims", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payload = {"success": True, "data": [make_claim(i) for i in range(args.claims)]}
+
+    baseline = bench(fastapi_default, payload, args.repeat)
+    fast = bench(dumps, payload, args.repeat)
+
+    print(f"claims per response:            {args.claims}")
+    print(f"jsonable_encoder + json.dumps:  {baseline:8.3f} ms")
+    print(f"services.serialization.dumps:   {fast:8.3f} ms  ({'orjson' if orjson else 'stdlib fallback'})")
+    print(f"speedup:                        {baseline / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
-from fastapi import FastAPI, HTTPException, Request, Path
+from fastapi import FastAPI, HTTPException, Request, Path, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import logging
 from contextlib import asynccontextmanager
 import time
@@ -15,12 +15,66 @@ from .services.database import (
     get_user_claims, 
     create_claim, 
     get_claim_by_id, 
+    get_claims_by_ids,
+    get_claim_version,
+    get_user_claims_version,
+    get_user_version,
+    claim_version,
+    claims_list_version,
+    user_version,
     update_claim,
+    stage_claim_update,
+    flush_claim_draft,
     update_user,
+    get_cache_stats,
+    get_pool_stats,
+    get_replica_status,
+    get_manager_claims,
+    get_manager_claim_counts,
+    count_open_claims_by_manager,
+    invalidate_entity_change,
+    register_claim_change_hook,
+    register_user_change_hook,
+    clear_caches,
     initialize_db,
     close_db
 )
+from .services.claim_graph import get_claim_graphs
+from .services.bulk_ingest import ingest_claims, ingest_users
+from .services.export import build_export_filters, export_csv, export_ndjson
+from .services.serialization import dumps
+from .services.profiling import QueryProfileMiddleware, get_profile_stats
+from .services.idempotency import IdempotencyError, install_idempotency_table, run_idempotent
+from .services.drafts import draft_store, drafts_enabled, install_draft_table
+from .services.cursors import InvalidCursor
+from .services.search import SearchIndexMissing, check_search_index, search_claims
+from .services.directory import directory_service
+from .services.workqueue import work_queue
+from .services.stats import (
+    get_claim_stats,
+    install_stats_triggers,
+    reconcile_claim_stats,
+    start_reconciliation,
+    stop_reconciliation
+)
+from .services.deadlines import (
+    backfill_deadlines,
+    get_upcoming_deadlines,
+    install_deadline_table,
+    on_claim_change as sync_deadlines,
+    on_user_change as sync_user_deadlines,
+    stop_deadline_backfill
+)
+from .services.etags import (
+    PreconditionFailed,
+    claim_etag,
+    claims_list_etag,
+    etag_matches,
+    user_etag
+)
 from .services.ai_agent_service import ai_agent_service
+from .services.notifications import ENTITY_CHANGES_CHANNEL, notification_bus
+from .services.change_feed import CLAIM_CHANGES_CHANNEL, claim_change_feed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -35,21 +89,125 @@ async def lifespan(app: FastAPI):
     await initialize_db()
     await ai_agent_service.initialize()
     
+    # Idempotency keys shared by every worker
+    try:
+        await install_idempotency_table()
+    except Exception as e:
+        logger.error(f"Could not create idempotency key table: {str(e)}")
+    
+    # Search column and GIN index on Incident, installed by
+    # python -m src.services.search --install-index
+    try:
+        await check_search_index()
+    except Exception as e:
+        logger.error(f"Could not check claim search index: {str(e)}")
+    
+    # Claim counters for dashboards, maintained by triggers
+    if settings.stats_install_triggers:
+        try:
+            await install_stats_triggers()
+        except Exception as e:
+            logger.error(f"Could not install claim stat triggers: {str(e)}")
+    start_reconciliation()
+    
+    # Push claim changes to change feed subscribers
+    register_claim_change_hook(claim_change_feed.publish)
+    
+    # Keep the filing deadline index in step with claim writes
+    try:
+        await install_deadline_table()
+    except Exception as e:
+        logger.error(f"Could not create claim deadline table: {str(e)}")
+    register_claim_change_hook(sync_deadlines)
+    register_user_change_hook(sync_user_deadlines)
+    
+    # Track open load per case manager for assigning new claims
+    # from the change feed, so changes made in other workers count too
+    claim_change_feed.add_listener(work_queue.apply)
+    await work_queue.start(count_open_claims_by_manager)
+    
+    # In-memory typeahead over accounts and the vehicle catalog
+    if settings.directory_enabled:
+        await directory_service.start()
+    
+    # Draft claim sessions shared by every worker; one worker at a time
+    # flushes those that went idle
+    if drafts_enabled():
+        try:
+            await install_draft_table()
+        except Exception as e:
+            logger.error(f"Could not create claim draft table: {str(e)}")
+        draft_store.start_sweeper(flush_claim_draft)
+    
+    # Subscribe to row changes so writes in other workers evict our cache
+    if settings.notification_bus_enabled:
+        notification_bus.subscribe(ENTITY_CHANGES_CHANNEL, invalidate_entity_change)
+        notification_bus.subscribe(CLAIM_CHANGES_CHANNEL, claim_change_feed.on_notification)
+        notification_bus.on_reconnect(clear_caches)
+        notification_bus.on_reconnect(lambda: work_queue.reload(count_open_claims_by_manager))
+        try:
+            await notification_bus.start()
+        except Exception as e:
+            logger.error(f"Notification bus unavailable, caches are worker-local: {str(e)}")
+    
     logger.info("Application started - OpenAPI docs at /docs")
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    await draft_store.stop()
+    await directory_service.stop()
+    await work_queue.stop()
+    stop_reconciliation()
+    stop_deadline_backfill()
+    await notification_bus.stop()
     await ai_agent_service.close()
     await close_db()
     logger.info("Shutdown complete")
 
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+    
+    Returning it directly from a route skips FastAPI's jsonable_encoder, so
+    only use it for trusted data such as Prisma model_dump() output.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def validator_headers(etag: str) -> Dict[str, str]:
+    """ETag headers that make clients revalidate before reusing a response"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching If-None-Match"""
+    return Response(status_code=304, headers=validator_headers(etag))
+
+async def idempotent_response(scope: str, key: Optional[str], payload: Any, handler) -> Response:
+    """Run handler, or replay its stored response when the key was seen before"""
+    if not key or not key.strip():
+        status_code, content = await handler()
+        return FastJSONResponse(status_code=status_code, content=content)
+    
+    try:
+        status_code, body, replayed = await run_idempotent(scope, key.strip(), payload, handler)
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"} if replayed else None
+    )
+
 # Create FastAPI app
 app = FastAPI(
     title="AI Legal Claims Assistant",
     description="Simplified FastAPI application with Azure AI Foundry integration",
     version="2.0.0",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -58,10 +216,14 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed"],
 )
 
+# Attribute database queries and time to routes for /metrics
+app.add_middleware(QueryProfileMiddleware)
+
 # Enums
 class ClaimStatus(str, Enum):
     PENDING_INFORMATION = "PENDING_INFORMATION"
@@ -115,6 +277,7 @@ class SaveClaimRequest(BaseModel):
     otherRelationship: Optional[str] = Field(default=None, description="Specify if relationship is 'Other'")
     healthInsuranceNumber: Optional[str] = None
     isOver65: Optional[bool] = None
+    idempotencyKey: Optional[str] = Field(default=None, description="Same key on a retry returns the original result instead of creating another claim")
 
 class UpdateClaimRequest(BaseModel):
     """Request model for updating claim data"""
@@ -136,6 +299,8 @@ class UpdateClaimRequest(BaseModel):
     assignedCaseManager: Optional[str] = None
     # Add incident field
     incident: Optional[IncidentDetails] = None
+    # Buffer the update in the claim's draft session until commit
+    draft: Optional[bool] = None
 
 class UpdateUserRequest(BaseModel):
     """Request model for updating user profile"""
@@ -149,6 +314,22 @@ class UpdateUserRequest(BaseModel):
     address_state: Optional[str] = None
     address_postalCode: Optional[str] = None
 
+class WereYouInjured(str, Enum):
+    YES = "Yes"
+    SOMEONE = "Someone"
+    NO = "No"
+
+class BulkUserRequest(BaseModel):
+    """One NDJSON row of a bulk user import"""
+    firstName: str
+    middleName: Optional[str] = None
+    lastName: str
+    email: str
+    phone: str
+    password: str
+    injured: WereYouInjured
+    isVerified: bool = False
+
 class ChatMessage(BaseModel):
     message: str
     user_id: str
@@ -164,7 +345,10 @@ class ChatResponse(BaseModel):
     error: Optional[str] = None
 
 @app.post("/chat/initial", response_model=ChatResponse, tags=["chat"])
-async def chat_initial_endpoint(chat_message: ChatMessage):
+async def chat_initial_endpoint(
+    chat_message: ChatMessage,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Initial chat interaction - routes to initial intake agent"""
     try:
         if not chat_message.user_id.strip():
@@ -172,50 +356,64 @@ async def chat_initial_endpoint(chat_message: ChatMessage):
         
         logger.info(f"Initial chat from user {chat_message.user_id}")
         
-        # Process with AI agent service
-        response = await ai_agent_service.chat(
-            message=chat_message.message,
-            user_id=chat_message.user_id,
-            thread_id=None,  # New conversation
-            claim_id=chat_message.claim_id
-        )
+        async def handle():
+            # Process with AI agent service
+            response = await ai_agent_service.chat(
+                message=chat_message.message,
+                user_id=chat_message.user_id,
+                thread_id=None,  # New conversation
+                claim_id=chat_message.claim_id
+            )
+            
+            return 200, ChatResponse(
+                message=response.get("message", "No response"),
+                success=response.get("success", True),
+                thread_id=response.get("thread_id"),
+                user_id=chat_message.user_id,
+                timestamp=time.time(),
+                error=response.get("error")
+            ).model_dump()
         
-        return ChatResponse(
-            message=response.get("message", "No response"),
-            success=response.get("success", True),
-            thread_id=response.get("thread_id"),
-            user_id=chat_message.user_id,
-            timestamp=time.time(),
-            error=response.get("error")
-        )
+        # A retried turn replays the first answer instead of re-running the agent
+        return await idempotent_response("chat_initial", idempotency_key, chat_message.model_dump(), handle)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in initial chat: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/chat/portal", response_model=ChatResponse, tags=["chat"])
-async def chat_portal_endpoint(chat_message: ChatMessage):
+async def chat_portal_endpoint(
+    chat_message: ChatMessage,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Portal chat interaction - routes to portal agent"""
     try:
         logger.info(f"Portal chat from user {chat_message.user_id}")
         
-        # Process with AI agent service
-        response = await ai_agent_service.chat(
-            message=chat_message.message,
-            user_id=chat_message.user_id,
-            thread_id=chat_message.thread_id,
-            claim_id=chat_message.claim_id
-        )
+        async def handle():
+            # Process with AI agent service
+            response = await ai_agent_service.chat(
+                message=chat_message.message,
+                user_id=chat_message.user_id,
+                thread_id=chat_message.thread_id,
+                claim_id=chat_message.claim_id
+            )
+            
+            return 200, ChatResponse(
+                message=response.get("message", "No response"),
+                success=response.get("success", True),
+                thread_id=response.get("thread_id"),
+                user_id=chat_message.user_id,
+                timestamp=time.time(),
+                error=response.get("error")
+            ).model_dump()
         
-        return ChatResponse(
-            message=response.get("message", "No response"),
-            success=response.get("success", True),
-            thread_id=response.get("thread_id"),
-            user_id=chat_message.user_id,
-            timestamp=time.time(),
-            error=response.get("error")
-        )
+        return await idempotent_response("chat_portal", idempotency_key, chat_message.model_dump(), handle)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in portal chat: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -247,7 +445,10 @@ async def delete_thread_endpoint(thread_id: str = Path(...)):
           status_code=201,
           operation_id="create_claim_tool",
           tags=["claims"])
-async def create_claim_endpoint(request: SaveClaimRequest):
+async def create_claim_endpoint(
+    request: SaveClaimRequest,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Create a new claim"""
     try:
         if not request.userId.strip():
@@ -256,25 +457,39 @@ async def create_claim_endpoint(request: SaveClaimRequest):
         logger.info(f"Creating claim for user {request.userId}")
         
         # Convert request to dict - use exclude_unset to only include provided values
-        request_dict = request.model_dump(exclude_unset=True)
+        request_dict = request.model_dump(exclude_unset=True, exclude={"idempotencyKey"})
         logger.info(f"Request data: {request_dict}")
-           
-        # Create claim using database service
-        result = await create_claim(request_dict)
-        
-        if not result or not result.get("success"):
-            raise HTTPException(
-                status_code=500, 
-                detail=result.get("message", "Failed to create claim")
-            )
         
-        return JSONResponse(
-            status_code=201,
-            content={
+        async def handle():
+            # Create claim using database service
+            result = await create_claim(request_dict)
+            
+            if not result or not result.get("success"):
+                raise HTTPException(
+                    status_code=500, 
+                    detail=result.get("message", "Failed to create claim")
+                )
+            
+            # An existing claim for the same incident is returned, not created
+            if result.get("duplicate"):
+                return 200, {
+                    "success": True,
+                    "message": result["message"],
+                    "data": result
+                }
+            
+            return 201, {
                 "success": True,
                 "message": "Claim created successfully",
                 "data": result
             }
+        
+        # Agents cannot set headers, so the tool passes the key in the body
+        return await idempotent_response(
+            "create_claim",
+            idempotency_key or request.idempotencyKey,
+            request.model_dump(mode="json", exclude={"idempotencyKey"}),
+            handle
         )
         
     except HTTPException:
@@ -289,22 +504,34 @@ async def get_claims_endpoint(
     user_id: str = Path(...),
     status: Optional[ClaimStatus] = None,
     limit: int = 10,
-    offset: int = 0
+    offset: int = 0,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Get claims for a user"""
     try:
         if limit < 1 or limit > 100:
             raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
         
+        status_value = status.value if status else None
+        
+        # Revalidate against the listing version before loading any claims
+        if if_none_match:
+            version = await get_user_claims_version(user_id, status_value)
+            if version is not None:
+                etag = claims_list_etag(user_id, status_value, limit, offset, version)
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag)
+        
         claims = await get_user_claims(
             user_id=user_id,
-            status=status.value if status else None
+            status=status_value
         )
         
         # Apply pagination
         paginated_claims = claims[offset:offset + limit]
         
-        return {
+        etag = claims_list_etag(user_id, status_value, limit, offset, claims_list_version(claims))
+        return FastJSONResponse({
             "success": True,
             "data": paginated_claims,
             "pagination": {
@@ -313,30 +540,187 @@ async def get_claims_endpoint(
                 "offset": offset,
                 "hasMore": (offset + limit) < len(claims)
             }
-        }
+        }, headers=validator_headers(etag))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving claims: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/users/{user_id}/claims/changes", tags=["claims"])
+async def claim_changes_endpoint(user_id: str = Path(...)):
+    """Stream a user's claim changes as server-sent events"""
+    try:
+        user = await get_user_by_id(user_id)
+        
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        return StreamingResponse(
+            claim_change_feed.sse(user["id"]),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error opening claim change feed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def parse_id_list(ids: str, max_ids: int) -> List[str]:
+    """Split a comma-separated id list, dropping blanks and duplicates"""
+    parsed = list(dict.fromkeys(part.strip() for part in ids.split(",") if part.strip()))
+    if not parsed:
+        raise HTTPException(status_code=400, detail="At least one id is required")
+    if len(parsed) > max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {max_ids} ids per request")
+    return parsed
+
+@app.get("/api/claims", 
+         operation_id="get_claims_batch_tool",
+         tags=["claims"])
+async def get_claims_batch_endpoint(ids: str = Query(..., description="Comma-separated claim ids")):
+    """Get several claims in one request"""
+    try:
+        claim_ids = parse_id_list(ids, max_ids=100)
+        
+        result = await get_claims_by_ids(claim_ids)
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to retrieve claims")
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": result["claims"],
+            "missing": result["missing"]
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving claims: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/claims/graph", tags=["claims"])
+async def get_claim_graphs_endpoint(ids: str = Query(..., description="Comma-separated claim ids")):
+    """Get full claim graphs for several claims"""
+    try:
+        claim_ids = parse_id_list(ids, max_ids=50)
+        
+        result = await get_claim_graphs(claim_ids)
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to load claim graphs")
+        
+        graphs, missing = result
+        return FastJSONResponse({
+            "success": True,
+            "data": graphs,
+            "missing": missing
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving claim graphs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/claims/search", tags=["claims"])
+async def search_claims_endpoint(
+    q: str = Query(..., min_length=1, description="Words or report number to search for"),
+    status: Optional[ClaimStatus] = Query(None),
+    date_from: Optional[datetime] = Query(None, description="Incidents on or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Incidents before this time"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search claims by incident description, location or report number"""
+    try:
+        if not q.strip():
+            raise HTTPException(status_code=400, detail="Search query is required")
+        
+        result = await search_claims(
+            q.strip(),
+            status=status.value if status else None,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit
+        )
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to search claims")
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": result["results"],
+            "next_cursor": result["next_cursor"]
+        })
+        
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SearchIndexMissing as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching claims: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/claims/{claim_id}/graph", tags=["claims"])
+async def get_claim_graph_endpoint(claim_id: str = Path(...)):
+    """Get a claim with witnesses, defendants, treatments, media and their accounts"""
+    try:
+        if not claim_id.strip():
+            raise HTTPException(status_code=400, detail="Invalid claim_id")
+        
+        result = await get_claim_graphs([claim_id])
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to load claim graph")
+        
+        graphs, _ = result
+        if not graphs:
+            raise HTTPException(status_code=404, detail="Claim not found")
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": graphs[0]
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving claim graph: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/claims/{claim_id}", 
          operation_id="get_claim_tool",
          tags=["claims"])
-async def get_claim_endpoint(claim_id: str = Path(...)):
+async def get_claim_endpoint(
+    claim_id: str = Path(...),
+    if_none_match: Optional[str] = Header(None)
+):
     """Get claim details"""
     try:
         if not claim_id.strip():
             raise HTTPException(status_code=400, detail="Invalid claim_id")
         
+        # Revalidate against the claim version before loading the claim
+        if if_none_match:
+            version = await get_claim_version(claim_id)
+            if version is not None:
+                etag = claim_etag(claim_id, version)
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag)
+        
         claim = await get_claim_by_id(claim_id)
         
         if not claim:
             raise HTTPException(status_code=404, detail="Claim not found")
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": claim
-        }
+        }, headers=validator_headers(claim_etag(claim_id, claim_version(claim))))
         
     except HTTPException:
         raise
@@ -349,7 +733,8 @@ async def get_claim_endpoint(claim_id: str = Path(...)):
           tags=["claims"])
 async def update_claim_endpoint(
     request: UpdateClaimRequest,
-    claim_id: str = Path(...)
+    claim_id: str = Path(...),
+    if_match: Optional[str] = Header(None)
 ):
     """Update claim data with support for both PUT and PATCH methods"""
     try:
@@ -359,6 +744,7 @@ async def update_claim_endpoint(
         
         # Convert request to dict, excluding None values
         updates = {k: v for k, v in request.model_dump().items() if v is not None}
+        draft = updates.pop('draft', False)
         
         logger.info(f"Filtered updates: {updates}")
         
@@ -385,19 +771,33 @@ async def update_claim_endpoint(
             
         logger.info(f"Final updates structure: {updates}")
         
-        result = await update_claim(claim_id, updates)
+        if drafts_enabled() and (draft or await draft_store.get(claim_id)):
+            # Later writes win per field, so a direct update goes through the draft too
+            result = await stage_claim_update(claim_id, updates, if_match=if_match)
+            if result and result.get("draft"):
+                if draft:
+                    return FastJSONResponse({
+                        "success": True,
+                        "message": "Claim update staged in draft",
+                        "data": result
+                    }, headers=validator_headers(claim_etag(claim_id, claim_version(result))))
+                result = await flush_claim_draft(claim_id)
+        else:
+            result = await update_claim(claim_id, updates, if_match=if_match)
         
         if not result:
             logger.warning(f"Claim not found or update failed for claim_id: {claim_id}")
             raise HTTPException(status_code=404, detail="Claim not found or update failed")
         
         logger.info(f"Successfully updated claim {claim_id}")
-        return {
+        return FastJSONResponse({
             "success": True,
             "message": "Claim updated successfully",
             "data": result
-        }
+        }, headers=validator_headers(claim_etag(claim_id, claim_version(result))))
         
+    except PreconditionFailed:
+        raise HTTPException(status_code=412, detail="Claim was modified since it was read")
     except HTTPException:
         raise
     except Exception as e:
@@ -406,12 +806,54 @@ async def update_claim_endpoint(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@app.post("/api/claims/{claim_id}/draft/commit", tags=["claims"])
+async def commit_claim_draft_endpoint(claim_id: str = Path(...)):
+    """Write the claim's pending draft updates in one transaction"""
+    if not drafts_enabled():
+        raise HTTPException(status_code=409, detail="Draft sessions are disabled")
+    try:
+        if await draft_store.get(claim_id) is None:
+            claim = await get_claim_by_id(claim_id)
+            if not claim:
+                raise HTTPException(status_code=404, detail="Claim not found")
+            return FastJSONResponse({
+                "success": True,
+                "message": "No pending draft updates",
+                "data": claim
+            }, headers=validator_headers(claim_etag(claim_id, claim_version(claim))))
+        
+        result = await flush_claim_draft(claim_id)
+        if not result:
+            raise HTTPException(status_code=500, detail="Failed to commit draft updates")
+        
+        return FastJSONResponse({
+            "success": True,
+            "message": "Draft committed successfully",
+            "data": result
+        }, headers=validator_headers(claim_etag(claim_id, claim_version(result))))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error committing draft for claim {claim_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/claims/{claim_id}/draft", tags=["claims"])
+async def discard_claim_draft_endpoint(claim_id: str = Path(...)):
+    """Drop the claim's pending draft updates"""
+    if not drafts_enabled():
+        raise HTTPException(status_code=409, detail="Draft sessions are disabled")
+    if not await draft_store.discard(claim_id):
+        raise HTTPException(status_code=404, detail="No pending draft for claim")
+    return {"success": True, "message": "Draft discarded"}
+
 @app.patch("/api/users/{user_id}", 
           operation_id="update_user_profile_tool",
           tags=["users"])
 async def update_user_profile_endpoint(
     request: UpdateUserRequest,
-    user_id: str = Path(...)
+    user_id: str = Path(...),
+    if_match: Optional[str] = Header(None)
 ):
     """Update user profile"""
     try:
@@ -421,17 +863,19 @@ async def update_user_profile_endpoint(
         if not updates:
             raise HTTPException(status_code=400, detail="No valid fields to update")
         
-        result = await update_user(user_id, updates)
+        result = await update_user(user_id, updates, if_match=if_match)
         
         if not result:
             raise HTTPException(status_code=404, detail="User not found or update failed")
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "message": "User profile updated successfully",
             "data": result
-        }
+        }, headers=validator_headers(user_etag(result["id"], user_version(result))))
         
+    except PreconditionFailed:
+        raise HTTPException(status_code=412, detail="User was modified since it was read")
     except HTTPException:
         raise
     except Exception as e:
@@ -441,21 +885,36 @@ async def update_user_profile_endpoint(
 @app.get("/api/users/{user_id}", 
          operation_id="get_user_profile_tool",
          tags=["users"])
-async def get_user_endpoint(user_id: str = Path(...)):
+async def get_user_endpoint(
+    user_id: str = Path(...),
+    if_none_match: Optional[str] = Header(None)
+):
     """Get user profile"""
     try:
         if not user_id.strip():
             raise HTTPException(status_code=400, detail="Invalid user_id")
         
+        # Revalidate against the user version before loading the user
+        if if_none_match:
+            version = await get_user_version(user_id)
+            if version is not None:
+                etag = user_etag(*version)
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag)
+        
         user = await get_user_by_id(user_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        return {
+        etag = user_etag(user["id"], user_version(user))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        
+        return FastJSONResponse({
             "success": True,
             "data": user
-        }
+        }, headers=validator_headers(etag))
         
     except HTTPException:
         raise
@@ -464,6 +923,88 @@ async def get_user_endpoint(user_id: str = Path(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class NDJSONIngestResponse(StreamingResponse):
+    """Streaming response whose body generator reads the request stream.
+    
+    The default StreamingResponse listens for client disconnects by
+    consuming receive(), which would steal request body chunks from a
+    generator that is still reading the upload.
+    """
+    media_type = "application/x-ndjson"
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _ndjson(results):
+    async for result in results:
+        yield dumps(result) + b"\n"
+
+def _validate_claim_row(payload: Any) -> Dict[str, Any]:
+    row = SaveClaimRequest.model_validate(payload)
+    if not row.userId.strip():
+        raise ValueError("Invalid userId")
+    return row.model_dump(exclude_unset=True)
+
+def _validate_user_row(payload: Any) -> Dict[str, Any]:
+    return BulkUserRequest.model_validate(payload).model_dump()
+
+_NDJSON_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/x-ndjson": {"schema": {"type": "string"}}}
+    }
+}
+
+@app.post("/api/bulk/claims", tags=["bulk"], openapi_extra=_NDJSON_REQUEST_BODY)
+async def bulk_claims_endpoint(request: Request):
+    """Import claims from an NDJSON stream of SaveClaimRequest rows.
+    
+    Streams back one result per line: {line, success, claim_id, user_id,
+    assigned_case_manager} for a created claim (plus possible_duplicate_of
+    and similarity under the "flag" duplicate policy), {line, success,
+    duplicate: true, claim_id, user_id, similarity} for a row matching an
+    existing claim under the "return" policy, or {line, success: false,
+    error}; then {summary: {received, created, duplicates, failed}}.
+    """
+    logger.info("Starting bulk claim import")
+    return NDJSONIngestResponse(_ndjson(ingest_claims(request.stream(), _validate_claim_row)))
+
+@app.post("/api/bulk/users", tags=["bulk"], openapi_extra=_NDJSON_REQUEST_BODY)
+async def bulk_users_endpoint(request: Request):
+    """Import users from an NDJSON stream, skipping existing emails and phones"""
+    logger.info("Starting bulk user import")
+    return NDJSONIngestResponse(_ndjson(ingest_users(request.stream(), _validate_user_row)))
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+@app.get("/api/export/claims", tags=["export"])
+async def export_claims_endpoint(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[ClaimStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    case_manager: Optional[str] = None
+):
+    """Stream all matching claims with their incident flattened into each row"""
+    where = build_export_filters(
+        status=status.value if status else None,
+        created_from=created_from,
+        created_to=created_to,
+        case_manager=case_manager
+    )
+    logger.info(f"Exporting claims as {format.value} with filters: {where}")
+    
+    filename = f"claims-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{format.value}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    
+    if format == ExportFormat.CSV:
+        return StreamingResponse(export_csv(where), media_type="text/csv", headers=headers)
+    return StreamingResponse(export_ndjson(where), media_type="application/x-ndjson", headers=headers)
+
 @app.get("/agents/status", tags=["system"])
 async def get_agents_status():
     """Get agent service status"""
@@ -473,6 +1014,159 @@ async def get_agents_status():
         logger.error(f"Error getting agent status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/stats/claims", tags=["stats"])
+async def claim_stats_endpoint():
+    """Claim counts by status, case manager and project"""
+    stats = await get_claim_stats()
+    if stats is None:
+        raise HTTPException(status_code=500, detail="Failed to retrieve claim stats")
+    return {"success": True, "data": stats}
+
+@app.post("/api/stats/claims/reconcile", tags=["stats"])
+async def reconcile_claim_stats_endpoint(fix: bool = Query(True, description="Overwrite drifted counters")):
+    """Check the claim counters against the source tables"""
+    try:
+        return {"success": True, "data": await reconcile_claim_stats(fix=fix)}
+    except Exception as e:
+        logger.error(f"Error reconciling claim stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/case-managers/load", tags=["work queue"])
+async def case_manager_load_endpoint():
+    """Open claim load per case manager as used for assignment"""
+    return {"success": True, "data": work_queue.snapshot()}
+
+@app.get("/api/case-managers/{manager}/claims", tags=["work queue"])
+async def case_manager_claims_endpoint(
+    manager: str = Path(...),
+    status: Optional[ClaimStatus] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """A case manager's claims, newest first"""
+    try:
+        result = await get_manager_claims(
+            manager,
+            status=status.value if status else None,
+            cursor=cursor,
+            limit=limit
+        )
+        if result is None:
+            raise HTTPException(status_code=500, detail="Failed to retrieve claims")
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": result["claims"],
+            "next_cursor": result["next_cursor"]
+        })
+        
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving claims for case manager {manager}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/case-managers/{manager}/claims/counts", tags=["work queue"])
+async def case_manager_claim_counts_endpoint(manager: str = Path(...)):
+    """Number of a case manager's claims per status"""
+    counts = await get_manager_claim_counts(manager)
+    if counts is None:
+        raise HTTPException(status_code=500, detail="Failed to count claims")
+    return {"success": True, "data": counts, "total": sum(counts.values())}
+
+@app.get("/api/deadlines", tags=["deadlines"])
+async def get_deadlines_endpoint(
+    within: str = Query("30d", description="Period from now, e.g. 7d, 2w, 3m"),
+    jurisdiction: Optional[str] = Query(None),
+    include_overdue: bool = Query(False, description="Also return deadlines already passed"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Claim filing deadlines due within a period, soonest first"""
+    try:
+        deadlines = await get_upcoming_deadlines(
+            within,
+            jurisdiction=jurisdiction,
+            include_overdue=include_overdue,
+            limit=limit
+        )
+        if deadlines is None:
+            raise HTTPException(status_code=500, detail="Failed to retrieve deadlines")
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": deadlines,
+            "count": len(deadlines)
+        })
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving deadlines: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/deadlines/backfill", tags=["deadlines"])
+async def backfill_deadlines_endpoint():
+    """Recompute every claim's deadlines, e.g. after changing the rules"""
+    try:
+        synced = await backfill_deadlines()
+        return {"success": True, "synced": synced}
+    except Exception as e:
+        logger.error(f"Error backfilling deadlines: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/directory/accounts", 
+         operation_id="search_directory_tool",
+         tags=["directory"])
+async def search_directory_accounts_endpoint(
+    q: str = Query(..., min_length=1, description="Name or start of a name"),
+    type: Optional[str] = Query(None, description="Role type, e.g. Hospital or Law Firm"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Typeahead over hospitals, law firms, police stations, insurers and other accounts"""
+    if not settings.directory_enabled:
+        raise HTTPException(status_code=404, detail="Directory search is disabled")
+    return FastJSONResponse({
+        "success": True,
+        "data": directory_service.search_accounts(q, role_type=type, limit=limit)
+    })
+
+@app.get("/api/directory/cars", tags=["directory"])
+async def search_directory_cars_endpoint(
+    q: str = Query(..., min_length=1, description="Make, model and/or year"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Typeahead over the vehicle catalog"""
+    if not settings.directory_enabled:
+        raise HTTPException(status_code=404, detail="Directory search is disabled")
+    return FastJSONResponse({
+        "success": True,
+        "data": directory_service.search_cars(q, limit=limit)
+    })
+
+@app.get("/metrics", tags=["system"])
+async def metrics_endpoint():
+    """Runtime metrics for caches and database access"""
+    try:
+        return {
+            "cache": await get_cache_stats(),
+            "database_pool": await get_pool_stats(),
+            "replica": await get_replica_status(),
+            "drafts": await draft_store.stats(),
+            "directory": directory_service.stats(),
+            "work_queue": work_queue.snapshot(),
+            "notification_bus": {"connected": notification_bus.connected},
+            "change_feed": {"subscribers": claim_change_feed.subscriber_count},
+            "profiling": get_profile_stats(),
+            "timestamp": time.time()
+        }
+    except Exception as e:
+        logger.error(f"Error getting metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health", tags=["system"])
 async def health_check():
     """Health check endpoint"""
@@ -1,7 +1,7 @@
 # src/config.py
 import os
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from functools import lru_cache
 
@@ -25,6 +25,105 @@ class Settings(BaseSettings):
     initial_intake_agent_id: Optional[str] = None
     main_orchestrator_agent_id: Optional[str] = None
     
+    # Gunicorn worker count, exported by startup.py
+    web_concurrency: int = 1
+    
+    # Prisma connection pool, per worker (unset uses the URL or Prisma's default)
+    db_connection_limit: Optional[int] = None
+    db_pool_timeout_seconds: Optional[int] = 10
+    
+    # Read replica for get_user_by_id, get_claim_by_id and get_user_claims
+    database_replica_url: Optional[str] = None
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 2.0
+    read_your_writes_seconds: float = 10.0
+    
+    # Reads served by asyncpg instead of Prisma, any of
+    # get_claim_by_id, get_user_claims, get_user_by_id
+    fast_read_functions: List[str] = []
+    fast_read_pool_size: int = 10
+    
+    # Per-function query profiling and slow call log
+    profiling_enabled: bool = True
+    slow_query_threshold_ms: float = 200.0
+    
+    # User identity resolution
+    default_phone_country_code: str = "1"
+    identity_cache_max_entries: int = 10000
+    identity_cache_ttl_seconds: int = 3600
+    
+    # Read-through cache for claim and user reads
+    cache_enabled: bool = True
+    cache_max_entries: int = 5000
+    cache_ttl_seconds: int = 120
+    
+    # Cross-worker cache invalidation via Postgres LISTEN/NOTIFY
+    notification_bus_enabled: bool = True
+    notification_bus_install_triggers: bool = True
+    
+    # Server-sent claim change feed
+    change_feed_queue_size: int = 100
+    change_feed_heartbeat_seconds: float = 15.0
+    
+    # Idempotency-Key replay for claim creation and chat ("postgres", or
+    # "memory" for a single worker)
+    idempotency_backend: str = "postgres"
+    idempotency_ttl_seconds: int = 86400
+    idempotency_lock_seconds: int = 120
+    idempotency_max_entries: int = 10000
+    
+    # Duplicate claim detection on create ("return", "flag" or "off")
+    duplicate_claim_policy: str = "return"
+    duplicate_window_hours: int = 24
+    duplicate_similarity_threshold: float = 0.75
+    
+    # Draft claim sessions buffering agent updates until commit, held in
+    # an UNLOGGED Postgres table shared by every worker
+    draft_sessions_enabled: bool = True
+    draft_idle_seconds: float = 60.0
+    draft_max_age_seconds: float = 600.0
+    draft_sweep_interval_seconds: float = 5.0
+    draft_max_flush_failures: int = 3
+    
+    # Full-text claim search over incidents
+    search_default_limit: int = 20
+    search_max_limit: int = 100
+    
+    # Filing deadlines per jurisdiction: code -> {kind: period such as "90d" or "3y"}
+    deadline_rules: Dict[str, Dict[str, str]] = {
+        "default": {"statute_of_limitations": "3y"}
+    }
+    # Statuses whose claims no longer carry open deadlines
+    deadline_closed_statuses: List[str] = ["LITIGATION", "RESOLVED_AND_CLOSED"]
+    
+    # Case manager work queue and load-balanced assignment of new claims
+    case_managers: List[str] = []
+    work_queue_auto_assign: bool = True
+    work_queue_closed_statuses: List[str] = ["RESOLVED_AND_CLOSED"]
+    work_queue_reload_seconds: float = 300.0
+    
+    # Dashboard claim counters maintained by triggers, reconciled periodically
+    stats_install_triggers: bool = True
+    stats_reconcile_seconds: float = 3600.0
+    
+    # Typeahead directory of accounts and the vehicle catalog
+    directory_enabled: bool = True
+    directory_refresh_seconds: float = 60.0
+    directory_full_refresh_seconds: float = 3600.0
+    directory_batch_size: int = 2000
+    directory_fuzzy_threshold: float = 0.3
+    
+    # Bulk NDJSON ingestion
+    bulk_chunk_size: int = 500
+    
+    # Streaming claim export
+    export_batch_size: int = 1000
+    
+    # Parquet analytics snapshots
+    snapshot_dir: str = "snapshots"
+    snapshot_batch_size: int = 5000
+    snapshot_compact_min_files: int = 8
+    
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
@@ -0,0 +1,284 @@
+import json
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+from prisma import Prisma
+
+from ..config.config import settings
+from .duplicates import POLICY_FLAG, POLICY_RETURN, find_duplicate_claims_bulk
+from .workqueue import work_queue
+from .database import (
+    get_db,
+    build_claim_create_fields,
+    build_incident_create_data,
+    emit_claim_change,
+    invalidate_user_claims
+)
+
+logger = logging.getLogger(__name__)
+
+Row = Tuple[int, Dict[str, Any]]
+ChunkWriter = Callable[[Prisma, List[Row]], Awaitable[List[Dict[str, Any]]]]
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line number, decoded JSON or exception) from a byte stream"""
+    buffer = b""
+    line_no = 0
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, _decode(line)
+
+    if buffer.strip():
+        yield line_no + 1, _decode(buffer)
+
+
+def _decode(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def ingest(
+    lines: AsyncIterator[Tuple[int, Any]],
+    validate: Callable[[Any], Dict[str, Any]],
+    write_chunk: ChunkWriter,
+    chunk_size: int
+) -> AsyncIterator[Dict[str, Any]]:
+    """Validate rows as they arrive and write them in chunked transactions.
+
+    Yields one result per input line as soon as its chunk is written, then
+    a final summary. A failed chunk is retried row by row so one bad record
+    only fails itself. A row matching an existing record is reported with
+    "duplicate": true and counted under duplicates instead of created.
+    """
+    prisma = await get_db()
+    pending: List[Row] = []
+    summary = {"received": 0, "created": 0, "duplicates": 0, "failed": 0}
+
+    async def flush() -> AsyncIterator[Dict[str, Any]]:
+        results = await _write_isolated(prisma, pending, write_chunk)
+        pending.clear()
+        for result in results:
+            if result.get("duplicate"):
+                summary["duplicates"] += 1
+            else:
+                summary["created" if result["success"] else "failed"] += 1
+            yield result
+
+    async for line_no, payload in lines:
+        summary["received"] += 1
+
+        if isinstance(payload, Exception):
+            summary["failed"] += 1
+            yield {"line": line_no, "success": False, "error": f"Invalid JSON: {payload}"}
+            continue
+
+        try:
+            row = validate(payload)
+        except Exception as e:
+            summary["failed"] += 1
+            yield {"line": line_no, "success": False, "error": str(e)}
+            continue
+
+        pending.append((line_no, row))
+        if len(pending) >= chunk_size:
+            async for result in flush():
+                yield result
+
+    if pending:
+        async for result in flush():
+            yield result
+
+    logger.info(f"Bulk ingest finished: {summary}")
+    yield {"summary": summary}
+
+
+async def _write_isolated(prisma: Prisma, rows: List[Row], write_chunk: ChunkWriter) -> List[Dict[str, Any]]:
+    try:
+        return await write_chunk(prisma, rows)
+    except Exception as e:
+        if len(rows) == 1:
+            return [{"line": rows[0][0], "success": False, "error": str(e)}]
+        logger.warning(f"Bulk chunk of {len(rows)} rows failed, retrying row by row: {str(e)}")
+
+    results = []
+    for row in rows:
+        results.extend(await _write_isolated(prisma, [row], write_chunk))
+    return results
+
+
+async def write_claim_chunk(prisma: Prisma, rows: List[Row]) -> List[Dict[str, Any]]:
+    """Create incidents and claims for a chunk with two create_many calls.
+
+    Rows go through the same duplicate detection and case manager
+    assignment as create_claim: one windowed duplicate lookup for the
+    chunk, and managers reserved from the work queue per new claim.
+    """
+    user_ids = list({row["userId"] for _, row in rows})
+    users = await prisma.user.find_many(where={"id": {"in": user_ids}})
+    claimlist_ids = {user.id: user.claimlistId for user in users}
+
+    results = []
+    prepared = []
+    for line_no, row in rows:
+        user_id = row["userId"]
+        if user_id not in claimlist_ids:
+            results.append({"line": line_no, "success": False, "error": "User not found"})
+            continue
+        if not row.get("incident", {}).get("datetime"):
+            results.append({"line": line_no, "success": False, "error": "incident.datetime is required"})
+            continue
+        prepared.append((line_no, str(uuid.uuid4()), user_id, row, build_incident_create_data(row["incident"])))
+
+    # Same user, same incident: usually a re-run of a partial import
+    duplicates = await find_duplicate_claims_bulk(
+        prisma, [(claim_id, user_id, incident) for _, claim_id, user_id, _, incident in prepared]
+    )
+
+    incidents = []
+    claims = []
+    picked: List[Tuple[str, str]] = []
+    # Stamped here rather than by Prisma so change events can carry it
+    now = datetime.now(timezone.utc)
+    for (line_no, claim_id, user_id, row, incident_data), duplicate in zip(prepared, duplicates):
+        if duplicate and settings.duplicate_claim_policy == POLICY_RETURN:
+            results.append({
+                "line": line_no,
+                "success": True,
+                "duplicate": True,
+                "claim_id": duplicate[0],
+                "user_id": user_id,
+                "similarity": round(duplicate[1], 3)
+            })
+            continue
+
+        claim_fields = build_claim_create_fields(row)
+        # Balance new claims across case managers by open load
+        if settings.work_queue_auto_assign and not claim_fields.get("assignedCaseManager"):
+            manager = work_queue.pick()
+            if manager:
+                claim_fields["assignedCaseManager"] = manager
+                picked.append((claim_id, manager))
+
+        incident_id = str(uuid.uuid4())
+        incidents.append({"id": incident_id, **incident_data})
+        claims.append({
+            "id": claim_id,
+            "userId": user_id,
+            "claimlistId": claimlist_ids[user_id],
+            "incidentId": incident_id,
+            "createdAt": now,
+            "updatedAt": now,
+            **claim_fields
+        })
+        result = {
+            "line": line_no,
+            "success": True,
+            "claim_id": claim_id,
+            "user_id": user_id,
+            "assigned_case_manager": claim_fields.get("assignedCaseManager")
+        }
+        if duplicate and settings.duplicate_claim_policy == POLICY_FLAG:
+            result["possible_duplicate_of"] = duplicate[0]
+            result["similarity"] = round(duplicate[1], 3)
+        results.append(result)
+
+    if claims:
+        try:
+            async with prisma.tx() as tx:
+                await tx.incident.create_many(data=incidents)
+                await tx.claim.create_many(data=claims)
+        except Exception:
+            for _, manager in picked:
+                work_queue.release(manager)
+            raise
+        for claim_id, manager in picked:
+            work_queue.assigned(claim_id, manager)
+
+        for user_id in {claim["userId"] for claim in claims}:
+            await invalidate_user_claims(user_id)
+
+        for claim, incident in zip(claims, incidents):
+            await emit_claim_change({
+                "type": "created",
+                "claim_id": claim["id"],
+                "user_id": claim["userId"],
+                "changed_fields": [],
+                "updated_at": now,
+                "previous": None,
+                "claim": {**claim, "incident": incident}
+            })
+
+    results.sort(key=lambda result: result["line"])
+    return results
+
+
+async def write_user_chunk(prisma: Prisma, rows: List[Row]) -> List[Dict[str, Any]]:
+    """Create users and their claim lists for a chunk, skipping existing ones"""
+    emails = [row["email"] for _, row in rows]
+    phones = [row["phone"] for _, row in rows]
+    existing = await prisma.user.find_many(
+        where={"OR": [{"email": {"in": emails}}, {"phone": {"in": phones}}]}
+    )
+    taken = {user.email: user.id for user in existing}
+    taken.update({user.phone: user.id for user in existing})
+
+    results = []
+    claimlists = []
+    users = []
+    for line_no, row in rows:
+        existing_id = taken.get(row["email"]) or taken.get(row["phone"])
+        if existing_id:
+            results.append({
+                "line": line_no,
+                "success": False,
+                "error": "User with this email or phone already exists",
+                "user_id": existing_id
+            })
+            continue
+
+        user_id = str(uuid.uuid4())
+        claimlist_id = str(uuid.uuid4())
+        # Reserve identifiers so duplicates within the chunk are caught too
+        taken[row["email"]] = user_id
+        taken[row["phone"]] = user_id
+
+        claimlists.append({
+            "id": claimlist_id,
+            "name": f"Claims for {row.get('firstName', '')} {row.get('lastName', '')}",
+            "enable": True
+        })
+        users.append({"id": user_id, "claimlistId": claimlist_id, **row})
+        results.append({"line": line_no, "success": True, "user_id": user_id})
+
+    if users:
+        async with prisma.tx() as tx:
+            await tx.claimlist.create_many(data=claimlists)
+            await tx.user.create_many(data=users)
+
+    return results
+
+
+def ingest_claims(
+    chunks: AsyncIterator[bytes],
+    validate: Callable[[Any], Dict[str, Any]]
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream NDJSON claim rows into the database"""
+    return ingest(iter_ndjson(chunks), validate, write_claim_chunk, settings.bulk_chunk_size)
+
+
+def ingest_users(
+    chunks: AsyncIterator[bytes],
+    validate: Callable[[Any], Dict[str, Any]]
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream NDJSON user rows into the database"""
+    return ingest(iter_ndjson(chunks), validate, write_user_chunk, settings.bulk_chunk_size)
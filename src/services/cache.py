@@ -0,0 +1,228 @@
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..config.config import settings
+
+logger = logging.getLogger(__name__)
+
+EntityKey = Tuple[str, str]
+
+
+class CacheBackend(ABC):
+    """Storage interface for the read-through cache.
+
+    Values and entity versions both live in the backend so a shared store
+    (e.g. Redis) can replace the in-process one without touching callers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    async def get_version(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    async def bump_version(self, key: str) -> int:
+        ...
+
+    def size(self) -> int:
+        return 0
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """Bounded in-process LRU with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._version_counter = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        # Versions are kept so in-flight reads still detect the flush
+        for key in self._versions:
+            self._version_counter += 1
+            self._versions[key] = self._version_counter
+
+    async def get_version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def bump_version(self, key: str) -> int:
+        # A global counter keeps versions unique even after a key is evicted
+        self._version_counter += 1
+        self._versions[key] = self._version_counter
+        self._versions.move_to_end(key)
+        while len(self._versions) > self.max_entries * 2:
+            self._versions.popitem(last=False)
+        return self._version_counter
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class EntityCache:
+    """Read-through cache for entity reads with versioned invalidation.
+
+    Each entry records the version of its own entity and of every entity it
+    embeds (e.g. a claim embeds its user). A read is only a hit when all of
+    those versions are still current, so invalidating a user also retires
+    every cached claim that carries a copy of that user.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 120, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._invalidations: Dict[str, int] = {}
+
+    def use_backend(self, backend: CacheBackend) -> None:
+        """Swap the storage backend (e.g. for a shared store)"""
+        self.backend = backend
+
+    async def version(self, entity: str, entity_id: str) -> int:
+        """Current version of an entity, read before loading it"""
+        return await self.backend.get_version(_version_key(entity, entity_id))
+
+    async def get(self, entity: str, entity_id: str) -> Optional[Any]:
+        """Return a cached value, or None on miss"""
+        if not self.enabled:
+            return None
+
+        entry = await self.backend.get(_value_key(entity, entity_id))
+        if entry is not None:
+            value, versions = entry
+            if await self._versions_current(versions):
+                self._hits[entity] = self._hits.get(entity, 0) + 1
+                return value
+
+        self._misses[entity] = self._misses.get(entity, 0) + 1
+        return None
+
+    async def set(
+        self,
+        entity: str,
+        entity_id: str,
+        value: Any,
+        version: int,
+        depends_on: Iterable[EntityKey] = ()
+    ) -> None:
+        """Store a loaded value unless the entity changed while it was loading.
+
+        `version` must be the value returned by `version()` before the load
+        started. Cached values are shared between callers and must be
+        treated as read-only.
+        """
+        if not self.enabled or value is None:
+            return
+
+        if await self.version(entity, entity_id) != version:
+            return
+
+        versions = {_version_key(entity, entity_id): version}
+        for dep_entity, dep_id in depends_on:
+            if dep_id:
+                key = _version_key(dep_entity, dep_id)
+                versions[key] = await self.backend.get_version(key)
+
+        await self.backend.set(_value_key(entity, entity_id), (value, versions), self.ttl_seconds)
+
+    async def invalidate(self, entity: str, entity_id: Optional[str]) -> None:
+        """Retire an entity and every entry that embeds it"""
+        if not entity_id:
+            return
+        await self.backend.bump_version(_version_key(entity, entity_id))
+        await self.backend.delete(_value_key(entity, entity_id))
+        self._invalidations[entity] = self._invalidations.get(entity, 0) + 1
+
+    async def clear(self) -> None:
+        """Drop everything, e.g. after losing invalidation messages"""
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics per entity"""
+        entities = sorted(set(self._hits) | set(self._misses) | set(self._invalidations))
+        per_entity = {}
+        for entity in entities:
+            hits = self._hits.get(entity, 0)
+            misses = self._misses.get(entity, 0)
+            per_entity[entity] = {
+                "hits": hits,
+                "misses": misses,
+                "invalidations": self._invalidations.get(entity, 0),
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None
+            }
+
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "size": self.backend.size(),
+            "evictions": getattr(self.backend, "evictions", None),
+            "ttl_seconds": self.ttl_seconds,
+            "entities": per_entity
+        }
+
+    async def _versions_current(self, versions: Dict[str, int]) -> bool:
+        for key, version in versions.items():
+            if await self.backend.get_version(key) != version:
+                return False
+        return True
+
+
+def _value_key(entity: str, entity_id: str) -> str:
+    return f"{entity}:{entity_id}"
+
+
+def _version_key(entity: str, entity_id: str) -> str:
+    return f"v:{entity}:{entity_id}"
+
+
+# Global entity cache
+entity_cache = EntityCache(
+    backend=InMemoryLRUBackend(max_entries=settings.cache_max_entries),
+    ttl_seconds=settings.cache_ttl_seconds,
+    enabled=settings.cache_enabled,
+)
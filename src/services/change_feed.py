@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from ..config.config import settings
+from .notifications import notification_bus
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Channel carrying claim change events between workers
+CLAIM_CHANGES_CHANNEL = "agentpil_claim_changes"
+
+ChangeListener = Callable[[Dict[str, Any]], None]
+
+
+class ClaimChangeFeed:
+    """Fans claim change events out to per-user subscriber queues.
+
+    With the notification bus connected, events are published through
+    Postgres and delivered by every worker's listener (including the one
+    that published), so a subscriber sees changes made in any worker.
+    Without it, events are delivered to local subscribers only.
+    Listeners see every delivered message, whatever its user.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.change_feed_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listeners: List[ChangeListener] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """Register a function called with every message this worker delivers"""
+        self._listeners.append(listener)
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """Claim change hook: forward the event to every interested worker"""
+        message = _message(event)
+        if notification_bus.connected:
+            try:
+                await notification_bus.publish(CLAIM_CHANGES_CHANNEL, message)
+                return
+            except Exception as e:
+                logger.error(f"Publishing claim change failed, delivering locally: {str(e)}")
+        self.deliver(message)
+
+    async def on_notification(self, message: Dict[str, Any]) -> None:
+        """Notification bus handler for CLAIM_CHANGES_CHANNEL"""
+        self.deliver(message)
+
+    def deliver(self, message: Dict[str, Any]) -> None:
+        """Pass a message to the listeners and the local subscribers of its user"""
+        for listener in self._listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                logger.error(f"Claim change listener failed for {message.get('claim_id')}: {str(e)}")
+        for queue in self._subscribers.get(message.get("user_id"), ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client missed events, tell it to refetch instead
+                _drain(queue)
+                queue.put_nowait({"type": "resync", "user_id": message.get("user_id")})
+
+    async def listen(self, user_id: str, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield a user's change messages, or None after each idle heartbeat interval"""
+        heartbeat = heartbeat or settings.change_feed_heartbeat_seconds
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    async def sse(self, user_id: str) -> AsyncIterator[bytes]:
+        """Server-sent event stream of a user's claim changes"""
+        yield b"retry: 3000\n\n"
+        async for message in self.listen(user_id):
+            if message is None:
+                yield b": keep-alive\n\n"
+            else:
+                yield b"event: " + message["type"].encode() + b"\ndata: " + dumps(message) + b"\n\n"
+
+
+def _message(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact wire form of a claim change event, well under pg_notify's 8KB limit"""
+    updated_at = event.get("updated_at")
+    claim = event.get("claim") or {}
+    previous = event.get("previous")
+    return {
+        "type": event["type"],
+        "claim_id": event["claim_id"],
+        "user_id": event["user_id"],
+        "changed_fields": event.get("changed_fields", []),
+        "updatedAt": updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at,
+        "status": _enum_value(claim.get("status")),
+        "assignedCaseManager": claim.get("assignedCaseManager"),
+        "previous": {
+            "status": _enum_value(previous.get("status")),
+            "assignedCaseManager": previous.get("assignedCaseManager")
+        } if previous else None
+    }
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _drain(queue: asyncio.Queue) -> None:
+    while not queue.empty():
+        queue.get_nowait()
+
+
+# Global claim change feed
+claim_change_feed = ClaimChangeFeed()
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prisma import Prisma
+
+from .database import get_db
+from .profiling import instrumented
+
+logger = logging.getLogger(__name__)
+
+# Claim foreign keys that point at Role records
+_CLAIM_ROLE_FIELDS = {
+    "clientRoleId": "clientRole",
+    "injuredPartyRoleId": "injuredPartyRole",
+    "healthInsuranceProviderId": "healthInsuranceProvider",
+}
+
+
+class ClaimGraphLoader:
+    """Batched loader for the full relation graph hanging off claims.
+
+    Every relation level is fetched with a single `IN (...)` query across
+    all requested claims, so loading N claims costs a fixed number of
+    queries instead of N times the graph depth. Rows are memoized per
+    loader, so build one loader per request.
+    """
+
+    def __init__(self, prisma: Prisma):
+        self.prisma = prisma
+        self.query_count = 0
+        self._rows: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+
+    async def load(self, claim_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Load claim graphs in request order, returning (graphs, missing ids)"""
+        claim_rows = await self._fetch(
+            "claim", "id", claim_ids,
+            include={"user": True, "incident": True, "claimlist": True}
+        )
+        claims = {row["id"]: row for rows in claim_rows.values() for row in rows}
+        found_ids = list(claims)
+
+        # Level 1: one-to-one and one-to-many children of Claim
+        witnesses, defendants, treatment_links, media = await asyncio.gather(
+            self._fetch("witness", "claimId", found_ids),
+            self._fetch("defendant", "claimId", found_ids),
+            self._fetch("treatmentandinjury", "claimId", found_ids),
+            self._fetch("accidentmedia", "claimId", found_ids),
+        )
+
+        # Level 2: details rows and treatments
+        witness_details, defendant_details, treatments = await asyncio.gather(
+            self._fetch("witnessdetails", "witnessId", _ids(witnesses)),
+            self._fetch("defendantdetails", "defendantId", _ids(defendants)),
+            self._fetch("treatment", "id", _values(treatment_links, "treatmentId")),
+        )
+
+        # Level 3: injuries plus every Role referenced so far
+        role_ids = {
+            claim[field] for claim in claims.values()
+            for field in _CLAIM_ROLE_FIELDS if claim.get(field)
+        }
+        role_ids.update(_values(witness_details, "roleId"))
+        role_ids.update(_values(defendant_details, "defendantAccountId", "defendantInsuranceCarrierId"))
+        role_ids.update(_values(treatments, "hospitalId", "doctorId"))
+        injuries, roles = await asyncio.gather(
+            self._fetch("injury", "treatmentId", _ids(treatments)),
+            self._fetch("role", "id", role_ids),
+        )
+
+        # Level 4: accounts and role types behind the roles
+        accounts, role_types = await asyncio.gather(
+            self._fetch("account", "id", _values(roles, "accountId")),
+            self._fetch("roletype", "id", _values(roles, "roletypeId")),
+        )
+
+        role_by_id = {}
+        for rows in roles.values():
+            for role in rows:
+                role["account"] = _first(accounts, role.get("accountId"))
+                role["roletype"] = _first(role_types, role.get("roletypeId"))
+                role_by_id[role["id"]] = role
+
+        for rows in treatments.values():
+            for treatment in rows:
+                treatment["injuries"] = injuries.get(treatment["id"], [])
+                treatment["role"] = role_by_id.get(treatment.get("hospitalId"))
+                treatment["doctor"] = role_by_id.get(treatment.get("doctorId"))
+
+        graphs = []
+        missing = []
+        for claim_id in claim_ids:
+            claim = claims.get(claim_id)
+            if claim is None:
+                missing.append(claim_id)
+                continue
+
+            for fk_field, relation in _CLAIM_ROLE_FIELDS.items():
+                claim[relation] = role_by_id.get(claim.get(fk_field))
+
+            witness = _first(witnesses, claim_id)
+            if witness:
+                witness["witnessDetails"] = witness_details.get(witness["id"], [])
+                for detail in witness["witnessDetails"]:
+                    detail["role"] = role_by_id.get(detail["roleId"])
+            claim["witness"] = witness
+
+            defendant = _first(defendants, claim_id)
+            if defendant:
+                defendant["defendantDetails"] = sorted(
+                    defendant_details.get(defendant["id"], []),
+                    key=lambda detail: detail.get("sort") or 0
+                )
+                for detail in defendant["defendantDetails"]:
+                    detail["defendantAccount"] = role_by_id.get(detail["defendantAccountId"])
+                    detail["defendantInsuranceCarrier"] = role_by_id.get(detail.get("defendantInsuranceCarrierId"))
+            claim["defendant"] = defendant
+
+            treatment_link = _first(treatment_links, claim_id)
+            if treatment_link:
+                treatment_link["treatment"] = _first(treatments, treatment_link["treatmentId"])
+            claim["treatmentsAndInjuries"] = treatment_link
+
+            claim["media"] = media.get(claim_id, [])
+            graphs.append(claim)
+
+        logger.info(f"Loaded {len(graphs)} claim graphs with {self.query_count} queries")
+        return graphs, missing
+
+    async def _fetch(
+        self,
+        model: str,
+        field: str,
+        keys: Iterable[str],
+        include: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch rows whose `field` is in keys, grouped by that field"""
+        memo = self._rows.setdefault((model, field), {})
+        pending = sorted({key for key in keys if key and key not in memo})
+
+        if pending:
+            self.query_count += 1
+            args: Dict[str, Any] = {"where": {field: {"in": pending}}}
+            if include:
+                args["include"] = include
+            records = await getattr(self.prisma, model).find_many(**args)
+
+            for key in pending:
+                memo[key] = []
+            for record in records:
+                row = record.model_dump()
+                memo[row[field]].append(row)
+
+        return {key: memo[key] for key in keys if key and key in memo}
+
+
+def _ids(grouped: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    return [row["id"] for rows in grouped.values() for row in rows]
+
+
+def _values(grouped: Dict[str, List[Dict[str, Any]]], *fields: str) -> List[str]:
+    return [row[field] for rows in grouped.values() for row in rows for field in fields if row.get(field)]
+
+
+def _first(grouped: Dict[str, List[Dict[str, Any]]], key: Optional[str]) -> Optional[Dict[str, Any]]:
+    rows = grouped.get(key) if key else None
+    return rows[0] if rows else None
+
+
+@instrumented
+async def get_claim_graphs(claim_ids: List[str]) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+    """Get full claim graphs for several claims, returning (graphs, missing ids)"""
+    try:
+        prisma = await get_db()
+        loader = ClaimGraphLoader(prisma)
+        return await loader.load(claim_ids)
+
+    except Exception as e:
+        logger.error(f"Error loading claim graphs: {str(e)}")
+        return None
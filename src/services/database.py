@@ -1,10 +1,33 @@
 import os
+import time
+import asyncio
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 from prisma import Prisma
 from prisma.models import User, Claim, ClaimList, Incident
 
+from ..config.config import settings
+from .cache import entity_cache
+from .pg import prisma_datasource_url
+from .singleflight import SingleFlight
+from .profiling import instrument_prisma, instrumented
+from .duplicates import POLICY_FLAG, POLICY_RETURN, find_duplicate_claim
+from . import fast_reads
+from .fast_reads import CLAIM_STATUS_DB_VALUES
+from .etags import PreconditionFailed, claim_etag, etag_matches, user_etag
+from .drafts import draft_store
+from .cursors import InvalidCursor, decode_cursor, encode_cursor
+from .workqueue import work_queue
+from .identity import (
+    KIND_ID,
+    KIND_UNKNOWN,
+    classify_identifier,
+    identifier_matches,
+    identity_cache,
+    lookup_candidates
+)
+
 # Handle dotenv import gracefully
 try:
     from dotenv import load_dotenv
@@ -14,27 +37,259 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-# Global Prisma client
+# Count engine round trips for the slow query log and /metrics
+instrument_prisma(Prisma)
+
+# Global Prisma client, created in the app lifespan via initialize_db
 _prisma: Optional[Prisma] = None
 
+# Guards lazy creation so concurrent first requests share one client
+_prisma_lock = asyncio.Lock()
+
+# Optional read replica client and its last measured lag
+_replica: Optional[Prisma] = None
+_replica_lock = asyncio.Lock()
+_replica_lag: Dict[str, Any] = {"seconds": None, "checked_at": 0.0}
+_replica_lag_lock = asyncio.Lock()
+
+# (entity, id) -> monotonic deadline until which reads go to the primary
+_recent_writes: Dict[Tuple[str, str], float] = {}
+
+# Coalesces concurrent identical reads
+read_flight = SingleFlight()
+
+# Coroutines notified after a claim is created or updated
+ClaimChangeHook = Callable[[Dict[str, Any]], Awaitable[None]]
+_claim_change_hooks: List[ClaimChangeHook] = []
+
+# Coroutines notified after a user profile is updated
+UserChangeHook = Callable[[Dict[str, Any]], Awaitable[None]]
+_user_change_hooks: List[UserChangeHook] = []
+
+# Prisma engine metrics reported by get_pool_stats
+_POOL_GAUGES = {
+    "prisma_pool_connections_open": "open",
+    "prisma_pool_connections_busy": "busy",
+    "prisma_pool_connections_idle": "idle",
+    "prisma_client_queries_active": "active_queries",
+    "prisma_client_queries_wait": "waiting"
+}
+_POOL_WAIT_HISTOGRAM = "prisma_client_queries_wait_histogram_ms"
+
+# Claim fields update_claim writes, all matching the Prisma schema directly
+CLAIM_UPDATE_FIELDS = {
+    'status', 'injured', 'relationship', 'otherRelationship', 
+    'healthInsurance', 'healthInsuranceNumber', 'isOver65', 
+    'receiveMedicare', 'assignedCaseManager',
+    'policeReportCompleted', 'supportingDocument', 'workRelated',
+    'witness', 'priorRepresentation'
+}
+
+def _new_client() -> Prisma:
+    """Create a Prisma client with the configured pool settings"""
+    if not os.environ.get("DATABASE_URL"):
+        return Prisma()
+    return Prisma(datasource={
+        "url": prisma_datasource_url(
+            connection_limit=settings.db_connection_limit,
+            pool_timeout=settings.db_pool_timeout_seconds
+        )
+    })
+
 async def get_db() -> Prisma:
     """Get Prisma client instance"""
     global _prisma
-    if _prisma is None:
-        _prisma = Prisma()
-        await _prisma.connect()
+    if _prisma is not None:
+        return _prisma
+    
+    async with _prisma_lock:
+        if _prisma is None:
+            client = _new_client()
+            await client.connect()
+            # Publish only once connected so no caller sees a half-ready client
+            _prisma = client
     return _prisma
 
-async def close_db() -> None:
-    """Close Prisma client connection"""
-    global _prisma
-    if _prisma is not None:
+async def get_replica_db() -> Optional[Prisma]:
+    """Get the read replica client, None when no replica is configured"""
+    global _replica
+    if _replica is not None or not settings.database_replica_url:
+        return _replica
+    
+    async with _replica_lock:
+        if _replica is None:
+            client = Prisma(datasource={
+                "url": prisma_datasource_url(
+                    settings.database_replica_url,
+                    connection_limit=settings.db_connection_limit,
+                    pool_timeout=settings.db_pool_timeout_seconds
+                )
+            })
+            await client.connect()
+            _replica = client
+    return _replica
+
+async def get_replica_lag() -> Optional[float]:
+    """Replica lag in seconds, re-measured at most once per check interval.
+    
+    None means the replica is unconfigured or could not be checked. A
+    replica that has replayed everything it received reports 0 even when
+    the primary has been idle, which the replay timestamp alone would not.
+    """
+    replica = await get_replica_db()
+    if replica is None:
+        return None
+    
+    if time.monotonic() - _replica_lag["checked_at"] < settings.replica_lag_check_interval_seconds:
+        return _replica_lag["seconds"]
+    
+    async with _replica_lag_lock:
+        # Another caller may have refreshed it while we waited
+        if time.monotonic() - _replica_lag["checked_at"] < settings.replica_lag_check_interval_seconds:
+            return _replica_lag["seconds"]
+        
         try:
-            await _prisma.disconnect()
-            _prisma = None
-            logger.info("Database connection closed")
+            rows = await replica.query_raw(
+                """
+                SELECT CASE
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                END::float AS lag
+                """
+            )
+            lag = float(rows[0]["lag"]) if rows else None
         except Exception as e:
-            logger.error(f"Error closing database connection: {str(e)}")
+            logger.error(f"Replica lag check failed: {str(e)}")
+            lag = None
+        
+        _replica_lag["seconds"] = lag
+        _replica_lag["checked_at"] = time.monotonic()
+        return lag
+
+def mark_recent_write(*keys: Tuple[str, Optional[str]]) -> None:
+    """Send reads of these entities to the primary for the read-your-writes window"""
+    if not settings.database_replica_url:
+        return
+    
+    # Never shorter than the lag we tolerate, or a lagging replica could
+    # serve (and cache) the pre-write row after the window closes
+    deadline = time.monotonic() + max(settings.read_your_writes_seconds, settings.replica_max_lag_seconds)
+    for key in keys:
+        if key[1]:
+            _recent_writes[key] = deadline
+    
+    if len(_recent_writes) > 10000:
+        now = time.monotonic()
+        for stale in [k for k, until in _recent_writes.items() if until <= now]:
+            del _recent_writes[stale]
+
+def recently_written(key: Tuple[str, Optional[str]]) -> bool:
+    """Whether an entity was written inside the read-your-writes window"""
+    until = _recent_writes.get(key)
+    if until is None:
+        return False
+    if until <= time.monotonic():
+        _recent_writes.pop(key, None)
+        return False
+    return True
+
+async def use_replica(*keys: Tuple[str, Optional[str]]) -> bool:
+    """Whether a pure read of these entities may go to the replica"""
+    if not settings.database_replica_url or any(recently_written(key) for key in keys):
+        return False
+    
+    try:
+        lag = await get_replica_lag()
+        return lag is not None and lag <= settings.replica_max_lag_seconds
+    except Exception as e:
+        logger.error(f"Replica unavailable, reading from primary: {str(e)}")
+        return False
+
+async def get_read_db(*keys: Tuple[str, Optional[str]]) -> Prisma:
+    """Client for a pure read: the replica when fresh enough, else the primary"""
+    if await use_replica(*keys):
+        return await get_replica_db()
+    return await get_db()
+
+async def get_replica_status() -> Dict[str, Any]:
+    """Get replica configuration and last measured lag"""
+    if not settings.database_replica_url:
+        return {"configured": False}
+    lag = _replica_lag["seconds"]
+    return {
+        "configured": True,
+        "connected": _replica is not None,
+        "lag_seconds": lag,
+        "in_use": lag is not None and lag <= settings.replica_max_lag_seconds,
+        "read_your_writes_keys": len(_recent_writes)
+    }
+
+async def close_db() -> None:
+    """Close Prisma client connections"""
+    global _prisma, _replica
+    await fast_reads.close_pools()
+    
+    async with _replica_lock:
+        if _replica is not None:
+            try:
+                await _replica.disconnect()
+                _replica = None
+            except Exception as e:
+                logger.error(f"Error closing replica connection: {str(e)}")
+    
+    async with _prisma_lock:
+        if _prisma is not None:
+            try:
+                await _prisma.disconnect()
+                _prisma = None
+                logger.info("Database connection closed")
+            except Exception as e:
+                logger.error(f"Error closing database connection: {str(e)}")
+
+def _histogram_quantile(buckets: List[Any], count: int, quantile: float) -> Optional[float]:
+    """Upper bound of the bucket holding the given quantile"""
+    if not count:
+        return None
+    target = count * quantile
+    seen = 0
+    for upper, bucket_count in buckets:
+        seen += bucket_count
+        if seen >= target:
+            return upper
+    return None
+
+async def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool saturation from Prisma engine metrics"""
+    if _prisma is None:
+        return {"connected": False}
+    
+    stats: Dict[str, Any] = {
+        "connected": True,
+        "connection_limit": settings.db_connection_limit,
+        "pool_timeout_seconds": settings.db_pool_timeout_seconds
+    }
+    try:
+        metrics = await _prisma.get_metrics()
+    except Exception as e:
+        logger.error(f"Error reading pool metrics: {str(e)}")
+        stats["error"] = str(e)
+        return stats
+    
+    for metric in [*metrics.gauges, *metrics.counters]:
+        if metric.key in _POOL_GAUGES:
+            stats[_POOL_GAUGES[metric.key]] = metric.value
+    
+    # Time queries spent waiting for a free connection
+    for metric in metrics.histograms:
+        if metric.key == _POOL_WAIT_HISTOGRAM:
+            wait = metric.value
+            stats["acquire_ms"] = {
+                "count": wait.count,
+                "avg": wait.sum / wait.count if wait.count else 0.0,
+                "p95": _histogram_quantile(wait.buckets, wait.count, 0.95),
+                "p99": _histogram_quantile(wait.buckets, wait.count, 0.99)
+            }
+    return stats
 
 async def get_db_status() -> Dict[str, Any]:
     """Get database connection status"""
@@ -53,36 +308,162 @@ async def get_db_status() -> Dict[str, Any]:
         }
 
 
-async def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
-    """Get user by ID using Prisma"""
-    try:
-        prisma = await get_db()
-        
-        # Try UUID first, then email/phone
+async def get_cache_stats() -> Dict[str, Any]:
+    """Get read-through cache and read coalescing metrics"""
+    return {
+        **entity_cache.stats(),
+        "single_flight": read_flight.stats()
+    }
+
+async def invalidate_entity_change(event: Dict[str, Any]) -> None:
+    """Evict cached entries for a row change reported by another worker"""
+    table = event.get("table")
+    
+    if table == "Claim":
+        mark_recent_write(("claim", event.get("id")), ("user", event.get("userId")))
+        await entity_cache.invalidate("claim", event.get("id"))
+        await entity_cache.invalidate("user_claims", event.get("userId"))
+    elif table == "Incident":
+        mark_recent_write(("claim", event.get("claimId")), ("user", event.get("userId")))
+        await entity_cache.invalidate("claim", event.get("claimId"))
+        await entity_cache.invalidate("user_claims", event.get("userId"))
+    elif table == "User":
+        mark_recent_write(("user", event.get("id")))
+        identity_cache.invalidate_user(event.get("id"))
+        await entity_cache.invalidate("user", event.get("id"))
+
+def register_claim_change_hook(hook: ClaimChangeHook) -> None:
+    """Register a coroutine called with every claim change event.
+    
+    Events carry type ("created" or "updated"), claim_id, user_id,
+    changed_fields, updated_at, previous (status, assignedCaseManager and
+    incident before an update, None on create) and the new claim dict.
+    """
+    _claim_change_hooks.append(hook)
+
+async def emit_claim_change(event: Dict[str, Any]) -> None:
+    """Run claim change hooks; a failing hook never fails the write"""
+    for hook in _claim_change_hooks:
         try:
-            import uuid
-            uuid.UUID(user_id)
-            user = await prisma.user.find_unique(
-                where={"id": user_id},
-                include={"claimlist": True}
-            )
-        except ValueError:
-            user = await prisma.user.find_first(
-                where={
-                    "OR": [
-                        {"email": user_id},
-                        {"phone": user_id}
-                    ]
-                },
+            await hook(event)
+        except Exception as e:
+            logger.error(f"Claim change hook failed for {event.get('claim_id')}: {str(e)}")
+
+def register_user_change_hook(hook: UserChangeHook) -> None:
+    """Register a coroutine called after every user profile update.
+    
+    Events carry user_id, changed_fields (the User columns written) and
+    the new user dict.
+    """
+    _user_change_hooks.append(hook)
+
+async def emit_user_change(event: Dict[str, Any]) -> None:
+    """Run user change hooks; a failing hook never fails the write"""
+    for hook in _user_change_hooks:
+        try:
+            await hook(event)
+        except Exception as e:
+            logger.error(f"User change hook failed for {event.get('user_id')}: {str(e)}")
+
+async def clear_caches() -> None:
+    """Drop every cached read, e.g. after missing change notifications"""
+    identity_cache.clear()
+    await entity_cache.clear()
+    logger.info("Read caches cleared")
+
+async def _load_user(user_id: str) -> Optional[Dict[str, Any]]:
+    """Load a user by primary key through the entity cache"""
+    cached = await entity_cache.get("user", user_id)
+    if cached is not None:
+        return cached
+    
+    version = await entity_cache.version("user", user_id)
+    replica = await use_replica(("user", user_id))
+    if fast_reads.enabled("get_user_by_id"):
+        user_dict = await fast_reads.fetch_user("id", user_id, replica=replica)
+    else:
+        prisma = await get_replica_db() if replica else await get_db()
+        user = await prisma.user.find_unique(
+            where={"id": user_id},
+            include={"claimlist": True}
+        )
+        user_dict = user.model_dump() if user else None
+    await entity_cache.set("user", user_id, user_dict, version)
+    return user_dict
+
+async def _find_user_by_identifier(kind: str, value: str, raw: str, replica: bool) -> Optional[Dict[str, Any]]:
+    """Hit the exact unique index for the identifier kind"""
+    prisma = await get_replica_db() if replica else await get_db()
+    for candidate in lookup_candidates(kind, value, raw):
+        if fast_reads.enabled("get_user_by_id"):
+            user = await fast_reads.fetch_user(kind, candidate, replica=replica)
+        else:
+            found = await prisma.user.find_unique(
+                where={kind: candidate},
                 include={"claimlist": True}
             )
-        
+            user = found.model_dump() if found else None
+        if user:
+            return user
+    return None
+
+@instrumented
+async def _resolve_user(user_id: str) -> Optional[Dict[str, Any]]:
+    """Resolve a UUID, email or phone to a user record"""
+    kind, value = classify_identifier(user_id)
+    
+    if kind == KIND_ID:
+        return await _load_user(value)
+    
+    if kind == KIND_UNKNOWN:
+        # Not a recognizable identifier, keep the legacy exact-match lookup
+        prisma = await get_db()
+        user = await prisma.user.find_first(
+            where={
+                "OR": [
+                    {"email": value},
+                    {"phone": value}
+                ]
+            },
+            include={"claimlist": True}
+        )
         return user.model_dump() if user else None
+    
+    # Known identifier, resolve through the cached mapping first
+    cached_id = identity_cache.get(kind, value)
+    if cached_id:
+        user_dict = await _load_user(cached_id)
+        if user_dict and identifier_matches(kind, value, user_dict):
+            return user_dict
+        # Identifier moved to another user or the user is gone
+        identity_cache.invalidate_user(cached_id)
+    
+    replica = await use_replica()
+    user = await _find_user_by_identifier(kind, value, user_id, replica)
+    if user is None and replica:
+        # The identifier may have just been set on the primary
+        user = await _find_user_by_identifier(kind, value, user_id, False)
+    
+    if not user:
+        return None
+    
+    identity_cache.set(kind, value, user["id"])
+    if replica and recently_written(("user", user["id"])):
+        return await _load_user(user["id"])
+    return user
+
+@instrumented
+async def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
+    """Get user by ID, email or phone using Prisma"""
+    try:
+        # Concurrent lookups of the same identifier share one resolution
+        return await read_flight.do(("user", user_id.strip()), lambda: _resolve_user(user_id))
         
     except Exception as e:
         logger.error(f"Error getting user: {str(e)}")
         return None
 
+@instrumented
 async def create_user(user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Create new user with claimlist"""
     try:
@@ -116,6 +497,51 @@ async def create_user(user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
 
+def build_incident_create_data(incident_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map API incident fields to Prisma Incident create data"""
+    incident_create_data = {
+        "datetime": datetime.fromisoformat(incident_data['datetime']) if incident_data.get('datetime') else None,
+        "location": incident_data.get('location', ''),
+        "description": incident_data.get('description', ''),
+        "workRelated": incident_data.get('workRelated', False),
+        "reportCompleted": incident_data.get('reportCompleted', False),
+        "policeReportCompleted": incident_data.get('policeReportCompleted', False),
+        "supportingDocument": incident_data.get('supportingDocument', False),
+        "witness": incident_data.get('witness', False),
+        "priorRepresentation": incident_data.get('priorRepresentation', False),
+        "lostEarning": incident_data.get('lostEarning', ''),
+        "reportNumber": incident_data.get('reportNumber', ''),
+        "vehicleRole": incident_data.get('vehicleRole'),
+        "vehicleCount": incident_data.get('vehicleCount'),
+        "busOrVehicle": incident_data.get('busOrVehicle')
+    }
+    
+    # Remove None values from incident_create_data
+    return {k: v for k, v in incident_create_data.items() if v is not None}
+
+def build_claim_create_fields(claim_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map API claim fields to Prisma Claim scalar create data"""
+    claim_fields = {
+        "status": claim_data.get('status', 'PENDING_INFORMATION'),
+        "injured": claim_data.get('injured', True),
+        "healthInsurance": claim_data.get('healthInsurance'),
+        "relationship": claim_data.get('relationship'),
+        "otherRelationship": claim_data.get('otherRelationship'),
+        "healthInsuranceNumber": claim_data.get('healthInsuranceNumber'),
+        "isOver65": claim_data.get('isOver65'),
+        "assignedCaseManager": claim_data.get('assignedCaseManager')
+    }
+    
+    # Remove None values from claim_fields
+    return {k: v for k, v in claim_fields.items() if v is not None}
+
+async def invalidate_user_claims(user_id: str) -> None:
+    """Retire cached claim listings for a user after claims were added"""
+    mark_recent_write(("user", user_id))
+    await entity_cache.invalidate("user_claims", user_id)
+    read_flight.forget_where(lambda key: key[:2] == ("user_claims", user_id))
+
+@instrumented
 async def create_claim(claim_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Create claim with incident data"""
     try:
@@ -142,108 +568,361 @@ async def create_claim(claim_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         logger.info(f"Incident data: {incident_data}")
               
         # Map API fields to Prisma schema fields with default values
-        incident_create_data = {
-
-            "datetime": datetime.fromisoformat(incident_data['datetime']) if incident_data.get('datetime') else None,
-            "location": incident_data.get('location', ''),
-            "description": incident_data.get('description', ''),
-            "workRelated": incident_data.get('workRelated', False),
-            "reportCompleted": incident_data.get('reportCompleted', False),
-            "policeReportCompleted": incident_data.get('policeReportCompleted', False),
-            "supportingDocument": incident_data.get('supportingDocument', False),
-            "witness": incident_data.get('witness', False),
-            "priorRepresentation": incident_data.get('priorRepresentation', False),
-            "lostEarning": incident_data.get('lostEarning', ''),
-            "reportNumber": incident_data.get('reportNumber', ''),
-            "vehicleRole": incident_data.get('vehicleRole'),
-            "vehicleCount": incident_data.get('vehicleCount'),
-            "busOrVehicle": incident_data.get('busOrVehicle')
-        }
-        
-        # Remove None values from incident_create_data
-        incident_create_data = {k: v for k, v in incident_create_data.items() if v is not None}
+        incident_create_data = build_incident_create_data(incident_data)
         
         # Log the incident create data for debugging
         logger.info(f"Incident create data: {incident_create_data}")
         
-        # Create incident
-        incident = await prisma.incident.create(data=incident_create_data)
-        
-        # Prepare claim data with proper relationships
-        claim_create_data = {
-            "status": claim_data.get('status', 'PENDING_INFORMATION'),
-            "user": {"connect": {"id": user.id}},
-            "claimlist": {"connect": {"id": user.claimlistId}},
-            "incident": {"connect": {"id": incident.id}},  # Always connect the incident
-            "injured": claim_data.get('injured', True),
-            "healthInsurance": claim_data.get('healthInsurance'),
-            "relationship": claim_data.get('relationship'),
-            "otherRelationship": claim_data.get('otherRelationship'),
-            "healthInsuranceNumber": claim_data.get('healthInsuranceNumber'),
-            "isOver65": claim_data.get('isOver65')
-        }
+        # Same user, same incident: usually a restarted intake
+        duplicate = await find_duplicate_claim(prisma, user.id, incident_create_data)
+        if duplicate and settings.duplicate_claim_policy == POLICY_RETURN:
+            existing, similarity = duplicate
+            return {
+                "success": True,
+                "duplicate": True,
+                "message": "A matching claim already exists for this incident",
+                "claim_id": existing.id,
+                "status": existing.status,
+                "created_at": existing.createdAt.isoformat(),
+                "user_id": user.id,
+                "similarity": round(similarity, 3)
+            }
         
-        # Remove None values from claim_create_data
-        claim_create_data = {k: v for k, v in claim_create_data.items() if v is not None}
+        claim_fields = build_claim_create_fields(claim_data)
         
-        # Log the claim create data for debugging
-        logger.info(f"Claim create data: {claim_create_data}")
+        # Balance new claims across case managers by open load
+        assigned = None
+        if settings.work_queue_auto_assign and not claim_fields.get("assignedCaseManager"):
+            assigned = work_queue.pick()
+            if assigned:
+                claim_fields["assignedCaseManager"] = assigned
         
-        # Create claim
-        claim = await prisma.claim.create(
-            data=claim_create_data,
-            include={
-                "user": True,
-                "incident": True,
-                "claimlist": True
+        try:
+            # Create incident
+            incident = await prisma.incident.create(data=incident_create_data)
+            
+            # Prepare claim data with proper relationships
+            claim_create_data = {
+                "user": {"connect": {"id": user.id}},
+                "claimlist": {"connect": {"id": user.claimlistId}},
+                "incident": {"connect": {"id": incident.id}},  # Always connect the incident
+                **claim_fields
             }
-        )
+            
+            # Log the claim create data for debugging
+            logger.info(f"Claim create data: {claim_create_data}")
+            
+            # Create claim
+            claim = await prisma.claim.create(
+                data=claim_create_data,
+                include={
+                    "user": True,
+                    "incident": True,
+                    "claimlist": True
+                }
+            )
+        except Exception:
+            if assigned:
+                work_queue.release(assigned)
+            raise
+        if assigned:
+            work_queue.assigned(claim.id, assigned)
         
-        return {
+        # The user's claim listings no longer include every claim
+        await invalidate_user_claims(user.id)
+        
+        await emit_claim_change({
+            "type": "created",
+            "claim_id": claim.id,
+            "user_id": user.id,
+            "changed_fields": [],
+            "updated_at": claim.updatedAt,
+            "previous": None,
+            "claim": claim.model_dump()
+        })
+        
+        result = {
             "success": True,
             "message": "Claim created successfully",
             "claim_id": claim.id,
             "status": claim.status,
             "created_at": claim.createdAt.isoformat(),
-            "user_id": user.id
+            "user_id": user.id,
+            "assigned_case_manager": claim.assignedCaseManager
         }
+        if duplicate and settings.duplicate_claim_policy == POLICY_FLAG:
+            result["possible_duplicate_of"] = duplicate[0].id
+            result["similarity"] = round(duplicate[1], 3)
+        return result
         
     except Exception as e:
         logger.error(f"Error creating claim: {str(e)}")
         logger.exception("Full traceback:")
         return {"success": False, "message": f"Failed to create claim: {str(e)}"}
         
+@instrumented
+async def _fetch_claim(claim_id: str) -> Optional[Dict[str, Any]]:
+    """Load a claim from Postgres and populate the cache"""
+    version = await entity_cache.version("claim", claim_id)
+    include = {
+        "user": True,
+        "incident": True,
+        "claimlist": True
+    }
+    
+    async def load(replica: bool) -> Optional[Dict[str, Any]]:
+        if fast_reads.enabled("get_claim_by_id"):
+            return await fast_reads.fetch_claim(claim_id, replica=replica)
+        prisma = await get_replica_db() if replica else await get_db()
+        claim = await prisma.claim.find_unique(where={"id": claim_id}, include=include)
+        return claim.model_dump() if claim else None
+    
+    replica = await use_replica(("claim", claim_id))
+    claim_dict = await load(replica)
+    
+    # The replica may predate a claim or user write made by this caller
+    if replica and (claim_dict is None or recently_written(("user", claim_dict["userId"]))):
+        claim_dict = await load(False)
+    
+    if not claim_dict:
+        return None
+    
+    await entity_cache.set(
+        "claim", claim_id, claim_dict, version,
+        depends_on=[("user", claim_dict["userId"])]
+    )
+    return claim_dict
+
+@instrumented
 async def get_claim_by_id(claim_id: str) -> Optional[Dict[str, Any]]:
     """Get claim by ID"""
     try:
+        cached = await entity_cache.get("claim", claim_id)
+        if cached is not None:
+            return await draft_store.overlay(cached)
+        
+        # Concurrent misses for the same claim share one query
+        claim = await read_flight.do(("claim", claim_id), lambda: _fetch_claim(claim_id))
+        return await draft_store.overlay(claim) if claim else claim
+        
+    except Exception as e:
+        logger.error(f"Error getting claim: {str(e)}")
+        return None
+
+def _epoch_ms(value: Optional[datetime]) -> int:
+    return round(value.timestamp() * 1000) if value else 0
+
+def claim_version(claim: Dict[str, Any]) -> Tuple[int, ...]:
+    """Version of a claim payload: updatedAt millis of claim, incident and user,
+    plus the draft revision when pending draft fields are overlaid"""
+    incident = claim.get("incident") or {}
+    user = claim.get("user") or {}
+    version = (
+        _epoch_ms(claim.get("updatedAt")),
+        _epoch_ms(incident.get("updatedAt")),
+        _epoch_ms(user.get("updatedAt"))
+    )
+    draft = claim.get("draft")
+    return version + (draft["revision"],) if draft else version
+
+async def _with_draft(claim_id: str, version: Tuple[int, ...]) -> Tuple[int, ...]:
+    """A stored claim version extended with its pending draft revision"""
+    revision = await draft_store.revision(claim_id)
+    return version + (revision,) if revision else version
+
+def user_version(user: Dict[str, Any]) -> int:
+    """Version of a user payload: its updatedAt millis"""
+    return _epoch_ms(user.get("updatedAt"))
+
+def claims_list_version(claims: List[Dict[str, Any]]) -> Tuple[int, ...]:
+    """Version of a claim listing: count and newest claim, incident and user
+    updatedAt, plus the summed draft revisions of overlaid claims"""
+    versions = [claim_version(claim) for claim in claims]
+    version = (
+        len(claims),
+        max((v[0] for v in versions), default=0),
+        max((v[1] for v in versions), default=0),
+        max((v[2] for v in versions), default=0)
+    )
+    drafts = sum(claim["draft"]["revision"] for claim in claims if claim.get("draft"))
+    return version + (drafts,) if drafts else version
+
+async def _query_claim_version(client: Any, claim_id: str, lock: bool = False) -> Optional[Tuple[int, int, int]]:
+    """Read a claim version from Postgres, optionally locking the claim row"""
+    rows = await client.query_raw(
+        f"""
+        SELECT (EXTRACT(EPOCH FROM c."updatedAt") * 1000)::bigint AS claim_ms,
+               (EXTRACT(EPOCH FROM i."updatedAt") * 1000)::bigint AS incident_ms,
+               (EXTRACT(EPOCH FROM u."updatedAt") * 1000)::bigint AS user_ms
+        FROM "Claim" c
+        JOIN "User" u ON u.id = c."userId"
+        LEFT JOIN "Incident" i ON i.id = c."incidentId"
+        WHERE c.id = $1
+        {"FOR UPDATE OF c" if lock else ""}
+        """,
+        claim_id
+    )
+    if not rows:
+        return None
+    row = rows[0]
+    return (int(row["claim_ms"] or 0), int(row["incident_ms"] or 0), int(row["user_ms"] or 0))
+
+@instrumented
+async def get_claim_version(claim_id: str, fresh: bool = False) -> Optional[Tuple[int, ...]]:
+    """Get a claim's version without loading the full claim.
+    
+    Served from the cached payload when present, otherwise from a single
+    primary key join. Pass fresh=True to always ask Postgres.
+    """
+    try:
+        if not fresh:
+            cached = await entity_cache.get("claim", claim_id)
+            if cached is not None:
+                return await _with_draft(claim_id, claim_version(cached))
+        
         prisma = await get_db()
+        version = await _query_claim_version(prisma, claim_id)
+        return await _with_draft(claim_id, version) if version else version
         
-        claim = await prisma.claim.find_unique(
-            where={"id": claim_id},
-            include={
-                "user": True,
-                "incident": True,
-                "claimlist": True
-            }
-        )
+    except Exception as e:
+        logger.error(f"Error getting claim version: {str(e)}")
+        return None
+
+@instrumented
+async def get_user_claims_version(user_id: str, status: Optional[str] = None) -> Optional[Tuple[int, ...]]:
+    """Get the version of a user's claim listing without loading the claims"""
+    try:
+        cache_key = f"{user_id}|{status.upper() if status else '*'}"
+        cached = await entity_cache.get("user_claims_query", cache_key)
+        if cached is not None:
+            return claims_list_version(await draft_store.overlay_many(cached))
         
-        return claim.model_dump() if claim else None
+        if await draft_store.has_user_drafts(user_id):
+            # Drafts change listings without moving updatedAt, so version
+            # the overlaid listing
+            return claims_list_version(await get_user_claims(user_id, status))
+        
+        prisma = await get_db()
+        query = """
+            SELECT count(c.id) AS claims,
+                   (EXTRACT(EPOCH FROM max(c."updatedAt")) * 1000)::bigint AS claim_ms,
+                   (EXTRACT(EPOCH FROM max(i."updatedAt")) * 1000)::bigint AS incident_ms,
+                   (EXTRACT(EPOCH FROM max(u."updatedAt")) * 1000)::bigint AS user_ms
+            FROM "Claim" c
+            JOIN "User" u ON u.id = c."userId"
+            LEFT JOIN "Incident" i ON i.id = c."incidentId"
+            WHERE c."userId" = $1
+        """
+        params = [user_id]
+        if status:
+            query += ' AND c."Status"::text = $2'
+            params.append(CLAIM_STATUS_DB_VALUES.get(status.upper(), status))
+        
+        rows = await prisma.query_raw(query, *params)
+        row = rows[0]
+        return (
+            int(row["claims"] or 0),
+            int(row["claim_ms"] or 0),
+            int(row["incident_ms"] or 0),
+            int(row["user_ms"] or 0)
+        )
         
     except Exception as e:
-        logger.error(f"Error getting claim: {str(e)}")
+        logger.error(f"Error getting user claims version: {str(e)}")
         return None
 
-async def get_user_claims(user_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Get all claims for a user"""
+@instrumented
+async def get_user_version(user_id: str) -> Optional[Tuple[str, int]]:
+    """Get a user's id and updatedAt millis without loading the user.
+    
+    Takes an id, or an email or phone already mapped in the identity
+    cache; served from the cached payload when present, otherwise from a
+    primary key lookup. None when the user cannot be resolved this cheaply.
+    """
     try:
+        kind, value = classify_identifier(user_id)
+        if kind != KIND_ID:
+            value = identity_cache.get(kind, value) if kind != KIND_UNKNOWN else None
+            if not value:
+                return None
+        
+        cached = await entity_cache.get("user", value)
+        if cached is not None:
+            return cached["id"], user_version(cached)
+        
         prisma = await get_db()
+        rows = await prisma.query_raw(
+            'SELECT id, (EXTRACT(EPOCH FROM "updatedAt") * 1000)::bigint AS user_ms FROM "User" WHERE id = $1',
+            value
+        )
+        return (rows[0]["id"], int(rows[0]["user_ms"] or 0)) if rows else None
+        
+    except Exception as e:
+        logger.error(f"Error getting user version: {str(e)}")
+        return None
+
+@instrumented
+async def get_claims_by_ids(claim_ids: List[str]) -> Optional[Dict[str, Any]]:
+    """Get several claims by ID with one query, preserving request order"""
+    try:
+        claims: Dict[str, Dict[str, Any]] = {}
+        
+        # Serve what we can from the cache, fetch the rest in one round trip
+        pending = []
+        for claim_id in claim_ids:
+            cached = await entity_cache.get("claim", claim_id)
+            if cached is not None:
+                claims[claim_id] = cached
+            else:
+                pending.append(claim_id)
         
+        if pending:
+            prisma = await get_db()
+            versions = {claim_id: await entity_cache.version("claim", claim_id) for claim_id in pending}
+            
+            found = await prisma.claim.find_many(
+                where={"id": {"in": pending}},
+                include={
+                    "user": True,
+                    "incident": True,
+                    "claimlist": True
+                }
+            )
+            
+            for claim in found:
+                claim_dict = claim.model_dump()
+                claims[claim.id] = claim_dict
+                await entity_cache.set(
+                    "claim", claim.id, claim_dict, versions[claim.id],
+                    depends_on=[("user", claim.userId)]
+                )
+        
+        return {
+            "claims": await draft_store.overlay_many([claims[claim_id] for claim_id in claim_ids if claim_id in claims]),
+            "missing": [claim_id for claim_id in claim_ids if claim_id not in claims]
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting claims by ids: {str(e)}")
+        return None
+
+@instrumented
+async def _fetch_user_claims(user_id: str, status: Optional[str], cache_key: str) -> List[Dict[str, Any]]:
+    """Load a user's claims from Postgres and populate the cache"""
+    version = await entity_cache.version("user_claims_query", cache_key)
+    listing_version = await entity_cache.version("user_claims", user_id)
+    replica = await use_replica(("user", user_id))
+    
+    if fast_reads.enabled("get_user_claims"):
+        claims = await fast_reads.fetch_user_claims(user_id, status, replica=replica)
+    else:
+        prisma = await get_replica_db() if replica else await get_db()
         where_clause = {"userId": user_id}
         if status:
             where_clause["status"] = status.upper()
         
         logger.info(f"Searching claims with where_clause: {where_clause}")
-        claims = await prisma.claim.find_many(
+        found = await prisma.claim.find_many(
             where=where_clause,
             include={
                 "user": True,
@@ -252,54 +931,169 @@ async def get_user_claims(user_id: str, status: Optional[str] = None) -> List[Di
             },
             order={"createdAt": "desc"}
         )
+        claims = [claim.model_dump() for claim in found]
+    
+    # Handle null incidents
+    result = []
+    for claim_dict in claims:
+        # Ensure incident is not None and handle potential null incidentId
+        if claim_dict["incident"] is None or claim_dict["incident"]["id"] is None:
+            claim_dict["incident"] = {
+                "id": "",
+                "datetime": None,
+                "location": "",
+                "description": "",
+                "workRelated": False,
+                "reportCompleted": False,
+                "policeReportCompleted": False,
+                "supportingDocument": False,
+                "witness": False,
+                "priorRepresentation": False,
+                "lostEarning": "",
+                "reportNumber": "",
+                "vehicleRole": None,
+                "vehicleCount": None,
+                "busOrVehicle": None
+            }
+        result.append(claim_dict)
+    
+    # Any claim or user change, or a new claim for the user, retires the listing
+    if listing_version == await entity_cache.version("user_claims", user_id):
+        await entity_cache.set(
+            "user_claims_query", cache_key, result, version,
+            depends_on=[("user_claims", user_id), ("user", user_id)]
+            + [("claim", claim["id"]) for claim in result]
+        )
+    
+    return result
+
+@instrumented
+async def get_user_claims(user_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get all claims for a user"""
+    try:
+        cache_key = f"{user_id}|{status.upper() if status else '*'}"
+        cached = await entity_cache.get("user_claims_query", cache_key)
+        if cached is not None:
+            return await draft_store.overlay_many(cached)
         
-        # Convert claims to dict and handle null incidents
-        result = []
-        for claim in claims:
-            claim_dict = claim.model_dump()
-            # Ensure incident is not None and handle potential null incidentId
-            if claim_dict["incident"] is None or claim_dict["incident"]["id"] is None:
-                claim_dict["incident"] = {
-                    "id": "",
-                    "datetime": None,
-                    "location": "",
-                    "description": "",
-                    "workRelated": False,
-                    "reportCompleted": False,
-                    "policeReportCompleted": False,
-                    "supportingDocument": False,
-                    "witness": False,
-                    "priorRepresentation": False,
-                    "lostEarning": "",
-                    "reportNumber": "",
-                    "vehicleRole": None,
-                    "vehicleCount": None,
-                    "busOrVehicle": None
-                }
-            result.append(claim_dict)
-        
-        return result
+        # Concurrent misses for the same listing share one query
+        claims = await read_flight.do(
+            ("user_claims", user_id, cache_key),
+            lambda: _fetch_user_claims(user_id, status, cache_key)
+        )
+        return await draft_store.overlay_many(claims)
         
     except Exception as e:
         logger.error(f"Error getting user claims: {str(e)}")
         return []
 
-async def update_claim(claim_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Update claim with support for incident updates"""
+@instrumented
+async def get_manager_claims(
+    manager: str,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Optional[Dict[str, Any]]:
+    """A case manager's claims newest first, one keyset page at a time.
+    
+    Walks the (assignedCaseManager, createdAt, id) index. Raises
+    InvalidCursor for a malformed cursor.
+    """
+    conditions: List[Dict[str, Any]] = [{"assignedCaseManager": manager}]
+    if status:
+        conditions.append({"status": status.upper()})
+    if cursor:
+        created_at, claim_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise InvalidCursor("Invalid pagination cursor")
+        conditions.append({
+            "OR": [
+                {"createdAt": {"lt": created_at}},
+                {"createdAt": created_at, "id": {"lt": claim_id}}
+            ]
+        })
+    
     try:
-        prisma = await get_db()
+        prisma = await get_read_db()
+        claims = await prisma.claim.find_many(
+            where={"AND": conditions},
+            include={"incident": True, "user": True},
+            order=[{"createdAt": "desc"}, {"id": "desc"}],
+            take=limit + 1
+        )
+        
+        page = claims[:limit]
+        next_cursor = None
+        if len(claims) > limit:
+            next_cursor = encode_cursor(page[-1].createdAt.isoformat(), page[-1].id)
+        return {"claims": [claim.model_dump() for claim in page], "next_cursor": next_cursor}
         
-        # All updatable fields match Prisma schema directly
-        valid_fields = {
-            'status', 'injured', 'relationship', 'otherRelationship', 
-            'healthInsurance', 'healthInsuranceNumber', 'isOver65', 
-            'receiveMedicare', 'assignedCaseManager',
-            'policeReportCompleted', 'supportingDocument', 'workRelated',
-            'witness', 'priorRepresentation'
+    except Exception as e:
+        logger.error(f"Error getting claims for case manager: {str(e)}")
+        return None
+
+@instrumented
+async def get_manager_claim_counts(manager: str) -> Optional[Dict[str, int]]:
+    """Number of a case manager's claims per status"""
+    try:
+        prisma = await get_read_db()
+        groups = await prisma.claim.group_by(
+            by=["status"],
+            where={"assignedCaseManager": manager},
+            count=True
+        )
+        return {
+            str(getattr(group["status"], "value", group["status"])): group["_count"]["_all"]
+            for group in groups
         }
         
+    except Exception as e:
+        logger.error(f"Error counting claims for case manager: {str(e)}")
+        return None
+
+@instrumented
+async def count_open_claims_by_manager() -> Dict[str, int]:
+    """Open claim load per case manager, for the work queue"""
+    prisma = await get_db()
+    groups = await prisma.claim.group_by(
+        by=["assignedCaseManager"],
+        where={
+            "assignedCaseManager": {"not": None},
+            "status": {"not_in": settings.work_queue_closed_statuses}
+        },
+        count=True
+    )
+    return {group["assignedCaseManager"]: group["_count"]["_all"] for group in groups}
+
+def changed_claim_fields(
+    claim: Claim,
+    claim_updates: Dict[str, Any],
+    incident_updates: Optional[Dict[str, Any]]
+) -> List[str]:
+    """Names of the claim and incident.* fields an update actually changed"""
+    changed = [
+        field for field, value in claim_updates.items()
+        if field != "incident" and getattr(claim, field, None) != value
+    ]
+    for field, value in (incident_updates or {}).items():
+        if claim.incident is None or getattr(claim.incident, field, None) != value:
+            changed.append(f"incident.{field}")
+    return changed
+
+@instrumented
+async def update_claim(claim_id: str, updates: Dict[str, Any], if_match: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Update claim with support for incident updates.
+    
+    With if_match, raises PreconditionFailed unless it matches the claim's
+    current ETag, checked under a row lock in the same transaction.
+    """
+    try:
+        prisma = await get_db()
+        
         # Filter updates to only include valid schema fields
-        claim_updates = {k: v for k, v in updates.items() if k in valid_fields}
+        claim_updates = {k: v for k, v in updates.items() if k in CLAIM_UPDATE_FIELDS}
         
         # Handle incident updates if provided
         incident_updates = None
@@ -358,50 +1152,138 @@ async def update_claim(claim_id: str, updates: Dict[str, Any]) -> Optional[Dict[
             logger.warning(f"Claim {claim_id} not found")
             return None
             
-        # Update incident if needed
-        if incident_updates:
-            if claim.incident:
-                # Update existing incident
-                await prisma.incident.update(
-                    where={"id": claim.incident.id},
-                    data=incident_updates
-                )
-            else:
-                # Create new incident and connect to claim
-                incident = await prisma.incident.create(data=incident_updates)
-                claim_updates["incident"] = {"connect": {"id": incident.id}}
-        
-        # Then update claim if needed
-        if claim_updates:
-            updated_claim = await prisma.claim.update(
-                where={"id": claim_id},
-                data=claim_updates,
-                include={
-                    "user": True,
-                    "incident": True,
-                    "claimlist": True
-                }
-            )
-            return updated_claim.model_dump() if updated_claim else None
-        else:
-            # If only incident was updated, return the updated claim
-            updated_claim = await prisma.claim.find_unique(
-                where={"id": claim_id},
-                include={
-                    "user": True,
-                    "incident": True,
-                    "claimlist": True
-                }
-            )
-            return updated_claim.model_dump() if updated_claim else None
+        try:
+            async with prisma.tx() as tx:
+                if if_match is not None:
+                    # Lock the claim so the version cannot move between check and write
+                    version = await _query_claim_version(tx, claim_id, lock=True)
+                    if version is None:
+                        return None
+                    if not etag_matches(if_match, claim_etag(claim_id, await _with_draft(claim_id, version))):
+                        raise PreconditionFailed(claim_id)
+                
+                # Update incident if needed
+                if incident_updates:
+                    if claim.incident:
+                        # Update existing incident
+                        await tx.incident.update(
+                            where={"id": claim.incident.id},
+                            data=incident_updates
+                        )
+                    else:
+                        # Create new incident and connect to claim
+                        incident = await tx.incident.create(data=incident_updates)
+                        claim_updates["incident"] = {"connect": {"id": incident.id}}
+                
+                # Then update claim if needed
+                if claim_updates:
+                    updated_claim = await tx.claim.update(
+                        where={"id": claim_id},
+                        data=claim_updates,
+                        include={
+                            "user": True,
+                            "incident": True,
+                            "claimlist": True
+                        }
+                    )
+                else:
+                    # If only incident was updated, return the updated claim
+                    updated_claim = await tx.claim.find_unique(
+                        where={"id": claim_id},
+                        include={
+                            "user": True,
+                            "incident": True,
+                            "claimlist": True
+                        }
+                    )
+        finally:
+            # Retire cached copies once the write is visible (or failed)
+            mark_recent_write(("claim", claim_id), ("user", claim.userId))
+            await entity_cache.invalidate("claim", claim_id)
+            await entity_cache.invalidate("user_claims", claim.userId)
+            read_flight.forget(("claim", claim_id))
+            read_flight.forget_where(lambda key: key[:2] == ("user_claims", claim.userId))
         
+        if not updated_claim:
+            return None
+        
+        updated_dict = updated_claim.model_dump()
+        await emit_claim_change({
+            "type": "updated",
+            "claim_id": claim_id,
+            "user_id": claim.userId,
+            "changed_fields": changed_claim_fields(claim, claim_updates, incident_updates),
+            "updated_at": updated_claim.updatedAt,
+            "previous": {
+                "status": claim.status,
+                "assignedCaseManager": claim.assignedCaseManager,
+                "incident": claim.incident.model_dump() if claim.incident else None
+            },
+            "claim": updated_dict
+        })
+        
+        return updated_dict
+        
+    except PreconditionFailed:
+        raise
     except Exception as e:
         logger.error(f"Error updating claim {claim_id}: {str(e)}")
         logger.exception("Full traceback:")
         return None
 
-async def update_user(user_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Update user profile"""
+async def flush_claim_draft(claim_id: str) -> Optional[Dict[str, Any]]:
+    """Write a claim's pending draft to Postgres in one update_claim transaction.
+    
+    Returns the updated claim, or None when there was nothing to flush or
+    the write failed. Failed drafts are put back for the next sweep and
+    dropped after settings.draft_max_flush_failures attempts. Works from
+    any worker, whichever staged the draft.
+    """
+    draft = await draft_store.take(claim_id)
+    if draft is None:
+        return None
+    
+    updated = await update_claim(claim_id, draft.updates())
+    if updated is not None:
+        draft_store.flushes += 1
+        logger.info(f"Flushed draft for claim {claim_id}: {', '.join(draft.field_names())}")
+        return updated
+    
+    draft.failures += 1
+    if draft.failures < settings.draft_max_flush_failures:
+        await draft_store.restore(draft)
+    else:
+        logger.error(f"Dropping draft for claim {claim_id} after {draft.failures} failed flushes")
+    return None
+
+async def stage_claim_update(claim_id: str, updates: Dict[str, Any], if_match: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Merge a claim update into the claim's draft instead of writing it.
+    
+    Returns the claim with the draft overlaid, as get_claim_by_id does. A
+    status change flushes the draft right away so status hooks see the
+    real write. Raises PreconditionFailed for a stale if_match.
+    """
+    staged = {k: v for k, v in updates.items() if k in CLAIM_UPDATE_FIELDS or k == "incident"}
+    if not staged:
+        return None
+    
+    claim = await get_claim_by_id(claim_id)
+    if claim is None:
+        return None
+    
+    if if_match is not None:
+        version = await get_claim_version(claim_id, fresh=True)
+        if version is None or not etag_matches(if_match, claim_etag(claim_id, version)):
+            raise PreconditionFailed(claim_id)
+    
+    await draft_store.stage(claim_id, staged)
+    if "status" in staged and staged["status"] != claim.get("status"):
+        return await flush_claim_draft(claim_id)
+    return await get_claim_by_id(claim_id)
+
+@instrumented
+async def update_user(user_id: str, updates: Dict[str, Any], if_match: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Update user profile, raising PreconditionFailed if if_match is stale"""
     try:
         prisma = await get_db()
         
@@ -448,14 +1330,39 @@ async def update_user(user_id: str, updates: Dict[str, Any]) -> Optional[Dict[st
         if not mapped_data:
             return None
         
-        user = await prisma.user.update(
-            where={"id": user_id},
-            data=mapped_data,
-            include={"claimlist": True}
-        )
+        async with prisma.tx() as tx:
+            if if_match is not None:
+                rows = await tx.query_raw(
+                    'SELECT (EXTRACT(EPOCH FROM "updatedAt") * 1000)::bigint AS user_ms FROM "User" WHERE id = $1 FOR UPDATE',
+                    user_id
+                )
+                if not rows:
+                    return None
+                if not etag_matches(if_match, user_etag(user_id, int(rows[0]["user_ms"]))):
+                    raise PreconditionFailed(user_id)
+            
+            user = await tx.user.update(
+                where={"id": user_id},
+                data=mapped_data,
+                include={"claimlist": True}
+            )
         
-        return user.model_dump()
+        # Email or phone may have changed, drop cached identifier mappings
+        if user:
+            mark_recent_write(("user", user.id))
+            identity_cache.invalidate_user(user.id)
+            await entity_cache.invalidate("user", user.id)
+            read_flight.forget(("user", user.id))
+            await emit_user_change({
+                "user_id": user.id,
+                "changed_fields": sorted(mapped_data),
+                "user": user.model_dump()
+            })
         
+        return user.model_dump() if user else None
+        
+    except PreconditionFailed:
+        raise
     except Exception as e:
         logger.error(f"Error updating user: {str(e)}")
         return None
@@ -463,7 +1370,12 @@ async def update_user(user_id: str, updates: Dict[str, Any]) -> Optional[Dict[st
 
 async def initialize_db() -> Prisma:
     """Initialize database connection"""
-    return await get_db()
+    prisma = await get_db()
+    logger.info(
+        f"Database client ready (connection_limit={settings.db_connection_limit or 'default'}, "
+        f"pool_timeout={settings.db_pool_timeout_seconds}s)"
+    )
+    return prisma
 
 async def close_pool():
     """Close database connection pool"""
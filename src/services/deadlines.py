@@ -0,0 +1,278 @@
+import re
+import asyncio
+import calendar
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from ..config.config import settings
+from .database import get_db, get_read_db
+from .pg import apply_ddl, connect_kwargs
+from .profiling import instrumented
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JURISDICTION = "default"
+
+# Claim fields that move a claim's deadlines
+DEADLINE_FIELDS = {"status", "incident.datetime", "incident.location"}
+
+# User fields resolve_jurisdiction falls back to
+USER_DEADLINE_FIELDS = {"physicalState", "mailingState"}
+
+# Same shape prisma db push gives the ClaimDeadline model, so deployments
+# that only run prisma generate get the table too
+DEADLINE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS "ClaimDeadline" (
+        "id" TEXT NOT NULL,
+        "claimId" TEXT NOT NULL,
+        "kind" TEXT NOT NULL,
+        "jurisdiction" TEXT NOT NULL,
+        "incidentDate" TIMESTAMP(3) NOT NULL,
+        "deadline" TIMESTAMP(3) NOT NULL,
+        "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        "updatedAt" TIMESTAMP(3) NOT NULL,
+        CONSTRAINT "ClaimDeadline_pkey" PRIMARY KEY ("id"),
+        CONSTRAINT "ClaimDeadline_claimId_fkey" FOREIGN KEY ("claimId")
+            REFERENCES "Claim" ("id") ON DELETE CASCADE ON UPDATE CASCADE
+    )
+    """,
+    'CREATE UNIQUE INDEX IF NOT EXISTS "ClaimDeadline_claimId_kind_key" ON "ClaimDeadline" ("claimId", "kind")',
+    'CREATE INDEX IF NOT EXISTS "ClaimDeadline_deadline_idx" ON "ClaimDeadline" ("deadline")',
+]
+
+_backfill_task: Optional[asyncio.Task] = None
+
+_PERIOD = re.compile(r"^\s*(\d+)\s*([dwmy])\s*$", re.IGNORECASE)
+# A state code ending an address part, optionally followed by a ZIP code:
+# "Austin TX", "Portland, ME", "Austin, TX 78701"
+_STATE_CODE = re.compile(r"\b([A-Z]{2})(?:\s+\d{5}(?:-\d{4})?)?[\s.]*$")
+
+
+def parse_period(value: str) -> Tuple[int, str]:
+    """Parse a period such as "30d", "2w", "6m" or "3y" into (amount, unit)"""
+    match = _PERIOD.match(value or "")
+    if not match:
+        raise ValueError(f"Invalid period '{value}', expected e.g. 30d, 2w, 6m or 3y")
+    return int(match.group(1)), match.group(2).lower()
+
+
+def add_period(start: datetime, value: str) -> datetime:
+    """start plus a period; calendar months and years clamp to the month's end"""
+    amount, unit = parse_period(value)
+    if unit == "d":
+        return start + timedelta(days=amount)
+    if unit == "w":
+        return start + timedelta(weeks=amount)
+
+    months = amount * 12 if unit == "y" else amount
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return start.replace(year=year, month=month, day=day)
+
+
+def resolve_jurisdiction(incident: Dict[str, Any], user: Optional[Dict[str, Any]]) -> str:
+    """Jurisdiction whose rules apply to a claim.
+
+    A configured state code ending a comma-separated part of the incident
+    location wins, the last part first, as addresses end with the state.
+    Codes must be uppercase in the location, so words like "in" or "or"
+    are not read as states. Then the user's physical and mailing state,
+    then the default rules.
+    """
+    rules = settings.deadline_rules
+    for part in reversed((incident.get("location") or "").split(",")):
+        match = _STATE_CODE.search(part)
+        if match and match.group(1) in rules:
+            return match.group(1)
+    for field in ("physicalState", "mailingState"):
+        state = ((user or {}).get(field) or "").strip().upper()
+        if state in rules:
+            return state
+    return DEFAULT_JURISDICTION
+
+
+def compute_deadlines(claim: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Deadline rows for a claim dict, empty once deadlines no longer apply"""
+    status = claim.get("status")
+    if status is not None and str(getattr(status, "value", status)) in settings.deadline_closed_statuses:
+        return []
+
+    incident = claim.get("incident") or {}
+    incident_date = incident.get("datetime")
+    if isinstance(incident_date, str):
+        incident_date = datetime.fromisoformat(incident_date)
+    if not isinstance(incident_date, datetime):
+        return []
+    if incident_date.tzinfo is None:
+        incident_date = incident_date.replace(tzinfo=timezone.utc)
+
+    jurisdiction = resolve_jurisdiction(incident, claim.get("user"))
+    rules = settings.deadline_rules.get(jurisdiction) or settings.deadline_rules.get(DEFAULT_JURISDICTION, {})
+    return [
+        {
+            "kind": kind,
+            "jurisdiction": jurisdiction,
+            "incidentDate": incident_date,
+            "deadline": add_period(incident_date, period)
+        }
+        for kind, period in sorted(rules.items())
+    ]
+
+
+@instrumented
+async def sync_claim_deadlines(claim: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Replace a claim's stored deadlines with freshly computed ones"""
+    claim_id = claim["id"]
+    deadlines = compute_deadlines(claim)
+    prisma = await get_db()
+    async with prisma.tx() as tx:
+        await tx.claimdeadline.delete_many(
+            where={"claimId": claim_id, "kind": {"not_in": [d["kind"] for d in deadlines]}}
+        )
+        for deadline in deadlines:
+            await tx.claimdeadline.upsert(
+                where={"claimId_kind": {"claimId": claim_id, "kind": deadline["kind"]}},
+                data={
+                    "create": {"claimId": claim_id, **deadline},
+                    "update": {
+                        "jurisdiction": deadline["jurisdiction"],
+                        "incidentDate": deadline["incidentDate"],
+                        "deadline": deadline["deadline"]
+                    }
+                }
+            )
+    return deadlines
+
+
+async def on_claim_change(event: Dict[str, Any]) -> None:
+    """Claim change hook keeping the deadline index current"""
+    if event["type"] == "updated" and not DEADLINE_FIELDS.intersection(event["changed_fields"]):
+        return
+    await sync_claim_deadlines(event["claim"])
+
+
+async def on_user_change(event: Dict[str, Any]) -> None:
+    """User change hook recomputing deadlines of the user's claims when
+    the state their jurisdiction may come from changed"""
+    if not USER_DEADLINE_FIELDS.intersection(event["changed_fields"]):
+        return
+    prisma = await get_db()
+    claims = await prisma.claim.find_many(
+        where={"userId": event["user_id"]},
+        include={"incident": True, "user": True}
+    )
+    for claim in claims:
+        await sync_claim_deadlines(claim.model_dump())
+
+
+@instrumented
+async def get_upcoming_deadlines(
+    within: str,
+    jurisdiction: Optional[str] = None,
+    include_overdue: bool = False,
+    limit: int = 100
+) -> Optional[List[Dict[str, Any]]]:
+    """Deadlines falling within a period from now, soonest first.
+
+    A range scan on the ClaimDeadline.deadline index; each row carries the
+    claim's status, user and case manager. Raises ValueError for a bad period.
+    """
+    now = datetime.now(timezone.utc)
+    until = add_period(now, within)
+    try:
+        where: Dict[str, Any] = {"deadline": {"lte": until}}
+        if not include_overdue:
+            where["deadline"]["gte"] = now
+        if jurisdiction:
+            where["jurisdiction"] = jurisdiction
+
+        prisma = await get_read_db()
+        rows = await prisma.claimdeadline.find_many(
+            where=where,
+            include={"claim": True},
+            order=[{"deadline": "asc"}, {"id": "asc"}],
+            take=limit
+        )
+        return [
+            {
+                "claimId": row.claimId,
+                "kind": row.kind,
+                "jurisdiction": row.jurisdiction,
+                "incidentDate": row.incidentDate,
+                "deadline": row.deadline,
+                "daysRemaining": (row.deadline - now).days,
+                "status": row.claim.status if row.claim else None,
+                "userId": row.claim.userId if row.claim else None,
+                "assignedCaseManager": row.claim.assignedCaseManager if row.claim else None
+            }
+            for row in rows
+        ]
+
+    except Exception as e:
+        logger.error(f"Error getting upcoming deadlines: {str(e)}")
+        return None
+
+
+async def backfill_deadlines(batch_size: int = 500) -> int:
+    """Recompute deadlines for every claim, e.g. after changing the rules"""
+    prisma = await get_db()
+    last_id: Optional[str] = None
+    synced = 0
+    while True:
+        claims = await prisma.claim.find_many(
+            where={"id": {"gt": last_id}} if last_id else {},
+            include={"incident": True, "user": True},
+            order={"id": "asc"},
+            take=batch_size
+        )
+        for claim in claims:
+            try:
+                await sync_claim_deadlines(claim.model_dump())
+                synced += 1
+            except Exception as e:
+                logger.error(f"Error syncing deadlines for claim {claim.id}: {str(e)}")
+        if len(claims) < batch_size:
+            logger.info(f"Deadline backfill synced {synced} claims")
+            return synced
+        last_id = claims[-1].id
+
+
+async def install_deadline_table() -> None:
+    """Create the ClaimDeadline table if missing, and backfill it in the
+    background while it is empty but claims exist"""
+    global _backfill_task
+    await apply_ddl("agentpil_claim_deadlines", DEADLINE_DDL, tables=["ClaimDeadline"])
+    conn = await asyncpg.connect(**connect_kwargs())
+    try:
+        empty = await conn.fetchval(
+            'SELECT NOT EXISTS (SELECT 1 FROM "ClaimDeadline") AND EXISTS (SELECT 1 FROM "Claim")'
+        )
+    finally:
+        await conn.close()
+    if empty and _backfill_task is None:
+        _backfill_task = asyncio.get_running_loop().create_task(_seed_deadlines())
+
+
+async def _seed_deadlines() -> None:
+    conn = await asyncpg.connect(**connect_kwargs())
+    try:
+        # Every worker finds the table empty on first start; one backfills
+        if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext('agentpil_claim_deadline_backfill'))"):
+            return
+        await backfill_deadlines()
+    except Exception as e:
+        logger.error(f"Error seeding claim deadlines: {str(e)}")
+    finally:
+        await conn.close()
+
+
+def stop_deadline_backfill() -> None:
+    global _backfill_task
+    if _backfill_task is not None:
+        _backfill_task.cancel()
+        _backfill_task = None
@@ -0,0 +1,200 @@
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from ..config.config import settings
+from .database import get_read_db
+from .duplicates import normalize_text
+from .typeahead import TypeaheadIndex
+
+logger = logging.getLogger(__name__)
+
+_ACCOUNT_INCLUDE = {"Role": {"include": {"roletype": True}}}
+
+
+def account_entries(account: Any) -> List[Dict[str, Any]]:
+    """One directory entry per role of an account.
+
+    Claims and incidents reference roles (law firm, hospital, insurer...),
+    so the role id is the id agents need; accounts without a role are left out.
+    """
+    name = " ".join(part for part in (account.firstName, account.lastName) if part).strip()
+    return [
+        {
+            "id": role.id,
+            "accountId": account.id,
+            "name": name,
+            "roleType": role.roletype.roleType if role.roletype else None,
+            "city": account.mailingCity,
+            "state": account.mailingState,
+            "phone": account.phone
+        }
+        for role in account.Role or []
+    ]
+
+
+def role_group(role_type: Optional[str]) -> Optional[str]:
+    """Typeahead group of a role type, matched regardless of case and punctuation"""
+    return normalize_text(role_type) or None
+
+
+def car_entry(car: Any) -> Dict[str, Any]:
+    return {"id": car.id, "make": car.make, "model": car.model, "year": car.year}
+
+
+class DirectoryService:
+    """Typeahead indexes over accounts and the vehicle catalog.
+
+    Built in full at startup and again every directory_full_refresh_seconds;
+    in between, rows whose updatedAt moved are re-indexed. Role rows carry no
+    timestamp, so a role added to an untouched account (and any delete)
+    shows up with the next full rebuild.
+    """
+
+    def __init__(self):
+        self.accounts = TypeaheadIndex(settings.directory_fuzzy_threshold)
+        self.cars = TypeaheadIndex(settings.directory_fuzzy_threshold)
+        self._account_roles: Dict[str, Set[str]] = {}
+        self._account_watermark: Optional[datetime] = None
+        self._car_watermark: Optional[datetime] = None
+        self._last_full_refresh = 0.0
+        self._refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _batches(self, model: Any, where: Dict[str, Any], include: Optional[Dict[str, Any]] = None) -> AsyncIterator[List[Any]]:
+        """Rows matching where in id order, one keyset page at a time"""
+        last_id: Optional[str] = None
+        while True:
+            conditions = [where] if last_id is None else [where, {"id": {"gt": last_id}}]
+            rows = await model.find_many(
+                where={"AND": conditions},
+                include=include,
+                order={"id": "asc"},
+                take=settings.directory_batch_size
+            )
+            if rows:
+                yield rows
+            if len(rows) < settings.directory_batch_size:
+                return
+            last_id = rows[-1].id
+
+    def _index_account(self, accounts: TypeaheadIndex, account: Any) -> None:
+        for role_id in self._account_roles.pop(account.id, set()):
+            accounts.remove(role_id)
+        entries = account_entries(account)
+        for entry in entries:
+            accounts.upsert(entry["id"], entry["name"], entry, group=role_group(entry["roleType"]))
+        if entries:
+            self._account_roles[account.id] = {entry["id"] for entry in entries}
+
+    async def rebuild(self) -> None:
+        """Load every account and car into fresh indexes and swap them in"""
+        async with self._lock:
+            start = time.perf_counter()
+            prisma = await get_read_db()
+            accounts = TypeaheadIndex(settings.directory_fuzzy_threshold)
+            cars = TypeaheadIndex(settings.directory_fuzzy_threshold)
+            previous_roles = self._account_roles
+            self._account_roles = {}
+            account_watermark = car_watermark = None
+
+            try:
+                async for batch in self._batches(prisma.account, {}, _ACCOUNT_INCLUDE):
+                    for account in batch:
+                        self._index_account(accounts, account)
+                        if account_watermark is None or account.updatedAt > account_watermark:
+                            account_watermark = account.updatedAt
+
+                async for batch in self._batches(prisma.car, {}):
+                    for car in batch:
+                        cars.upsert(car.id, f"{car.make} {car.model} {car.year}", car_entry(car))
+                        if car_watermark is None or car.updatedAt > car_watermark:
+                            car_watermark = car.updatedAt
+            except BaseException:
+                self._account_roles = previous_roles
+                raise
+
+            self.accounts, self.cars = accounts, cars
+            self._account_watermark, self._car_watermark = account_watermark, car_watermark
+            self._last_full_refresh = self._refreshed_at = time.monotonic()
+            logger.info(
+                f"Directory index built: {len(accounts)} account roles, {len(cars)} cars "
+                f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+
+    async def refresh(self) -> None:
+        """Re-index accounts and cars updated since the last refresh"""
+        if time.monotonic() - self._last_full_refresh >= settings.directory_full_refresh_seconds:
+            await self.rebuild()
+            return
+
+        async with self._lock:
+            prisma = await get_read_db()
+            updated = 0
+
+            # gte rather than gt: rows sharing the watermark millisecond are
+            # re-indexed, which is harmless, instead of possibly skipped
+            where = {"updatedAt": {"gte": self._account_watermark}} if self._account_watermark else {}
+            async for batch in self._batches(prisma.account, where, _ACCOUNT_INCLUDE):
+                for account in batch:
+                    self._index_account(self.accounts, account)
+                    if self._account_watermark is None or account.updatedAt > self._account_watermark:
+                        self._account_watermark = account.updatedAt
+                    updated += 1
+
+            where = {"updatedAt": {"gte": self._car_watermark}} if self._car_watermark else {}
+            async for batch in self._batches(prisma.car, where):
+                for car in batch:
+                    self.cars.upsert(car.id, f"{car.make} {car.model} {car.year}", car_entry(car))
+                    if self._car_watermark is None or car.updatedAt > self._car_watermark:
+                        self._car_watermark = car.updatedAt
+                    updated += 1
+
+            self._refreshed_at = time.monotonic()
+            if updated:
+                logger.debug(f"Directory index refreshed {updated} rows")
+
+    def search_accounts(self, q: str, role_type: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Account roles whose name matches q, optionally of one role type"""
+        return self.accounts.search(q, limit, group=role_group(role_type))
+
+    def search_cars(self, q: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Catalog vehicles matching q in any order of make, model and year"""
+        return self.cars.search(q, limit)
+
+    async def start(self) -> None:
+        """Build the indexes and keep them fresh in the background"""
+        try:
+            await self.rebuild()
+        except Exception as e:
+            # The refresh loop retries the full build
+            logger.error(f"Error building directory index: {str(e)}")
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.directory_refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing directory index: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "account_roles": len(self.accounts),
+            "cars": len(self.cars),
+            "seconds_since_refresh": time.monotonic() - self._refreshed_at if self._refreshed_at else None
+        }
+
+
+# Global directory service
+directory_service = DirectoryService()
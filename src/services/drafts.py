@@ -0,0 +1,352 @@
+import copy
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..config.config import settings
+from .fast_reads import get_pool
+from .pg import apply_ddl
+
+logger = logging.getLogger(__name__)
+
+FlushHandler = Callable[[str], Awaitable[Any]]
+
+# One row per staged field, incident fields keyed "incident.<field>".
+# UNLOGGED: drafts are scratch state, skipping the WAL keeps the per-update
+# upserts cheap, and a Postgres crash only loses unflushed drafts. Mirrors
+# the ClaimDraft model so prisma db push keeps the table.
+DRAFT_DDL = [
+    """
+    CREATE UNLOGGED TABLE IF NOT EXISTS "ClaimDraft" (
+        "claimId" TEXT NOT NULL,
+        "field" TEXT NOT NULL,
+        "value" JSONB NOT NULL,
+        "stamp" DOUBLE PRECISION NOT NULL,
+        "revision" BIGINT NOT NULL,
+        "failures" INTEGER NOT NULL DEFAULT 0,
+        "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT "ClaimDraft_pkey" PRIMARY KEY ("claimId", "field")
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "ClaimDraft_updatedAt_idx" ON "ClaimDraft" ("updatedAt")',
+]
+
+# Microseconds from the database clock, so revisions from every worker
+# order the same way and a discarded draft never reuses one
+_REVISION = "(EXTRACT(EPOCH FROM clock_timestamp()) * 1000000)::bigint"
+
+# Held by the worker whose sweeper is flushing idle drafts
+_SWEEP_LOCK = "agentpil_claim_draft_sweep"
+
+
+class ClaimDraft:
+    """Pending field updates for one claim, last writer wins per field"""
+
+    def __init__(self, claim_id: str):
+        self.claim_id = claim_id
+        self.fields: Dict[str, Any] = {}
+        self.incident: Dict[str, Any] = {}
+        self.stamps: Dict[str, float] = {}
+        self.revision = 0
+        self.failures = 0
+
+    @classmethod
+    def from_rows(cls, claim_id: str, rows: Sequence[Any]) -> "ClaimDraft":
+        """Rebuild a draft from its ClaimDraft table rows"""
+        draft = cls(claim_id)
+        for row in rows:
+            draft._set_key(row["field"], json.loads(row["value"]), row["stamp"])
+            draft.revision = max(draft.revision, row["revision"])
+            draft.failures = max(draft.failures, row["failures"])
+        return draft
+
+    def merge(self, updates: Dict[str, Any], stamp: float) -> None:
+        """Apply update_claim-shaped updates, skipping fields written later"""
+        for field, value in updates.items():
+            if field == "incident" and isinstance(value, dict):
+                for incident_field, incident_value in value.items():
+                    # update_claim ignores unset incident fields, so do we
+                    if incident_value is None:
+                        continue
+                    self._set(self.incident, incident_field, f"incident.{incident_field}", incident_value, stamp)
+            else:
+                self._set(self.fields, field, field, value, stamp)
+        self.revision += 1
+
+    def _set(self, target: Dict[str, Any], field: str, stamp_key: str, value: Any, stamp: float) -> None:
+        if stamp >= self.stamps.get(stamp_key, 0.0):
+            target[field] = value
+            self.stamps[stamp_key] = stamp
+
+    def _set_key(self, stamp_key: str, value: Any, stamp: float) -> None:
+        if stamp_key.startswith("incident."):
+            self._set(self.incident, stamp_key[len("incident."):], stamp_key, value, stamp)
+        else:
+            self._set(self.fields, stamp_key, stamp_key, value, stamp)
+
+    def entries(self) -> List[Tuple[str, Any, float]]:
+        """(field key, value, stamp) per staged field, as stored in ClaimDraft"""
+        entries = [(field, value, self.stamps[field]) for field, value in self.fields.items()]
+        entries.extend(
+            (f"incident.{field}", value, self.stamps[f"incident.{field}"])
+            for field, value in self.incident.items()
+        )
+        return entries
+
+    def updates(self) -> Dict[str, Any]:
+        """The merged draft as update_claim input"""
+        updates = dict(self.fields)
+        if self.incident:
+            updates["incident"] = dict(self.incident)
+        return updates
+
+    def field_names(self) -> List[str]:
+        return sorted(list(self.fields) + [f"incident.{field}" for field in self.incident])
+
+
+def drafts_enabled() -> bool:
+    """Whether draft sessions are turned on"""
+    return settings.draft_sessions_enabled
+
+
+async def install_draft_table() -> None:
+    """Create the shared ClaimDraft table if missing"""
+    await apply_ddl("agentpil_claim_drafts", DRAFT_DDL, tables=["ClaimDraft"])
+
+
+class DraftStore:
+    """Claim drafts in the ClaimDraft table, shared by every worker.
+
+    Each staged update is one upsert per field, keeping the newer stamp,
+    so any worker can overlay or flush a draft another worker staged.
+    Drafts outlive worker restarts; the sweeper of whichever worker holds
+    the sweep lock flushes them once idle or too old.
+    """
+
+    def __init__(self):
+        self._sweeper: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.staged_updates = 0
+
+    async def _load(self, claim_ids: List[str]) -> Dict[str, ClaimDraft]:
+        if not drafts_enabled() or not claim_ids:
+            return {}
+        try:
+            pool = await get_pool()
+            rows = await pool.fetch(
+                """
+                SELECT "claimId", field, value::text AS value, stamp, revision, failures
+                FROM "ClaimDraft" WHERE "claimId" = ANY($1::text[])
+                """,
+                claim_ids
+            )
+        except Exception as e:
+            # Serve the stored claims rather than fail the read
+            logger.error(f"Error loading claim drafts: {str(e)}")
+            return {}
+
+        grouped: Dict[str, List[Any]] = {}
+        for row in rows:
+            grouped.setdefault(row["claimId"], []).append(row)
+        return {claim_id: ClaimDraft.from_rows(claim_id, claim_rows) for claim_id, claim_rows in grouped.items()}
+
+    async def get(self, claim_id: str) -> Optional[ClaimDraft]:
+        return (await self._load([claim_id])).get(claim_id)
+
+    async def revision(self, claim_id: str) -> int:
+        draft = await self.get(claim_id)
+        return draft.revision if draft else 0
+
+    async def has_user_drafts(self, user_id: str) -> bool:
+        """Whether any of the user's claims has a pending draft"""
+        if not drafts_enabled():
+            return False
+        pool = await get_pool()
+        return await pool.fetchval(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM "ClaimDraft" d JOIN "Claim" c ON c.id = d."claimId"
+                WHERE c."userId" = $1
+            )
+            """,
+            user_id
+        )
+
+    async def stage(self, claim_id: str, updates: Dict[str, Any]) -> None:
+        """Merge updates into the claim's draft"""
+        draft = ClaimDraft(claim_id)
+        draft.merge(updates, time.time())
+        entries = draft.entries()
+        if not entries:
+            return
+
+        pool = await get_pool()
+        await pool.execute(
+            f"""
+            INSERT INTO "ClaimDraft" ("claimId", field, value, stamp, revision)
+            SELECT $1, entry.field, entry.value, entry.stamp, {_REVISION}
+            FROM unnest($2::text[], $3::jsonb[], $4::float8[]) AS entry(field, value, stamp)
+            ON CONFLICT ("claimId", field) DO UPDATE
+            SET value = EXCLUDED.value, stamp = EXCLUDED.stamp,
+                revision = EXCLUDED.revision, "updatedAt" = CURRENT_TIMESTAMP
+            WHERE "ClaimDraft".stamp <= EXCLUDED.stamp
+            """,
+            claim_id,
+            [field for field, _, _ in entries],
+            [json.dumps(value) for _, value, _ in entries],
+            [stamp for _, _, stamp in entries]
+        )
+        self.staged_updates += 1
+
+    async def take(self, claim_id: str) -> Optional[ClaimDraft]:
+        """Remove and return a draft for flushing.
+
+        The rows are deleted atomically, so when workers flush the same
+        claim at once only one of them gets the draft.
+        """
+        pool = await get_pool()
+        rows = await pool.fetch(
+            """
+            DELETE FROM "ClaimDraft" WHERE "claimId" = $1
+            RETURNING field, value::text AS value, stamp, revision, failures
+            """,
+            claim_id
+        )
+        return ClaimDraft.from_rows(claim_id, rows) if rows else None
+
+    async def restore(self, draft: ClaimDraft) -> None:
+        """Put back a draft whose flush failed, keeping newer staged fields"""
+        entries = draft.entries()
+        pool = await get_pool()
+        await pool.execute(
+            f"""
+            INSERT INTO "ClaimDraft" ("claimId", field, value, stamp, revision, failures)
+            SELECT $1, entry.field, entry.value, entry.stamp, {_REVISION}, $5
+            FROM unnest($2::text[], $3::jsonb[], $4::float8[]) AS entry(field, value, stamp)
+            ON CONFLICT ("claimId", field) DO UPDATE
+            SET value = CASE WHEN "ClaimDraft".stamp < EXCLUDED.stamp THEN EXCLUDED.value ELSE "ClaimDraft".value END,
+                stamp = greatest("ClaimDraft".stamp, EXCLUDED.stamp),
+                revision = EXCLUDED.revision,
+                failures = greatest("ClaimDraft".failures, EXCLUDED.failures)
+            """,
+            draft.claim_id,
+            [field for field, _, _ in entries],
+            [json.dumps(value) for _, value, _ in entries],
+            [stamp for _, _, stamp in entries],
+            draft.failures
+        )
+
+    async def discard(self, claim_id: str) -> bool:
+        pool = await get_pool()
+        deleted = await pool.fetchval(
+            'WITH deleted AS (DELETE FROM "ClaimDraft" WHERE "claimId" = $1 RETURNING 1) SELECT count(*) FROM deleted',
+            claim_id
+        )
+        return deleted > 0
+
+    @staticmethod
+    def _apply(claim: Dict[str, Any], draft: Optional[ClaimDraft]) -> Dict[str, Any]:
+        if draft is None:
+            return claim
+
+        # Never mutate the cached claim
+        merged = copy.copy(claim)
+        merged.update(draft.fields)
+        if draft.incident:
+            incident = dict(claim.get("incident") or {})
+            for field, value in draft.incident.items():
+                if field == "datetime" and isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+                incident[field] = value
+            merged["incident"] = incident
+        merged["draft"] = {"revision": draft.revision, "fields": draft.field_names()}
+        return merged
+
+    async def overlay(self, claim: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a claim dict with its pending draft fields applied"""
+        drafts = await self._load([claim.get("id")])
+        return self._apply(claim, drafts.get(claim.get("id")))
+
+    async def overlay_many(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """overlay() for a list of claims in one query, the same list when
+        nothing is pending"""
+        drafts = await self._load([claim["id"] for claim in claims])
+        if not drafts:
+            return claims
+        return [self._apply(claim, drafts.get(claim["id"])) for claim in claims]
+
+    async def due(self, conn: Any) -> List[str]:
+        """Claim ids whose drafts went idle or grew too old"""
+        rows = await conn.fetch(
+            """
+            SELECT "claimId" FROM "ClaimDraft"
+            GROUP BY "claimId"
+            HAVING max("updatedAt") <= CURRENT_TIMESTAMP - make_interval(secs => $1)
+                OR min("createdAt") <= CURRENT_TIMESTAMP - make_interval(secs => $2)
+            """,
+            settings.draft_idle_seconds,
+            settings.draft_max_age_seconds
+        )
+        return [row["claimId"] for row in rows]
+
+    async def stats(self) -> Dict[str, Any]:
+        pending = None
+        if drafts_enabled():
+            try:
+                pool = await get_pool()
+                pending = await pool.fetchval('SELECT count(DISTINCT "claimId") FROM "ClaimDraft"')
+            except Exception as e:
+                logger.error(f"Error counting claim drafts: {str(e)}")
+        return {
+            "pending": pending,
+            "staged_updates": self.staged_updates,
+            "flushes": self.flushes
+        }
+
+    def start_sweeper(self, flush: FlushHandler) -> None:
+        """Periodically flush idle drafts with the given handler"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep(flush))
+
+    async def stop(self) -> None:
+        """Stop the sweeper; pending drafts stay for the other workers"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    async def sweep(self, flush: FlushHandler) -> int:
+        """Flush due drafts unless another worker is sweeping, returning
+        how many were due"""
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", _SWEEP_LOCK):
+                return 0
+            try:
+                due = await self.due(conn)
+                for claim_id in due:
+                    await self._flush_quietly(flush, claim_id)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", _SWEEP_LOCK)
+        return len(due)
+
+    async def _sweep(self, flush: FlushHandler) -> None:
+        while True:
+            await asyncio.sleep(settings.draft_sweep_interval_seconds)
+            try:
+                await self.sweep(flush)
+            except Exception as e:
+                logger.error(f"Error sweeping claim drafts: {str(e)}")
+
+    async def _flush_quietly(self, flush: FlushHandler, claim_id: str) -> None:
+        try:
+            await flush(claim_id)
+        except Exception as e:
+            logger.error(f"Error flushing draft for claim {claim_id}: {str(e)}")
+
+
+# Global claim draft store
+draft_store = DraftStore()
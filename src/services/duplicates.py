@@ -0,0 +1,175 @@
+import re
+import logging
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from prisma import Prisma
+from prisma.models import Claim
+
+from ..config.config import settings
+
+logger = logging.getLogger(__name__)
+
+POLICY_RETURN = "return"
+POLICY_FLAG = "flag"
+POLICY_OFF = "off"
+
+# Candidates compared per create; a user rarely has more claims in one window
+MAX_CANDIDATES = 20
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _NON_WORD.sub(" ", (value or "").lower()).strip()
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Similarity ratio of two normalized strings, 0.0 to 1.0"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    # Cheap upper bounds first, most candidates are nowhere near
+    if matcher.real_quick_ratio() < settings.duplicate_similarity_threshold:
+        return matcher.real_quick_ratio()
+    if matcher.quick_ratio() < settings.duplicate_similarity_threshold:
+        return matcher.quick_ratio()
+    return matcher.ratio()
+
+
+def incident_similarity(new_incident: Dict[str, Any], existing_incident: Any) -> float:
+    """Weighted location and description similarity of two incidents.
+
+    Fields missing on either side are left out of the weighting, so two
+    bare incidents on the same date do not count as duplicates.
+    """
+    weights = {"location": 0.4, "description": 0.6}
+    score = 0.0
+    total = 0.0
+    for field, weight in weights.items():
+        a = normalize_text(new_incident.get(field))
+        b = normalize_text(getattr(existing_incident, field, None))
+        if a and b:
+            score += weight * text_similarity(a, b)
+            total += weight
+    return score / total if total else 0.0
+
+
+async def find_duplicate_claim(
+    prisma: Prisma,
+    user_id: str,
+    incident_data: Dict[str, Any]
+) -> Optional[Tuple[Claim, float]]:
+    """Find the user's existing claim for the same incident, if any.
+
+    Looks up the user's claims whose incident date falls inside the
+    configured window (index on Claim.userId, Incident.datetime) and
+    returns the most similar one above the threshold with its score.
+    """
+    if settings.duplicate_claim_policy == POLICY_OFF:
+        return None
+
+    incident_datetime = incident_data.get("datetime")
+    if not isinstance(incident_datetime, datetime):
+        return None
+
+    window = timedelta(hours=settings.duplicate_window_hours)
+    candidates = await prisma.claim.find_many(
+        where={
+            "userId": user_id,
+            "incident": {
+                "is": {
+                    "datetime": {
+                        "gte": incident_datetime - window,
+                        "lte": incident_datetime + window
+                    }
+                }
+            }
+        },
+        include={"incident": True},
+        order={"createdAt": "desc"},
+        take=MAX_CANDIDATES
+    )
+
+    best: Optional[Tuple[Claim, float]] = None
+    for claim in candidates:
+        score = incident_similarity(incident_data, claim.incident)
+        if score >= settings.duplicate_similarity_threshold and (best is None or score > best[1]):
+            best = (claim, score)
+
+    if best:
+        logger.info(f"Claim {best[0].id} looks like a duplicate for user {user_id} (similarity {best[1]:.2f})")
+    return best
+
+
+async def find_duplicate_claims_bulk(
+    prisma: Prisma,
+    rows: List[Tuple[str, str, Dict[str, Any]]]
+) -> List[Optional[Tuple[str, float]]]:
+    """find_duplicate_claim for many (new claim id, user id, incident data)
+    rows at once, returning (duplicate claim id, similarity) or None per row.
+
+    One query loads the users' claims whose incident falls inside the
+    rows' combined date window; each row is then scored against its own
+    user's candidates within its own window. Earlier rows without a match
+    count as candidates too, so a record repeated in one batch is caught.
+    """
+    matches: List[Optional[Tuple[str, float]]] = [None] * len(rows)
+    if settings.duplicate_claim_policy == POLICY_OFF:
+        return matches
+
+    dated = [
+        (index, claim_id, user_id, incident) for index, (claim_id, user_id, incident) in enumerate(rows)
+        if isinstance(incident.get("datetime"), datetime)
+    ]
+    if not dated:
+        return matches
+
+    window = timedelta(hours=settings.duplicate_window_hours)
+    times = [_utc(incident["datetime"]) for _, _, _, incident in dated]
+    existing = await prisma.claim.find_many(
+        where={
+            "userId": {"in": list({user_id for _, _, user_id, _ in dated})},
+            "incident": {
+                "is": {
+                    "datetime": {
+                        "gte": min(times) - window,
+                        "lte": max(times) + window
+                    }
+                }
+            }
+        },
+        include={"incident": True}
+    )
+
+    # (claim id, incident datetime, incident) per user
+    candidates: Dict[str, List[Tuple[str, datetime, Any]]] = {}
+    for claim in existing:
+        if claim.incident is not None and claim.incident.datetime is not None:
+            candidates.setdefault(claim.userId, []).append(
+                (claim.id, _utc(claim.incident.datetime), claim.incident)
+            )
+
+    for (index, claim_id, user_id, incident), incident_time in zip(dated, times):
+        best: Optional[Tuple[str, float]] = None
+        for candidate_id, candidate_time, candidate_incident in candidates.get(user_id, []):
+            if abs(candidate_time - incident_time) > window:
+                continue
+            score = incident_similarity(incident, candidate_incident)
+            if score >= settings.duplicate_similarity_threshold and (best is None or score > best[1]):
+                best = (candidate_id, score)
+        matches[index] = best
+        if best is None:
+            candidates.setdefault(user_id, []).append((claim_id, incident_time, SimpleNamespace(**incident)))
+
+    return matches
+
+
+def _utc(value: datetime) -> datetime:
+    # Prisma returns aware datetimes, API input may be naive UTC
+    return value.astimezone(timezone.utc) if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
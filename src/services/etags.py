@@ -0,0 +1,47 @@
+import hashlib
+from typing import Any, Optional, Tuple
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from version parts (ids, updatedAt millis, counts)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match / If-Match header against an ETag.
+
+    If-Match formally requires strong comparison, but every ETag this API
+    issues is weak, so both headers are compared on the opaque tag alone.
+    """
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    opaque = _opaque(etag)
+    return any(_opaque(candidate) == opaque for candidate in header.split(","))
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    return tag.strip('"')
+
+
+class PreconditionFailed(Exception):
+    """Raised when an If-Match header no longer matches the stored version"""
+
+
+def claim_etag(claim_id: str, version: Tuple[int, ...]) -> str:
+    return make_etag("claim", claim_id, *version)
+
+
+def claims_list_etag(user_id: str, status: Optional[str], limit: int, offset: int, version: Tuple[int, ...]) -> str:
+    return make_etag("claims", user_id, status or "*", limit, offset, *version)
+
+
+def user_etag(user_id: str, user_ms: int) -> str:
+    return make_etag("user", user_id, user_ms)
@@ -0,0 +1,158 @@
+import io
+import csv
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..config.config import settings
+from .database import get_db
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+CLAIM_COLUMNS = [
+    "id",
+    "status",
+    "userId",
+    "claimlistId",
+    "assignedCaseManager",
+    "injured",
+    "relationship",
+    "otherRelationship",
+    "healthInsurance",
+    "healthInsuranceNumber",
+    "isOver65",
+    "receiveMedicare",
+    "createdAt",
+    "updatedAt",
+]
+
+INCIDENT_COLUMNS = [
+    "id",
+    "datetime",
+    "location",
+    "description",
+    "workRelated",
+    "reportCompleted",
+    "policeReportCompleted",
+    "reportNumber",
+    "supportingDocument",
+    "witness",
+    "priorRepresentation",
+    "lostEarning",
+    "vehicleRole",
+    "vehicleCount",
+    "busOrVehicle",
+]
+
+EXPORT_COLUMNS = CLAIM_COLUMNS + [f"incident_{column}" for column in INCIDENT_COLUMNS]
+
+
+def build_export_filters(
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    case_manager: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build a Prisma where clause from export filters"""
+    where: Dict[str, Any] = {}
+    if status:
+        where["status"] = status.upper()
+    if case_manager:
+        where["assignedCaseManager"] = case_manager
+    if created_from or created_to:
+        where["createdAt"] = {}
+        if created_from:
+            where["createdAt"]["gte"] = created_from
+        if created_to:
+            where["createdAt"]["lt"] = created_to
+    return where
+
+
+async def iter_claims(where: Dict[str, Any], batch_size: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Yield matching claims with incidents in (createdAt, id) order.
+
+    Uses keyset pagination so each batch is an index range scan and only
+    one batch is held in memory regardless of the export size.
+    """
+    prisma = await get_db()
+    batch_size = batch_size or settings.export_batch_size
+    last: Optional[Dict[str, Any]] = None
+
+    while True:
+        conditions: List[Dict[str, Any]] = [where]
+        if last is not None:
+            conditions.append({
+                "OR": [
+                    {"createdAt": {"gt": last["createdAt"]}},
+                    {"createdAt": last["createdAt"], "id": {"gt": last["id"]}}
+                ]
+            })
+
+        claims = await prisma.claim.find_many(
+            where={"AND": conditions},
+            include={"incident": True},
+            order=[{"createdAt": "asc"}, {"id": "asc"}],
+            take=batch_size
+        )
+
+        for claim in claims:
+            yield claim.model_dump()
+
+        if len(claims) < batch_size:
+            return
+        last = {"createdAt": claims[-1].createdAt, "id": claims[-1].id}
+
+
+def flatten_claim(claim: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a claim and its incident into one export row"""
+    row = {column: claim.get(column) for column in CLAIM_COLUMNS}
+    incident = claim.get("incident") or {}
+    for column in INCIDENT_COLUMNS:
+        row[f"incident_{column}"] = incident.get(column)
+    return row
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    return value
+
+
+async def export_ndjson(where: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """Stream matching claims as NDJSON"""
+    count = 0
+    async for claim in iter_claims(where):
+        count += 1
+        yield dumps(flatten_claim(claim)) + b"\n"
+    logger.info(f"Exported {count} claims as NDJSON")
+
+
+async def export_csv(where: Dict[str, Any]) -> AsyncIterator[str]:
+    """Stream matching claims as CSV with a header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return text
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield drain()
+
+    count = 0
+    async for claim in iter_claims(where):
+        count += 1
+        row = flatten_claim(claim)
+        writer.writerow([_csv_value(row[column]) for column in EXPORT_COLUMNS])
+        yield drain()
+    logger.info(f"Exported {count} claims as CSV")
@@ -0,0 +1,254 @@
+"""
+asyncpg implementations of the hottest Prisma reads.
+
+Queries go straight to Postgres instead of through the Prisma query engine,
+and rows become plain dicts shaped exactly like the Prisma model_dump() of
+the same include (mapped column names resolved, ClaimStatus names instead of
+stored labels, UTC-aware datetimes, None for relations not loaded). Which
+reads use it is chosen per function with settings.fast_read_functions.
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+from ..config.config import settings
+from .pg import connect_kwargs
+from .profiling import track_query
+
+logger = logging.getLogger(__name__)
+
+# Model field -> column name, in schema.prisma order
+CLAIM_COLUMNS = {
+    "id": "id",
+    "status": "Status",
+    "injured": "Were you injured?",
+    "relationship": "Relationship",
+    "otherRelationship": "Other Relationship",
+    "healthInsurance": "Do you have health insurance?",
+    "healthInsuranceNumber": "Health Insurance Number",
+    "isOver65": "Are you 65 years old or older?",
+    "receiveMedicare": "Do you currently receive?",
+    "assignedCaseManager": "Assigned Claim Specialist",
+    "userId": "userId",
+    "clientRoleId": "clientRoleId",
+    "injuredPartyRoleId": "injuredPartyRoleId",
+    "incidentId": "incidentId",
+    "healthInsuranceProviderId": "healthInsuranceProviderId",
+    "claimlistId": "claimlistId",
+    "createdAt": "createdAt",
+    "updatedAt": "updatedAt",
+}
+
+CLAIM_RELATIONS = [
+    "user", "clientRole", "injuredPartyRole", "incident", "healthInsuranceProvider",
+    "witness", "defendant", "treatmentsAndInjuries", "questionnaire", "claimlist",
+    "envelop", "media", "tasks", "projectClaims", "deadlines",
+]
+
+USER_COLUMNS = {field: field for field in [
+    "id", "firstName", "middleName", "lastName", "injured", "email", "phone",
+    "password", "phone2", "gender", "dateOfBirth", "isUnder18", "fatherFirstName",
+    "fatherLastName", "motherFirstName", "motherLastName", "mailingAddress1",
+    "mailingAddress2", "mailingCity", "mailingState", "mailingZipCode",
+    "isPOBoxOrDifferentAddress", "physicalAddress1", "physicalAddress2",
+    "physicalCity", "physicalState", "physicalZipCode", "maritalStatus",
+    "spouseFirstName", "spouseLastName", "spousePhone", "employmentStatus",
+    "employerName", "employerTitle", "employmentType", "pay", "schoolName",
+    "expectedGraduationYear", "role", "isVerified", "verificationCode",
+    "sourceId", "createdAt", "updatedAt", "claimlistId", "accountSync",
+]}
+
+USER_RELATIONS = [
+    "source", "claims", "verify", "claimlist", "projectsOwned", "tasksCreated",
+    "taskAssignments", "projectAssignments", "taskComments", "labelsCreated",
+    "taskAttachments",
+]
+
+INCIDENT_COLUMNS = {
+    "id": "id",
+    "vehicleRole": "Were you the driver or passenger in the vehicle?",
+    "vehicleCount": "How many vehicles were involved?",
+    "busOrVehicle": "Bus passenger or other vehicle?",
+    "transportType": "Bus or train?",
+    "rideShareCompany": "Ride sharing company",
+    "rideShareOtherName": "Other ride sharing company name",
+    "propertyType": "Business or private property?",
+    "datetime": "Date of Accident",
+    "location": "Incident Location",
+    "workRelated": "Were you at work at the time of the accident?",
+    "description": "Description of Accident",
+    "policeReportCompleted": "Was a Police Report Filed",
+    "policeStationId": "policeStationId",
+    "policeOfficerId": "policeOfficerId",
+    "reportCompleted": "Was an Accident Report or Complaint Report Filed",
+    "reportNumber": "Accident/Complaint Report Number",
+    "supportingDocument": "Picture Taken?",
+    "lostEarning": "Missed time from work or school?",
+    "amountLoss": "Approximate Loss of Earning",
+    "timeLoss": "Approximate Missed Time from School? (If in school)",
+    "witness": "Any witnesses to the incident?",
+    "priorRepresentation": "Do you currently have representation regarding this claim?",
+    "priorRepresentationReason": "Reason for removing current representation",
+    "lawfirmId": "lawfirmId",
+    "attorneyId": "attorneyId",
+    "createdAt": "createdAt",
+    "updatedAt": "updatedAt",
+}
+
+INCIDENT_RELATIONS = ["policeStation", "policeOfficer", "lawfirm", "attorney", "Claim"]
+
+CLAIMLIST_COLUMNS = {field: field for field in ["id", "name", "enable", "questionId", "createdAt", "createdBy"]}
+
+CLAIMLIST_RELATIONS = ["claim", "user", "question"]
+
+# ClaimStatus names as stored in the "Status" column, for raw SQL
+CLAIM_STATUS_DB_VALUES = {
+    "PENDING_INFORMATION": "Pending Information",
+    "UNDER_REVIEW": "Under Review",
+    "PENDING_DOCUMENTS": "Pending Documents",
+    "INVESTIGATION": "Investigation",
+    "PRE_SUIT": "Pre-Suit",
+    "PRE_LITIGATION": "Pre-Litigation",
+    "LITIGATION": "Litigation",
+    "RESOLVED_AND_CLOSED": "Resolved and Closed",
+}
+
+# Stored labels back to the enum names Prisma returns
+CLAIM_STATUS_NAMES = {label: name for name, label in CLAIM_STATUS_DB_VALUES.items()}
+
+_pools: Dict[str, asyncpg.Pool] = {}
+_pools_lock = asyncio.Lock()
+
+
+def enabled(function_name: str) -> bool:
+    """Whether a database function should use its asyncpg implementation"""
+    return function_name in settings.fast_read_functions
+
+
+def _select(alias: str, columns: Dict[str, str]) -> str:
+    return ", ".join(f'{alias}."{column}" AS "{alias}.{field}"' for field, column in columns.items())
+
+
+def _pick(row: asyncpg.Record, alias: str, columns: Dict[str, str], relations: List[str]) -> Optional[Dict[str, Any]]:
+    """Build a model_dump()-shaped dict from one aliased part of a row"""
+    if row[f"{alias}.id"] is None:
+        return None
+
+    data: Dict[str, Any] = {}
+    for field in columns:
+        value = row[f"{alias}.{field}"]
+        # Prisma timestamps are stored without a zone and are always UTC
+        if isinstance(value, datetime) and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        data[field] = value
+    for relation in relations:
+        data[relation] = None
+    return data
+
+
+_CLAIM_SELECT = f"""
+    SELECT {_select("c", CLAIM_COLUMNS)},
+           {_select("u", USER_COLUMNS)},
+           {_select("i", INCIDENT_COLUMNS)},
+           {_select("l", CLAIMLIST_COLUMNS)}
+    FROM "Claim" c
+    JOIN "User" u ON u.id = c."userId"
+    JOIN "ClaimList" l ON l.id = c."claimlistId"
+    LEFT JOIN "Incident" i ON i.id = c."incidentId"
+"""
+
+_USER_SELECT = f"""
+    SELECT {_select("u", USER_COLUMNS)},
+           {_select("l", CLAIMLIST_COLUMNS)}
+    FROM "User" u
+    JOIN "ClaimList" l ON l.id = u."claimlistId"
+"""
+
+
+def _claim_from_row(row: asyncpg.Record) -> Dict[str, Any]:
+    """Claim with user, incident and claimlist included"""
+    claim = _pick(row, "c", CLAIM_COLUMNS, CLAIM_RELATIONS)
+    if claim["status"] is not None:
+        claim["status"] = CLAIM_STATUS_NAMES.get(claim["status"], claim["status"])
+    claim["user"] = _pick(row, "u", USER_COLUMNS, USER_RELATIONS)
+    claim["incident"] = _pick(row, "i", INCIDENT_COLUMNS, INCIDENT_RELATIONS)
+    claim["claimlist"] = _pick(row, "l", CLAIMLIST_COLUMNS, CLAIMLIST_RELATIONS)
+    return claim
+
+
+def _user_from_row(row: asyncpg.Record) -> Dict[str, Any]:
+    """User with claimlist included"""
+    user = _pick(row, "u", USER_COLUMNS, USER_RELATIONS)
+    user["claimlist"] = _pick(row, "l", CLAIMLIST_COLUMNS, CLAIMLIST_RELATIONS)
+    return user
+
+
+async def get_pool(replica: bool = False) -> asyncpg.Pool:
+    """Shared asyncpg pool for the primary or the read replica"""
+    url = settings.database_replica_url if replica and settings.database_replica_url else None
+    key = "replica" if url else "primary"
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+
+    async with _pools_lock:
+        if key not in _pools:
+            kwargs = connect_kwargs(url)
+            # Transaction-mode pgbouncer cannot keep prepared statements
+            if "pgbouncer=true" in (url or os.environ.get("DATABASE_URL", "")):
+                kwargs["statement_cache_size"] = 0
+            _pools[key] = await asyncpg.create_pool(
+                min_size=1,
+                max_size=settings.fast_read_pool_size,
+                **kwargs
+            )
+            logger.info(f"Fast read pool ready ({key}, max_size={settings.fast_read_pool_size})")
+    return _pools[key]
+
+
+async def fetch_claim(claim_id: str, replica: bool = False) -> Optional[Dict[str, Any]]:
+    """Claim by id, equal to claim.model_dump() with user, incident and claimlist"""
+    pool = await get_pool(replica)
+    with track_query():
+        row = await pool.fetchrow(f"{_CLAIM_SELECT} WHERE c.id = $1", claim_id)
+    return _claim_from_row(row) if row else None
+
+
+async def fetch_user_claims(user_id: str, status: Optional[str] = None, replica: bool = False) -> List[Dict[str, Any]]:
+    """A user's claims newest first, optionally filtered by ClaimStatus name"""
+    pool = await get_pool(replica)
+    with track_query():
+        if status:
+            rows = await pool.fetch(
+                f'{_CLAIM_SELECT} WHERE c."userId" = $1 AND c."Status"::text = $2 ORDER BY c."createdAt" DESC',
+                user_id, CLAIM_STATUS_DB_VALUES.get(status.upper(), status)
+            )
+        else:
+            rows = await pool.fetch(f'{_CLAIM_SELECT} WHERE c."userId" = $1 ORDER BY c."createdAt" DESC', user_id)
+    return [_claim_from_row(row) for row in rows]
+
+
+async def fetch_user(field: str, value: str, replica: bool = False) -> Optional[Dict[str, Any]]:
+    """User by id, email or phone, equal to user.model_dump() with claimlist"""
+    if field not in ("id", "email", "phone"):
+        raise ValueError(f"Unsupported user lookup field: {field}")
+    pool = await get_pool(replica)
+    with track_query():
+        row = await pool.fetchrow(f'{_USER_SELECT} WHERE u."{field}" = $1', value)
+    return _user_from_row(row) if row else None
+
+
+async def close_pools() -> None:
+    """Close every fast read pool"""
+    async with _pools_lock:
+        for key, pool in list(_pools.items()):
+            try:
+                await pool.close()
+            except Exception as e:
+                logger.error(f"Error closing fast read pool {key}: {str(e)}")
+        _pools.clear()
@@ -0,0 +1,255 @@
+import json
+import time
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from prisma.errors import UniqueViolationError
+
+from ..config.config import settings
+from .database import get_db
+from .pg import apply_ddl
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+# Longest accepted Idempotency-Key, anything longer is rejected
+MAX_KEY_LENGTH = 255
+
+Handler = Callable[[], Awaitable[Tuple[int, Any]]]
+
+# Same shape prisma db push gives the IdempotencyKey model, so the Postgres
+# store works on deployments that only run prisma generate
+IDEMPOTENCY_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS "IdempotencyKey" (
+        "key" TEXT NOT NULL,
+        "requestHash" TEXT NOT NULL,
+        "status" TEXT NOT NULL,
+        "responseStatus" INTEGER,
+        "responseBody" TEXT,
+        "expiresAt" TIMESTAMP(3) NOT NULL,
+        "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT "IdempotencyKey_pkey" PRIMARY KEY ("key")
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "IdempotencyKey_expiresAt_idx" ON "IdempotencyKey" ("expiresAt")',
+]
+
+
+class IdempotencyError(Exception):
+    """A repeated key that cannot be replayed"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class IdempotencyStore(ABC):
+    """Storage interface for idempotency records.
+
+    reserve() must be atomic: of several concurrent calls for a new key,
+    exactly one gets None (and runs the request), the others get the record.
+    """
+
+    @abstractmethod
+    async def reserve(self, key: str, request_hash: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def complete(self, key: str, status_code: int, body: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        ...
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Bounded per-process store, enough for a single worker"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def reserve(self, key: str, request_hash: str) -> Optional[Dict[str, Any]]:
+        # No awaits below, so check-and-set is atomic on the event loop
+        record = self._records.get(key)
+        if record is not None and record["expires_at"] > time.monotonic():
+            return record
+
+        self._records[key] = {
+            "request_hash": request_hash,
+            "status": IN_PROGRESS,
+            "response_status": None,
+            "response_body": None,
+            "expires_at": time.monotonic() + settings.idempotency_lock_seconds
+        }
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+        return None
+
+    async def complete(self, key: str, status_code: int, body: bytes) -> None:
+        record = self._records.get(key)
+        if record is not None:
+            record.update({
+                "status": COMPLETED,
+                "response_status": status_code,
+                "response_body": body,
+                "expires_at": time.monotonic() + settings.idempotency_ttl_seconds
+            })
+
+    async def release(self, key: str) -> None:
+        self._records.pop(key, None)
+
+
+class PostgresIdempotencyStore(IdempotencyStore):
+    """IdempotencyKey table shared by every worker"""
+
+    PURGE_INTERVAL_SECONDS = 600
+
+    def __init__(self):
+        self._last_purge = 0.0
+
+    async def reserve(self, key: str, request_hash: str) -> Optional[Dict[str, Any]]:
+        prisma = await get_db()
+        now = datetime.now(timezone.utc)
+        await self._purge(now)
+
+        reservation = {
+            "requestHash": request_hash,
+            "status": IN_PROGRESS,
+            "responseStatus": None,
+            "responseBody": None,
+            "expiresAt": now + timedelta(seconds=settings.idempotency_lock_seconds)
+        }
+        try:
+            await prisma.idempotencykey.create(data={"key": key, **reservation})
+            return None
+        except UniqueViolationError:
+            pass
+
+        existing = await prisma.idempotencykey.find_unique(where={"key": key})
+        if existing is not None and existing.expiresAt <= now:
+            # Expired, or abandoned by a crashed worker: take it over unless
+            # another request got there first
+            taken = await prisma.idempotencykey.update_many(
+                where={"key": key, "expiresAt": existing.expiresAt},
+                data=reservation
+            )
+            if taken:
+                return None
+            existing = await prisma.idempotencykey.find_unique(where={"key": key})
+
+        if existing is None:
+            # Released between our insert and read, let the client retry
+            return {"request_hash": request_hash, "status": IN_PROGRESS}
+
+        return {
+            "request_hash": existing.requestHash,
+            "status": existing.status,
+            "response_status": existing.responseStatus,
+            "response_body": existing.responseBody.encode("utf-8") if existing.responseBody is not None else None
+        }
+
+    async def complete(self, key: str, status_code: int, body: bytes) -> None:
+        prisma = await get_db()
+        await prisma.idempotencykey.update(
+            where={"key": key},
+            data={
+                "status": COMPLETED,
+                "responseStatus": status_code,
+                "responseBody": body.decode("utf-8"),
+                "expiresAt": datetime.now(timezone.utc) + timedelta(seconds=settings.idempotency_ttl_seconds)
+            }
+        )
+
+    async def release(self, key: str) -> None:
+        prisma = await get_db()
+        await prisma.idempotencykey.delete_many(where={"key": key, "status": IN_PROGRESS})
+
+    async def _purge(self, now: datetime) -> None:
+        if time.monotonic() - self._last_purge < self.PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        try:
+            prisma = await get_db()
+            purged = await prisma.idempotencykey.delete_many(where={"expiresAt": {"lt": now}})
+            if purged:
+                logger.info(f"Purged {purged} expired idempotency keys")
+        except Exception as e:
+            logger.error(f"Error purging idempotency keys: {str(e)}")
+
+
+def hash_request(payload: Any) -> str:
+    """Stable hash of a request body, independent of key order"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def run_idempotent(scope: str, key: str, payload: Any, handler: Handler) -> Tuple[int, bytes, bool]:
+    """Run handler once per (scope, key) and replay its response for repeats.
+
+    Returns (status code, JSON body, replayed). Responses below 500 are
+    stored; server errors and exceptions release the key so a retry runs
+    again. Raises IdempotencyError for an in-flight or mismatched repeat.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyError(400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+    store_key = f"{scope}:{key}"
+    request_hash = hash_request(payload)
+
+    existing = await idempotency_store.reserve(store_key, request_hash)
+    if existing is not None:
+        if existing["request_hash"] != request_hash:
+            raise IdempotencyError(422, "Idempotency-Key was already used with a different request")
+        if existing["status"] != COMPLETED:
+            raise IdempotencyError(409, "A request with this Idempotency-Key is still in progress")
+        logger.info(f"Replaying {scope} response for idempotency key {key}")
+        return existing["response_status"], existing["response_body"], True
+
+    try:
+        status_code, content = await handler()
+    except BaseException:
+        await idempotency_store.release(store_key)
+        raise
+
+    body = dumps(content)
+    if status_code < 500:
+        await idempotency_store.complete(store_key, status_code, body)
+    else:
+        await idempotency_store.release(store_key)
+    return status_code, body, False
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    """Store for the configured backend; memory only with a single worker"""
+    if settings.idempotency_backend != "memory":
+        return PostgresIdempotencyStore()
+    if settings.web_concurrency > 1:
+        # A retry served by another worker would miss the key and run again
+        logger.warning(
+            f"Idempotency backend 'memory' needs a single worker, using 'postgres' "
+            f"with {settings.web_concurrency} workers"
+        )
+        return PostgresIdempotencyStore()
+    return InMemoryIdempotencyStore(settings.idempotency_max_entries)
+
+
+# Global idempotency store
+idempotency_store: IdempotencyStore = create_idempotency_store()
+
+
+async def install_idempotency_table() -> None:
+    """Create the IdempotencyKey table if the Postgres store is in use"""
+    if isinstance(idempotency_store, PostgresIdempotencyStore):
+        await apply_ddl("agentpil_idempotency_keys", IDEMPOTENCY_DDL, tables=["IdempotencyKey"])
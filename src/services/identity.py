@@ -0,0 +1,158 @@
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..config.config import settings
+
+# Identifier kinds understood by the resolver
+KIND_ID = "id"
+KIND_EMAIL = "email"
+KIND_PHONE = "phone"
+KIND_UNKNOWN = "unknown"
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_PHONE_CHARS_RE = re.compile(r"^\+?[\d\s\-().]{7,}$")
+
+
+def normalize_email(value: str) -> str:
+    """Normalize an email address for lookups"""
+    return value.strip().lower()
+
+
+def normalize_phone(value: str) -> Optional[str]:
+    """Normalize a phone number to E.164, or None if it cannot be one"""
+    raw = value.strip()
+    digits = re.sub(r"\D", "", raw)
+
+    if raw.startswith("+"):
+        normalized = f"+{digits}"
+    elif raw.startswith("00"):
+        normalized = f"+{digits[2:]}"
+    elif len(digits) == 10:
+        # Bare national number, assume the default country
+        normalized = f"+{settings.default_phone_country_code}{digits}"
+    else:
+        normalized = f"+{digits}"
+
+    # E.164 allows at most 15 digits after the plus sign
+    if not 8 <= len(normalized) <= 16:
+        return None
+    return normalized
+
+
+def classify_identifier(identifier: str) -> Tuple[str, str]:
+    """Classify a user identifier as UUID, email or phone and normalize it"""
+    value = identifier.strip()
+
+    try:
+        return KIND_ID, str(uuid.UUID(value))
+    except ValueError:
+        pass
+
+    if _EMAIL_RE.match(value):
+        return KIND_EMAIL, normalize_email(value)
+
+    if _PHONE_CHARS_RE.match(value):
+        phone = normalize_phone(value)
+        if phone:
+            return KIND_PHONE, phone
+
+    return KIND_UNKNOWN, value
+
+
+def lookup_candidates(kind: str, normalized: str, raw: str) -> List[str]:
+    """Values to try against the unique index, most likely first.
+
+    Older rows were stored exactly as typed, so the raw and national forms
+    are tried after the normalized one.
+    """
+    candidates = [normalized]
+    stripped = raw.strip()
+    if kind == KIND_PHONE:
+        country_code = settings.default_phone_country_code
+        national = normalized[1 + len(country_code):] if normalized.startswith(f"+{country_code}") else None
+        candidates.extend([stripped, re.sub(r"\D", "", stripped), national])
+    elif kind == KIND_EMAIL:
+        candidates.append(stripped)
+
+    unique = []
+    for candidate in candidates:
+        if candidate and candidate not in unique:
+            unique.append(candidate)
+    return unique
+
+
+def identifier_matches(kind: str, normalized: str, user: Dict) -> bool:
+    """Check that a user record still owns the given identifier"""
+    if kind == KIND_EMAIL:
+        return normalize_email(user.get("email") or "") == normalized
+    if kind == KIND_PHONE:
+        return normalize_phone(user.get("phone") or "") == normalized
+    return False
+
+
+class IdentityCache:
+    """Bounded identifier -> user id cache with TTL and per-user invalidation"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._by_user: Dict[str, Set[Tuple[str, str]]] = {}
+
+    def get(self, kind: str, value: str) -> Optional[str]:
+        """Return the cached user id for an identifier"""
+        key = (kind, value)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        user_id, expires_at = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return user_id
+
+    def set(self, kind: str, value: str, user_id: str) -> None:
+        """Remember which user owns an identifier"""
+        key = (kind, value)
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (user_id, time.monotonic() + self.ttl_seconds)
+        self._by_user.setdefault(user_id, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every identifier mapped to a user"""
+        for key in list(self._by_user.get(user_id, ())):
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Drop all cached identifiers"""
+        self._entries.clear()
+        self._by_user.clear()
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[0]]
+
+
+# Global identity cache
+identity_cache = IdentityCache(
+    max_entries=settings.identity_cache_max_entries,
+    ttl_seconds=settings.identity_cache_ttl_seconds,
+)
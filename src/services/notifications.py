@@ -0,0 +1,204 @@
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import asyncpg
+
+from ..config.config import settings
+from .pg import apply_ddl, connect_kwargs
+
+logger = logging.getLogger(__name__)
+
+# Channel carrying row changes on Claim, Incident and User
+ENTITY_CHANGES_CHANNEL = "agentpil_entity_changes"
+
+NotificationHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+ReconnectHandler = Callable[[], Awaitable[None]]
+
+ENTITY_CHANGE_TRIGGERS = ["agentpil_claim_change", "agentpil_incident_change", "agentpil_user_change"]
+
+# Installed once per change to this list, see apply_ddl
+ENTITY_CHANGE_TRIGGERS_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION agentpil_notify_entity_change() RETURNS trigger AS $$
+    DECLARE
+        row_data RECORD;
+        claim_id TEXT;
+        claim_user_id TEXT;
+        payload JSON;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            row_data := OLD;
+        ELSE
+            row_data := NEW;
+        END IF;
+
+        IF TG_TABLE_NAME = 'Claim' THEN
+            payload := json_build_object(
+                'table', TG_TABLE_NAME, 'op', TG_OP,
+                'id', row_data.id, 'userId', row_data."userId"
+            );
+        ELSIF TG_TABLE_NAME = 'Incident' THEN
+            SELECT c.id, c."userId" INTO claim_id, claim_user_id
+            FROM "Claim" c WHERE c."incidentId" = row_data.id;
+            payload := json_build_object(
+                'table', TG_TABLE_NAME, 'op', TG_OP,
+                'id', row_data.id, 'claimId', claim_id, 'userId', claim_user_id
+            );
+        ELSE
+            payload := json_build_object(
+                'table', TG_TABLE_NAME, 'op', TG_OP, 'id', row_data.id
+            );
+        END IF;
+
+        PERFORM pg_notify('{ENTITY_CHANGES_CHANNEL}', payload::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS agentpil_claim_change ON "Claim"',
+    """
+    CREATE TRIGGER agentpil_claim_change
+    AFTER INSERT OR UPDATE OR DELETE ON "Claim"
+    FOR EACH ROW EXECUTE FUNCTION agentpil_notify_entity_change()
+    """,
+    'DROP TRIGGER IF EXISTS agentpil_incident_change ON "Incident"',
+    """
+    CREATE TRIGGER agentpil_incident_change
+    AFTER UPDATE OR DELETE ON "Incident"
+    FOR EACH ROW EXECUTE FUNCTION agentpil_notify_entity_change()
+    """,
+    'DROP TRIGGER IF EXISTS agentpil_user_change ON "User"',
+    """
+    CREATE TRIGGER agentpil_user_change
+    AFTER UPDATE OR DELETE ON "User"
+    FOR EACH ROW EXECUTE FUNCTION agentpil_notify_entity_change()
+    """,
+]
+
+
+class NotificationBus:
+    """Postgres LISTEN/NOTIFY subscriber shared by a worker.
+
+    Holds one dedicated asyncpg connection (Prisma cannot LISTEN) and
+    dispatches JSON payloads to the handlers registered per channel. When
+    the connection drops, notifications sent in the meantime are lost, so
+    reconnect handlers run after every successful reconnect.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[NotificationHandler]] = {}
+        self._reconnect_handlers: List[ReconnectHandler] = []
+        self._conn: Optional[asyncpg.Connection] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._running = False
+        # asyncpg runs one query at a time per connection
+        self._publish_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    def subscribe(self, channel: str, handler: NotificationHandler) -> None:
+        """Register a coroutine called with each decoded payload on a channel"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_reconnect(self, handler: ReconnectHandler) -> None:
+        """Register a coroutine called after the connection is re-established"""
+        self._reconnect_handlers.append(handler)
+
+    async def start(self) -> None:
+        """Install triggers if missing or changed and start listening"""
+        if self._running:
+            return
+
+        if settings.notification_bus_install_triggers:
+            await apply_ddl(
+                "agentpil_entity_change_triggers", ENTITY_CHANGE_TRIGGERS_DDL,
+                triggers=ENTITY_CHANGE_TRIGGERS
+            )
+
+        await self._connect()
+        self._running = True
+        logger.info(f"Notification bus listening on {sorted(self._handlers)}")
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection"""
+        self._running = False
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception as e:
+                logger.error(f"Error closing notification connection: {str(e)}")
+            self._conn = None
+
+    async def publish(self, channel: str, payload: Dict[str, Any]) -> None:
+        """Send a payload to every worker listening on a channel"""
+        async with self._publish_lock:
+            if not self.connected:
+                raise RuntimeError("Notification bus is not connected")
+            await self._conn.execute("SELECT pg_notify($1, $2)", channel, json.dumps(payload, default=str))
+
+    async def _connect(self) -> None:
+        conn = await asyncpg.connect(**connect_kwargs())
+        for channel in self._handlers:
+            await conn.add_listener(channel, self._on_notification)
+        conn.add_termination_listener(self._on_termination)
+        self._conn = conn
+
+    def _on_notification(self, conn, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed notification on {channel}: {payload}")
+            return
+
+        for handler in self._handlers.get(channel, []):
+            self._spawn(self._dispatch(handler, channel, event))
+
+    async def _dispatch(self, handler: NotificationHandler, channel: str, event: Dict[str, Any]) -> None:
+        try:
+            await handler(event)
+        except Exception as e:
+            logger.error(f"Notification handler failed on {channel}: {str(e)}")
+
+    def _on_termination(self, conn) -> None:
+        self._conn = None
+        if self._running and self._reconnect_task is None:
+            logger.warning("Notification connection lost, reconnecting")
+            self._reconnect_task = self._spawn(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = 0.5
+        try:
+            while self._running:
+                try:
+                    await self._connect()
+                    break
+                except Exception as e:
+                    logger.error(f"Notification reconnect failed: {str(e)}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30)
+
+            for handler in self._reconnect_handlers:
+                try:
+                    await handler()
+                except Exception as e:
+                    logger.error(f"Notification reconnect handler failed: {str(e)}")
+        finally:
+            self._reconnect_task = None
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+
+# Global notification bus
+notification_bus = NotificationBus()
@@ -0,0 +1,146 @@
+import os
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Query parameters understood by Prisma's engine but not by asyncpg, which
+# would otherwise forward them to Postgres as server settings
+_PRISMA_ONLY_PARAMS = {
+    "schema",
+    "connection_limit",
+    "pool_timeout",
+    "pgbouncer",
+    "socket_timeout",
+    "connect_timeout",
+    "statement_cache_size",
+    "sslaccept",
+    "sslidentity",
+}
+
+
+def connect_kwargs(url: Optional[str] = None) -> Dict[str, Any]:
+    """Translate a Prisma DATABASE_URL into asyncpg connect arguments"""
+    url = url or os.environ.get("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL not configured")
+
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    schema = dict(params).get("schema")
+    query = urlencode([(k, v) for k, v in params if k not in _PRISMA_ONLY_PARAMS])
+
+    kwargs: Dict[str, Any] = {"dsn": urlunsplit(parts._replace(query=query))}
+    if schema:
+        kwargs["server_settings"] = {"search_path": schema}
+    return kwargs
+
+
+def prisma_datasource_url(url: Optional[str] = None, **params: Any) -> str:
+    """DATABASE_URL with Prisma engine parameters set, skipping None values"""
+    url = url or os.environ.get("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL not configured")
+
+    overrides = {k: str(v) for k, v in params.items() if v is not None}
+    if not overrides:
+        return url
+
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in overrides]
+    query.extend(overrides.items())
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+# Records which version of each named DDL set is installed. Mirrors the
+# AppliedDdl model so prisma db push keeps the table.
+_APPLIED_DDL_TABLE = """
+    CREATE TABLE IF NOT EXISTS "AppliedDdl" (
+        "name" TEXT NOT NULL,
+        "checksum" TEXT NOT NULL,
+        "appliedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT "AppliedDdl_pkey" PRIMARY KEY ("name")
+    )
+"""
+
+
+def ddl_checksum(statements: Sequence[str]) -> str:
+    """Checksum of a DDL set, ignoring indentation"""
+    normalized = "\n;\n".join(" ".join(statement.split()) for statement in statements)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+async def _applied_checksum(conn: asyncpg.Connection, name: str) -> Optional[str]:
+    try:
+        return await conn.fetchval('SELECT checksum FROM "AppliedDdl" WHERE name = $1', name)
+    except asyncpg.UndefinedTableError:
+        return None
+
+
+async def _is_applied(
+    conn: asyncpg.Connection,
+    name: str,
+    checksum: str,
+    triggers: Sequence[str],
+    tables: Sequence[str]
+) -> bool:
+    if await _applied_checksum(conn, name) != checksum:
+        return False
+    # A table recreated since (e.g. by prisma db push) lost its triggers
+    installed = await conn.fetchval(
+        "SELECT count(DISTINCT tgname) FROM pg_trigger WHERE tgname = ANY($1::text[]) AND NOT tgisinternal",
+        list(triggers)
+    ) if triggers else 0
+    if installed != len(set(triggers)):
+        return False
+    # ...or a table created here was dropped
+    for table in tables:
+        if await conn.fetchval("SELECT to_regclass($1) IS NULL", f'"{table}"'):
+            return False
+    return True
+
+
+async def apply_ddl(
+    name: str,
+    statements: Sequence[str],
+    url: Optional[str] = None,
+    triggers: Sequence[str] = (),
+    tables: Sequence[str] = ()
+) -> bool:
+    """Apply idempotent DDL in one transaction, serialized across workers.
+
+    Skipped when this exact DDL set was already applied and the named
+    triggers and tables exist, so restarting workers read the catalog
+    instead of re-taking table locks for DROP/CREATE TRIGGER. Returns
+    whether the DDL ran.
+    """
+    checksum = ddl_checksum(statements)
+    conn = await asyncpg.connect(**connect_kwargs(url))
+    try:
+        if await _is_applied(conn, name, checksum, triggers, tables):
+            return False
+
+        async with conn.transaction():
+            # Every worker runs this at startup; only one may hold the lock
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", name)
+            await conn.execute(_APPLIED_DDL_TABLE)
+            if await _is_applied(conn, name, checksum, triggers, tables):
+                # Another worker applied it while we waited
+                return False
+            for statement in statements:
+                await conn.execute(statement)
+            await conn.execute(
+                """
+                INSERT INTO "AppliedDdl" (name, checksum, "appliedAt") VALUES ($1, $2, now())
+                ON CONFLICT (name) DO UPDATE SET checksum = EXCLUDED.checksum, "appliedAt" = now()
+                """,
+                name, checksum
+            )
+        logger.info(f"Applied database DDL: {name}")
+        return True
+    finally:
+        await conn.close()
@@ -0,0 +1,199 @@
+import re
+import time
+import logging
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from ..config.config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+# Values that are safe to log as-is: UUIDs and other hex identifiers
+_ID_PATTERN = re.compile(r"^[0-9a-fA-F-]{32,36}$")
+
+
+class QueryProfile:
+    """Queries and database function calls made on behalf of one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_ms = 0.0
+        self.calls: Dict[str, int] = {}
+
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+# Totals since startup, per instrumented function and per route
+_function_stats: Dict[str, Dict[str, Any]] = {}
+_route_stats: Dict[str, Dict[str, Any]] = {}
+
+
+@contextmanager
+def track_query() -> Iterator[None]:
+    """Count one database round trip against the current profile"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = _profile.get()
+        if profile is not None:
+            profile.queries += 1
+            profile.query_ms += (time.perf_counter() - start) * 1000
+
+
+def instrument_prisma(client_class: type) -> None:
+    """Count every query a Prisma client class sends to its engine.
+
+    Patches the class so transaction clients created by tx() are counted
+    too. Does nothing on client versions without the _execute hook.
+    """
+    execute = getattr(client_class, "_execute", None)
+    if execute is None or getattr(execute, "_profiled", False):
+        return
+
+    @functools.wraps(execute)
+    async def profiled_execute(self, *args, **kwargs):
+        with track_query():
+            return await execute(self, *args, **kwargs)
+
+    profiled_execute._profiled = True
+    client_class._execute = profiled_execute
+
+
+def redact(value: Any) -> Any:
+    """Loggable form of an argument with personal data masked"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value if _ID_PATTERN.match(value) else f"<str:{len(value)}>"
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    if isinstance(result, dict) and isinstance(result.get("claims"), list):
+        return len(result["claims"])
+    return 1
+
+
+def instrumented(fn: F) -> F:
+    """Record calls, queries, wall time and rows of a database function"""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if not settings.profiling_enabled:
+            return await fn(*args, **kwargs)
+
+        profile = _profile.get()
+        token = None
+        if profile is None:
+            # Called outside a request, e.g. from a job: profile this call alone
+            profile = QueryProfile()
+            token = _profile.set(profile)
+
+        queries_before = profile.queries
+        start = time.perf_counter()
+        result = None
+        failed = False
+        try:
+            result = await fn(*args, **kwargs)
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            queries = profile.queries - queries_before
+            rows = _row_count(result)
+            profile.calls[name] = profile.calls.get(name, 0) + 1
+            if token is not None:
+                _profile.reset(token)
+
+            stats = _function_stats.setdefault(name, {
+                "calls": 0, "errors": 0, "queries": 0, "rows": 0,
+                "total_ms": 0.0, "max_ms": 0.0, "slow": 0
+            })
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["queries"] += queries
+            stats["rows"] += rows
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+            if elapsed_ms >= settings.slow_query_threshold_ms:
+                stats["slow"] += 1
+                logger.warning(
+                    f"Slow database call {name}: {elapsed_ms:.1f} ms, {queries} queries, {rows} rows, "
+                    f"args={redact(list(args))} kwargs={redact(kwargs)}"
+                )
+
+    return wrapper
+
+
+class QueryProfileMiddleware:
+    """ASGI middleware attributing database work to the matched route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiling_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profile.reset(token)
+            route = scope.get("route")
+            key = f"{scope['method']} {getattr(route, 'path', 'unmatched')}"
+
+            stats = _route_stats.setdefault(key, {
+                "requests": 0, "queries": 0, "max_queries": 0,
+                "query_ms": 0.0, "total_ms": 0.0, "functions": {}
+            })
+            stats["requests"] += 1
+            stats["queries"] += profile.queries
+            stats["max_queries"] = max(stats["max_queries"], profile.queries)
+            stats["query_ms"] += profile.query_ms
+            stats["total_ms"] += (time.perf_counter() - start) * 1000
+            for name, calls in profile.calls.items():
+                stats["functions"][name] = stats["functions"].get(name, 0) + calls
+
+
+def get_profile_stats() -> Dict[str, Any]:
+    """Per-function and per-route database totals with averages"""
+    functions = {
+        name: {**stats, "avg_ms": stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0}
+        for name, stats in _function_stats.items()
+    }
+    routes = {
+        key: {
+            **stats,
+            "avg_queries": stats["queries"] / stats["requests"] if stats["requests"] else 0.0,
+            "avg_ms": stats["total_ms"] / stats["requests"] if stats["requests"] else 0.0
+        }
+        for key, stats in _route_stats.items()
+    }
+    return {
+        "slow_threshold_ms": settings.slow_query_threshold_ms,
+        "functions": functions,
+        "routes": routes
+    }
@@ -0,0 +1,191 @@
+"""
+Full-text claim search over incident description, location and report number.
+
+The generated searchVector column and its GIN index are installed once,
+outside the app, because adding a stored generated column rewrites the
+whole Incident table under an ACCESS EXCLUSIVE lock. Run it in a deploy
+window, before starting the new release:
+
+    python -m src.services.search --install-index
+
+The app only checks at startup that the index is in place.
+"""
+
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from ..config.config import settings
+from .cursors import InvalidCursor, decode_cursor, encode_cursor
+from .database import close_db, get_claims_by_ids, get_db, get_read_db
+from .fast_reads import CLAIM_STATUS_DB_VALUES
+from .pg import apply_ddl
+from .profiling import instrumented
+
+logger = logging.getLogger(__name__)
+
+# Weighted document over the incident's searchable columns. Report numbers
+# use the simple dictionary so they are matched verbatim, not stemmed.
+_SEARCH_DOCUMENT = """
+    setweight(to_tsvector('english', coalesce("Description of Accident", '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce("Accident/Complaint Report Number", '')), 'A') ||
+    setweight(to_tsvector('english', coalesce("Incident Location", '')), 'B')
+"""
+
+SEARCH_DDL = [
+    # prisma db push creates searchVector as a plain column; replace it
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'Incident'
+              AND column_name = 'searchVector' AND is_generated = 'NEVER'
+        ) THEN
+            ALTER TABLE "Incident" DROP COLUMN "searchVector";
+        END IF;
+    END $$
+    """,
+    f"""
+    ALTER TABLE "Incident" ADD COLUMN IF NOT EXISTS "searchVector" tsvector
+    GENERATED ALWAYS AS ({_SEARCH_DOCUMENT}) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS "Incident_searchVector_idx" ON "Incident" USING GIN ("searchVector")',
+]
+
+# Matches either dictionary, so stemmed words and literal report numbers both hit
+_SEARCH_QUERY = """
+    SELECT c.id, ts_rank_cd(i."searchVector", q.query) AS rank,
+           ts_headline('english', coalesce(i."Description of Accident", ''), q.query,
+                       'MaxFragments=2, MaxWords=20, MinWords=5') AS snippet
+    FROM "Incident" i
+    JOIN "Claim" c ON c."incidentId" = i.id
+    CROSS JOIN (
+        SELECT websearch_to_tsquery('english', $1) || websearch_to_tsquery('simple', $1) AS query
+    ) q
+    WHERE i."searchVector" @@ q.query
+      AND ($2::text IS NULL OR c."Status"::text = $2)
+      AND ($3::timestamp IS NULL OR i."Date of Accident" >= $3)
+      AND ($4::timestamp IS NULL OR i."Date of Accident" < $4)
+      AND ($5::real IS NULL OR ts_rank_cd(i."searchVector", q.query) < $5
+           OR (ts_rank_cd(i."searchVector", q.query) = $5 AND c.id < $6))
+    ORDER BY rank DESC, c.id DESC
+    LIMIT $7
+"""
+
+
+_INDEX_CHECK = """
+    SELECT EXISTS (
+               SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'Incident'
+                 AND column_name = 'searchVector' AND is_generated = 'ALWAYS'
+           ) AS column_ready,
+           to_regclass('"Incident_searchVector_idx"') IS NOT NULL AS index_ready
+"""
+
+# None until checked, then whether the generated column and index exist
+_index_ready: Optional[bool] = None
+
+
+class SearchIndexMissing(Exception):
+    """The incident search column or index has not been installed"""
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    # Prisma stores timestamps without a zone, in UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def install_search_index() -> None:
+    """Create the generated incident search column and its GIN index.
+
+    Rewrites Incident on first install; see the module docstring.
+    """
+    await apply_ddl("agentpil_incident_search", SEARCH_DDL)
+
+
+async def check_search_index() -> bool:
+    """Check the search column and index exist, without changing anything"""
+    global _index_ready
+    prisma = await get_db()
+    rows = await prisma.query_raw(_INDEX_CHECK)
+    _index_ready = bool(rows and rows[0]["column_ready"] and rows[0]["index_ready"])
+    if not _index_ready:
+        logger.warning(
+            "Claim search index is not installed, search is unavailable until "
+            "python -m src.services.search --install-index runs"
+        )
+    return _index_ready
+
+
+@instrumented
+async def search_claims(
+    q: str,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Full-text search over incident description, location and report number.
+
+    Returns claims ranked best first with a snippet per claim and the
+    cursor of the next page (None on the last page). Raises InvalidCursor
+    for a malformed cursor and SearchIndexMissing when the index is not
+    installed.
+    """
+    if _index_ready is False:
+        raise SearchIndexMissing("Claim search index is not installed")
+    limit = min(limit or settings.search_default_limit, settings.search_max_limit)
+    after_rank, after_id = decode_cursor(cursor, 2) if cursor else (None, None)
+    if cursor and not isinstance(after_rank, (int, float)):
+        raise InvalidCursor("Invalid pagination cursor")
+    status_value = CLAIM_STATUS_DB_VALUES.get(status.upper(), status) if status else None
+
+    try:
+        prisma = await get_read_db()
+        # One extra row tells whether another page exists
+        rows = await prisma.query_raw(
+            _SEARCH_QUERY,
+            q, status_value, _utc_naive(date_from), _utc_naive(date_to),
+            after_rank, after_id, limit + 1
+        )
+
+        page: List[Dict[str, Any]] = rows[:limit]
+        result = await get_claims_by_ids([row["id"] for row in page])
+        if result is None:
+            return None
+
+        claims = {claim["id"]: claim for claim in result["claims"]}
+        hits = [
+            {"rank": row["rank"], "snippet": row["snippet"], "claim": claims[row["id"]]}
+            for row in page if row["id"] in claims
+        ]
+        next_cursor = encode_cursor(page[-1]["rank"], page[-1]["id"]) if len(rows) > limit else None
+        return {"results": hits, "next_cursor": next_cursor}
+
+    except Exception as e:
+        logger.error(f"Error searching claims: {str(e)}")
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Manage the claim search index")
+    parser.add_argument("--install-index", action="store_true", help="Create the search column and GIN index")
+    args = parser.parse_args()
+
+    try:
+        if args.install_index:
+            await install_search_index()
+        print("ready" if await check_search_index() else "missing")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    asyncio.run(main())
@@ -0,0 +1,293 @@
+"""
+Incremental Parquet snapshots of claims, incidents and users for analytics.
+
+Each run exports only rows whose updatedAt moved past the table's watermark,
+appends them as new part files partitioned by creation month, and records
+the files and new watermark in a manifest. Compaction merges the parts of a
+partition into one file keeping the latest version of each row, so readers
+of a compacted partition see exactly one row per id.
+
+Run with: python -m src.services.snapshots [--compact] [--tables claim,user]
+"""
+
+import os
+import json
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+# pyarrow is only needed by the snapshot job, not by the API
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from ..config.config import settings
+from .database import get_db, close_db
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Non-PII columns exported per table, with their Parquet types
+SNAPSHOT_TABLES: Dict[str, Dict[str, str]] = {
+    "claim": {
+        "id": "string",
+        "status": "string",
+        "injured": "bool",
+        "relationship": "string",
+        "healthInsurance": "bool",
+        "isOver65": "bool",
+        "receiveMedicare": "list",
+        "assignedCaseManager": "string",
+        "userId": "string",
+        "incidentId": "string",
+        "claimlistId": "string",
+        "clientRoleId": "string",
+        "injuredPartyRoleId": "string",
+        "healthInsuranceProviderId": "string",
+        "createdAt": "timestamp",
+        "updatedAt": "timestamp",
+    },
+    "incident": {
+        "id": "string",
+        "datetime": "timestamp",
+        "vehicleRole": "string",
+        "vehicleCount": "int",
+        "busOrVehicle": "string",
+        "transportType": "string",
+        "rideShareCompany": "string",
+        "propertyType": "string",
+        "workRelated": "bool",
+        "policeReportCompleted": "bool",
+        "reportCompleted": "bool",
+        "supportingDocument": "bool",
+        "witness": "bool",
+        "priorRepresentation": "bool",
+        "policeStationId": "string",
+        "lawfirmId": "string",
+        "createdAt": "timestamp",
+        "updatedAt": "timestamp",
+    },
+    "user": {
+        "id": "string",
+        "role": "string",
+        "injured": "string",
+        "isVerified": "bool",
+        "isUnder18": "bool",
+        "mailingState": "string",
+        "sourceId": "string",
+        "claimlistId": "string",
+        "createdAt": "timestamp",
+        "updatedAt": "timestamp",
+    },
+}
+
+
+def _arrow_schema(columns: Dict[str, str]) -> "pa.Schema":
+    types = {
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "int": pa.int64(),
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+        "list": pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns.items()])
+
+
+def _snapshot_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class SnapshotManifest:
+    """Watermarks and part files per table, persisted as JSON"""
+
+    def __init__(self, root: str):
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self.data: Dict[str, Any] = {"tables": {}}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def table(self, name: str) -> Dict[str, Any]:
+        return self.data["tables"].setdefault(name, {"watermark": None, "last_id": None, "files": []})
+
+    def save(self) -> None:
+        self.data["updated_at"] = datetime.now(timezone.utc).isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class SnapshotWriter:
+    """Exports changed rows and compacts partitions under a root directory"""
+
+    def __init__(self, root: Optional[str] = None, batch_size: Optional[int] = None):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for snapshots: pip install pyarrow")
+        self.root = root or settings.snapshot_dir
+        self.batch_size = batch_size or settings.snapshot_batch_size
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest = SnapshotManifest(self.root)
+
+    async def export_table(self, table: str) -> int:
+        """Export rows changed since the table's watermark, return row count"""
+        prisma = await get_db()
+        columns = SNAPSHOT_TABLES[table]
+        schema = _arrow_schema(columns)
+        state = self.manifest.table(table)
+        run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+        watermark = datetime.fromisoformat(state["watermark"]) if state["watermark"] else None
+        last_id = state["last_id"]
+        exported = 0
+
+        while True:
+            where: Dict[str, Any] = {}
+            if watermark is not None:
+                where = {
+                    "OR": [
+                        {"updatedAt": {"gt": watermark}},
+                        {"updatedAt": watermark, "id": {"gt": last_id}}
+                    ]
+                }
+
+            records = await getattr(prisma, table).find_many(
+                where=where,
+                order=[{"updatedAt": "asc"}, {"id": "asc"}],
+                take=self.batch_size
+            )
+            if not records:
+                break
+
+            partitions: Dict[str, List[Dict[str, Any]]] = {}
+            for record in records:
+                row = record.model_dump()
+                partition = f"created_month={row['createdAt'].strftime('%Y-%m')}"
+                partitions.setdefault(partition, []).append(
+                    {column: _snapshot_value(row.get(column)) for column in columns}
+                )
+
+            for partition, rows in partitions.items():
+                file_name = f"part-{run_id}-{exported:09d}.parquet"
+                self._write(table, partition, file_name, pa.Table.from_pylist(rows, schema=schema))
+
+            exported += len(records)
+            watermark = records[-1].updatedAt
+            last_id = records[-1].id
+
+            # Persist progress per batch so a crashed run resumes where it stopped
+            state["watermark"] = watermark.isoformat()
+            state["last_id"] = last_id
+            self.manifest.save()
+
+            if len(records) < self.batch_size:
+                break
+
+        logger.info(f"Snapshot of {table}: {exported} changed rows")
+        return exported
+
+    def compact_table(self, table: str, min_files: Optional[int] = None) -> int:
+        """Merge partitions with many parts into one file, latest row per id"""
+        min_files = min_files or settings.snapshot_compact_min_files
+        state = self.manifest.table(table)
+        schema = _arrow_schema(SNAPSHOT_TABLES[table])
+
+        by_partition: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in state["files"]:
+            by_partition.setdefault(entry["partition"], []).append(entry)
+
+        compacted = 0
+        for partition, entries in by_partition.items():
+            if len(entries) < min_files:
+                continue
+
+            merged = pa.concat_tables(
+                pq.read_table(os.path.join(self.root, entry["path"]), schema=schema) for entry in entries
+            )
+            latest: Dict[str, Dict[str, Any]] = {}
+            for row in merged.to_pylist():
+                current = latest.get(row["id"])
+                if current is None or row["updatedAt"] >= current["updatedAt"]:
+                    latest[row["id"]] = row
+
+            file_name = f"compacted-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.parquet"
+            rows = sorted(latest.values(), key=lambda row: row["id"])
+            self._write(table, partition, file_name, pa.Table.from_pylist(rows, schema=schema), replaces=entries)
+            compacted += 1
+
+        logger.info(f"Compacted {compacted} {table} partitions")
+        return compacted
+
+    def _write(
+        self,
+        table: str,
+        partition: str,
+        file_name: str,
+        data: "pa.Table",
+        replaces: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        relative_path = os.path.join(table, partition, file_name)
+        full_path = os.path.join(self.root, relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        # Write to a temp name first so readers never see a partial file
+        pq.write_table(data, f"{full_path}.tmp", compression="zstd")
+        os.replace(f"{full_path}.tmp", full_path)
+
+        state = self.manifest.table(table)
+        if replaces:
+            replaced = {entry["path"] for entry in replaces}
+            state["files"] = [entry for entry in state["files"] if entry["path"] not in replaced]
+        state["files"].append({
+            "path": relative_path,
+            "partition": partition,
+            "rows": data.num_rows,
+            "written_at": datetime.now(timezone.utc).isoformat()
+        })
+        self.manifest.save()
+
+        # Old parts are removed only after the manifest stops referencing them
+        for entry in replaces or []:
+            try:
+                os.remove(os.path.join(self.root, entry["path"]))
+            except FileNotFoundError:
+                pass
+
+
+async def run_snapshot(tables: Optional[List[str]] = None, compact: bool = False) -> Dict[str, int]:
+    """Export changed rows for each table, optionally compacting afterwards"""
+    writer = SnapshotWriter()
+    exported = {}
+    for table in tables or list(SNAPSHOT_TABLES):
+        exported[table] = await writer.export_table(table)
+        if compact:
+            writer.compact_table(table)
+    return exported
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Export incremental Parquet snapshots")
+    parser.add_argument("--tables", help="Comma-separated tables (default: all)")
+    parser.add_argument("--compact", action="store_true", help="Compact partitions after exporting")
+    args = parser.parse_args()
+
+    tables = [table.strip() for table in args.tables.split(",")] if args.tables else None
+    try:
+        exported = await run_snapshot(tables, compact=args.compact)
+        print(json.dumps(exported))
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    asyncio.run(main())
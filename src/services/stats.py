@@ -0,0 +1,249 @@
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from ..config.config import settings
+from .database import get_read_db
+from .fast_reads import CLAIM_STATUS_NAMES
+from .pg import apply_ddl, connect_kwargs
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_STATUS = "status"
+DIMENSION_MANAGER = "manager"
+DIMENSION_PROJECT = "project"
+
+# Status key of claims whose status is NULL, so the total counts them
+STATUS_UNKNOWN = "unknown"
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+# (dimension, table, key column) for every maintained counter
+_COUNTED = [
+    (DIMENSION_STATUS, "Claim", f"""COALESCE("Status"::text, '{STATUS_UNKNOWN}')"""),
+    (DIMENSION_MANAGER, "Claim", '"Assigned Claim Specialist"'),
+    (DIMENSION_PROJECT, "ProjectClaim", '"projectId"'),
+]
+
+
+def _apply_deltas(table: str, sources: List[Tuple[str, int]]) -> str:
+    """SQL adding the net per-key change of transition tables to the counters"""
+    parts = [
+        f"SELECT '{dimension}', {column}, {sign} FROM {source}"
+        for dimension, counted_table, column in _COUNTED if counted_table == table
+        for source, sign in sources
+    ]
+    # Keys are locked in a fixed order so concurrent writers cannot deadlock
+    return f"""
+        INSERT INTO "ClaimStatCounter" (dimension, key, count, "updatedAt")
+        SELECT dimension, key, SUM(delta), now()
+        FROM ({" UNION ALL ".join(parts)}) AS changes (dimension, key, delta)
+        WHERE key IS NOT NULL
+        GROUP BY dimension, key
+        HAVING SUM(delta) <> 0
+        ORDER BY dimension, key
+        ON CONFLICT (dimension, key)
+        DO UPDATE SET count = "ClaimStatCounter".count + EXCLUDED.count, "updatedAt" = now()
+    """
+
+
+def _counter_function(table: str) -> str:
+    return f"""
+    CREATE OR REPLACE FUNCTION agentpil_count_{table.lower()}_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_apply_deltas(table, [("new_rows", 1)])};
+        ELSIF TG_OP = 'DELETE' THEN
+            {_apply_deltas(table, [("old_rows", -1)])};
+        ELSE
+            {_apply_deltas(table, [("new_rows", 1), ("old_rows", -1)])};
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+
+
+def _counter_triggers(table: str) -> List[str]:
+    # Transition tables need one trigger per event
+    statements = []
+    for event, referencing in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "NEW TABLE AS new_rows OLD TABLE AS old_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        name = f"agentpil_{table.lower()}_stats_{event.lower()}"
+        statements.append(f'DROP TRIGGER IF EXISTS {name} ON "{table}"')
+        statements.append(f"""
+        CREATE TRIGGER {name}
+        AFTER {event} ON "{table}"
+        REFERENCING {referencing}
+        FOR EACH STATEMENT EXECUTE FUNCTION agentpil_count_{table.lower()}_stats()
+        """)
+    return statements
+
+
+STATS_TRIGGERS = [
+    f"agentpil_{table.lower()}_stats_{event}"
+    for table in ("Claim", "ProjectClaim")
+    for event in ("insert", "update", "delete")
+]
+
+# Installed once per change to this list, see apply_ddl
+STATS_DDL = [
+    # Same shape prisma db push gives the ClaimStatCounter model, so the
+    # triggers never fire against a missing table
+    """
+    CREATE TABLE IF NOT EXISTS "ClaimStatCounter" (
+        "dimension" TEXT NOT NULL,
+        "key" TEXT NOT NULL,
+        "count" INTEGER NOT NULL,
+        "updatedAt" TIMESTAMP(3) NOT NULL,
+        CONSTRAINT "ClaimStatCounter_pkey" PRIMARY KEY ("dimension", "key")
+    )
+    """,
+    _counter_function("Claim"),
+    *_counter_triggers("Claim"),
+    _counter_function("ProjectClaim"),
+    *_counter_triggers("ProjectClaim"),
+]
+
+_SOURCE_COUNTS = f"""
+    SELECT 'status' AS dimension, COALESCE("Status"::text, '{STATUS_UNKNOWN}') AS key, COUNT(*)::int AS count
+    FROM "Claim" GROUP BY 2
+    UNION ALL
+    SELECT 'manager', "Assigned Claim Specialist", COUNT(*)::int
+    FROM "Claim" WHERE "Assigned Claim Specialist" IS NOT NULL GROUP BY 2
+    UNION ALL
+    SELECT 'project', "projectId", COUNT(*)::int
+    FROM "ProjectClaim" GROUP BY 2
+"""
+
+
+async def install_stats_triggers() -> None:
+    """Create the counter table and triggers if missing or changed, and
+    seed the counters if empty or counted differently before"""
+    installed = await apply_ddl("agentpil_claim_stats", STATS_DDL, triggers=STATS_TRIGGERS)
+    conn = await asyncpg.connect(**connect_kwargs())
+    try:
+        empty = await conn.fetchval('SELECT NOT EXISTS (SELECT 1 FROM "ClaimStatCounter")')
+    finally:
+        await conn.close()
+    if installed or empty:
+        await reconcile_claim_stats(fix=True)
+
+
+async def get_claim_stats() -> Optional[Dict[str, Any]]:
+    """Claim counts by status, case manager and project from the counters.
+
+    Claims without a status count under "unknown", so the total covers
+    every claim.
+    """
+    try:
+        prisma = await get_read_db()
+        counters = await prisma.claimstatcounter.find_many(where={"count": {"gt": 0}})
+
+        by_dimension: Dict[str, Dict[str, int]] = {DIMENSION_STATUS: {}, DIMENSION_MANAGER: {}, DIMENSION_PROJECT: {}}
+        for counter in counters:
+            key = counter.key
+            if counter.dimension == DIMENSION_STATUS:
+                key = CLAIM_STATUS_NAMES.get(key, key)
+            by_dimension.setdefault(counter.dimension, {})[key] = counter.count
+
+        project_ids = list(by_dimension[DIMENSION_PROJECT])
+        projects = await prisma.project.find_many(where={"id": {"in": project_ids}}) if project_ids else []
+        names = {project.id: project.name for project in projects}
+
+        return {
+            "total": sum(by_dimension[DIMENSION_STATUS].values()),
+            "by_status": by_dimension[DIMENSION_STATUS],
+            "by_case_manager": by_dimension[DIMENSION_MANAGER],
+            "by_project": [
+                {"projectId": project_id, "name": names.get(project_id), "count": count}
+                for project_id, count in sorted(by_dimension[DIMENSION_PROJECT].items(), key=lambda item: -item[1])
+            ]
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting claim stats: {str(e)}")
+        return None
+
+
+async def reconcile_claim_stats(fix: bool = True) -> Dict[str, Any]:
+    """Compare the counters with counts from the source tables.
+
+    Both are read in one repeatable-read snapshot, in which the triggers
+    keep them equal unless counts were lost (e.g. TRUNCATE or triggers
+    disabled). Writers are never blocked. With fix=True, each drifted
+    counter is corrected by adding its difference, which commutes with
+    trigger updates made since the snapshot.
+    """
+    start = time.perf_counter()
+    conn = await asyncpg.connect(**connect_kwargs())
+    try:
+        # One reconciliation at a time across workers, or a correction
+        # could be applied twice
+        if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext('agentpil_claim_stats_reconcile'))"):
+            return {"skipped": True, "reason": "Reconciliation already running"}
+
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            source = {(row["dimension"], row["key"]): row["count"] for row in await conn.fetch(_SOURCE_COUNTS)}
+            stored = {
+                (row["dimension"], row["key"]): row["count"]
+                for row in await conn.fetch('SELECT dimension, key, count FROM "ClaimStatCounter"')
+            }
+
+        drift = [
+            {"dimension": dimension, "key": key, "counter": stored.get((dimension, key), 0), "actual": source.get((dimension, key), 0)}
+            for dimension, key in sorted(set(source) | set(stored))
+            if stored.get((dimension, key), 0) != source.get((dimension, key), 0)
+        ]
+
+        if fix and drift:
+            async with conn.transaction():
+                # Sorted like the triggers' updates, so they cannot deadlock
+                await conn.executemany(
+                    """
+                    INSERT INTO "ClaimStatCounter" (dimension, key, count, "updatedAt") VALUES ($1, $2, $3, now())
+                    ON CONFLICT (dimension, key)
+                    DO UPDATE SET count = "ClaimStatCounter".count + EXCLUDED.count, "updatedAt" = now()
+                    """,
+                    [(item["dimension"], item["key"], item["actual"] - item["counter"]) for item in drift]
+                )
+    finally:
+        await conn.close()
+
+    if drift:
+        logger.warning(f"Claim stat counters drifted on {len(drift)} keys{', fixed' if fix else ''}")
+    return {
+        "checked": len(source),
+        "drift": drift,
+        "fixed": fix and bool(drift),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
+async def _run_reconciliation() -> None:
+    while True:
+        await asyncio.sleep(settings.stats_reconcile_seconds)
+        try:
+            await reconcile_claim_stats(fix=True)
+        except Exception as e:
+            logger.error(f"Error reconciling claim stats: {str(e)}")
+
+
+def start_reconciliation() -> None:
+    """Reconcile the counters every stats_reconcile_seconds in the background"""
+    global _reconcile_task
+    if _reconcile_task is None and settings.stats_reconcile_seconds > 0:
+        _reconcile_task = asyncio.get_running_loop().create_task(_run_reconciliation())
+
+
+def stop_reconciliation() -> None:
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        _reconcile_task = None
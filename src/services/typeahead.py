@@ -0,0 +1,200 @@
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from .duplicates import normalize_text
+
+# Prefix candidates examined per query before ranking
+CANDIDATE_LIMIT = 500
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm style trigrams of normalized text, words padded with spaces"""
+    grams: Set[str] = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[str] = set()
+
+
+class TypeaheadIndex:
+    """In-memory name index: word prefix trie with a trigram fallback.
+
+    Every word of an entry's name is inserted into the trie, so "mercy"
+    finds "St. Mercy Hospital". Queries whose words do not all prefix-match
+    fall back to trigram similarity, which tolerates typos.
+
+    Entries may belong to a group (e.g. a role type). Each group has its own
+    trie, so a search within a group collects prefix candidates from that
+    group only instead of filtering a truncated candidate list.
+    """
+
+    def __init__(self, fuzzy_threshold: float = 0.3):
+        # Minimum trigram similarity for fuzzy matches, as pg_trgm's default
+        self.fuzzy_threshold = fuzzy_threshold
+        self._root = _TrieNode()
+        self._group_roots: Dict[str, _TrieNode] = {}
+        self._group_ids: Dict[str, Set[str]] = {}
+        self._groups: Dict[str, Optional[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._names: Dict[str, str] = {}
+        self._words: Dict[str, List[str]] = {}
+        self._trigram_counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _roots(self, group: Optional[str]) -> List[_TrieNode]:
+        if group is None:
+            return [self._root]
+        return [self._root, self._group_roots.setdefault(group, _TrieNode())]
+
+    def upsert(self, entry_id: str, text: str, payload: Dict[str, Any], group: Optional[str] = None) -> None:
+        """Add an entry or replace its name, payload and group"""
+        self.remove(entry_id)
+        name = normalize_text(text)
+        if not name:
+            return
+
+        for word in set(name.split()):
+            for root in self._roots(group):
+                node = root
+                for char in word:
+                    node = node.children.setdefault(char, _TrieNode())
+                node.ids.add(entry_id)
+        if group is not None:
+            self._group_ids.setdefault(group, set()).add(entry_id)
+
+        grams = trigrams(name)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(entry_id)
+
+        self._entries[entry_id] = payload
+        self._names[entry_id] = name
+        self._words[entry_id] = name.split()
+        self._trigram_counts[entry_id] = len(grams)
+        self._groups[entry_id] = group
+
+    def remove(self, entry_id: str) -> None:
+        name = self._names.pop(entry_id, None)
+        if name is None:
+            return
+
+        group = self._groups.pop(entry_id)
+        for word in set(name.split()):
+            for root in self._roots(group):
+                node = self._find(word, root)
+                if node is not None:
+                    node.ids.discard(entry_id)
+        if group is not None:
+            self._group_ids[group].discard(entry_id)
+
+        for gram in trigrams(name):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(entry_id)
+                if not posting:
+                    del self._postings[gram]
+
+        del self._entries[entry_id]
+        del self._words[entry_id]
+        del self._trigram_counts[entry_id]
+
+    def _find(self, prefix: str, root: Optional[_TrieNode]) -> Optional[_TrieNode]:
+        node = root
+        for char in prefix:
+            if node is None:
+                return None
+            node = node.children.get(char)
+        return node
+
+    def _prefix_ids(self, prefix: str, group: Optional[str] = None) -> List[str]:
+        """Ids with a word starting with prefix, shortest words first"""
+        node = self._find(prefix, self._group_roots.get(group) if group is not None else self._root)
+        if node is None:
+            return []
+
+        found: List[str] = []
+        level = [node]
+        while level:
+            next_level = []
+            for current in level:
+                found.extend(current.ids)
+                if len(found) >= CANDIDATE_LIMIT:
+                    return found[:CANDIDATE_LIMIT]
+                next_level.extend(current.children.values())
+            level = next_level
+        return found
+
+    def search(self, query: str, limit: int, group: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Best matches for a query, optionally within one group: prefix
+        matches first, then fuzzy ones"""
+        query_name = normalize_text(query)
+        if not query_name or limit <= 0:
+            return []
+        words = query_name.split()
+        members = self._group_ids.get(group, set()) if group is not None else None
+
+        # The longest word narrows the candidates the most
+        prefix_hits = []
+        seen: Set[str] = set()
+        for entry_id in self._prefix_ids(max(words, key=len), group):
+            if entry_id in seen:
+                continue
+            seen.add(entry_id)
+            name = self._names[entry_id]
+            entry_words = self._words[entry_id]
+            if not all(any(w.startswith(word) for w in entry_words) for word in words):
+                continue
+            score = 1.0 if name.startswith(query_name) else 0.9
+            prefix_hits.append((score, len(name), name, entry_id))
+
+        prefix_hits.sort(key=lambda hit: (-hit[0], hit[1], hit[2]))
+        results = [
+            {**self._entries[entry_id], "match": "prefix", "score": score}
+            for score, _, _, entry_id in prefix_hits[:limit]
+        ]
+        if len(results) >= limit:
+            return results
+
+        # Trigram fallback for typos and partial words
+        query_grams = trigrams(query_name)
+        # similarity >= t needs shared >= t * (query + entry) / (1 + t), and
+        # every entry has at least one trigram
+        min_shared = math.ceil(self.fuzzy_threshold * (len(query_grams) + 1) / (1 + self.fuzzy_threshold))
+        postings = sorted((self._postings.get(gram, set()) for gram in query_grams), key=len)
+        # An entry sharing min_shared of n trigrams has one of the n - min_shared + 1
+        # rarest, so only those postings produce candidates
+        split = len(postings) - min_shared + 1
+        shared: Counter = Counter()
+        for posting in postings[:split]:
+            shared.update(posting)
+
+        matched = {hit[3] for hit in prefix_hits[:limit]}
+        fuzzy_hits = []
+        for entry_id, count in shared.items():
+            if entry_id in matched or (members is not None and entry_id not in members):
+                continue
+            count += sum(1 for posting in postings[split:] if entry_id in posting)
+            if count < min_shared:
+                continue
+            similarity = count / (len(query_grams) + self._trigram_counts[entry_id] - count)
+            if similarity < self.fuzzy_threshold:
+                continue
+            fuzzy_hits.append((similarity, self._names[entry_id], entry_id))
+
+        fuzzy_hits.sort(key=lambda hit: (-hit[0], hit[1]))
+        results.extend(
+            {**self._entries[entry_id], "match": "fuzzy", "score": round(similarity, 3)}
+            for similarity, _, entry_id in fuzzy_hits[:limit - len(results)]
+        )
+        return results
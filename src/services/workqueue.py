@@ -0,0 +1,182 @@
+import time
+import heapq
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config.config import settings
+
+logger = logging.getLogger(__name__)
+
+LoadCounter = Callable[[], Awaitable[Dict[str, int]]]
+
+# Create messages normally arrive within milliseconds; one still awaited
+# after this long was lost with a dropped notification connection
+CREATED_MESSAGE_TIMEOUT_SECONDS = 60.0
+
+
+def is_open(status: Any) -> bool:
+    """Whether a claim in this status counts towards its manager's load"""
+    if status is None:
+        # New claims default to PENDING_INFORMATION
+        return True
+    return str(getattr(status, "value", status)) not in settings.work_queue_closed_statuses
+
+
+class WorkQueue:
+    """Open claim load per case manager, balancing new claims by least load.
+
+    Loads live in a dict; a min-heap of (load, manager) entries picks the
+    least loaded configured manager, with stale entries skipped lazily.
+    apply() takes claim change messages from the change feed, which
+    delivers the changes of every worker over the notification bus, and
+    reload() resyncs from Postgres after missed notifications and
+    periodically.
+
+    A claim created here is counted once: pick() reserves the manager,
+    assigned() ties the reservation to the new claim id, and the claim's
+    create message is then skipped. A claim committed while a reload's
+    count runs may be counted twice until the next reload.
+    """
+
+    def __init__(self):
+        self._loads: Dict[str, int] = {}
+        self._reserved: Dict[str, int] = {}
+        self._created: Dict[str, float] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def managers(self) -> List[str]:
+        return settings.case_managers
+
+    def _set_load(self, manager: str, load: int) -> None:
+        self._loads[manager] = max(load, 0)
+        if manager in self.managers:
+            heapq.heappush(self._heap, (self._loads[manager], manager))
+            if len(self._heap) > 4 * len(self.managers) + 64:
+                # Drop the stale entries
+                self._heap = [(self._loads.get(m, 0), m) for m in self.managers]
+                heapq.heapify(self._heap)
+
+    def _adjust(self, manager: str, delta: int) -> None:
+        self._set_load(manager, self._loads.get(manager, 0) + delta)
+
+    def replace_loads(self, loads: Dict[str, int]) -> None:
+        """Swap in loads counted from the database.
+
+        Reservations whose claims are not created yet are not in the
+        count, so they are added back on top.
+        """
+        self._loads = {}
+        self._heap = []
+        for manager in set(self.managers) | set(loads) | set(self._reserved):
+            load = loads.get(manager, 0) + self._reserved.get(manager, 0)
+            if manager in self.managers:
+                self._set_load(manager, load)
+            else:
+                self._loads[manager] = load
+
+    def pick(self) -> Optional[str]:
+        """Reserve the least loaded configured manager for a new claim"""
+        while self._heap:
+            load, manager = self._heap[0]
+            if manager in self.managers and self._loads.get(manager) == load:
+                break
+            heapq.heappop(self._heap)
+        else:
+            if not self.managers:
+                return None
+            # Heap emptied by config changes; rebuild it from current loads
+            for manager in self.managers:
+                self._set_load(manager, self._loads.get(manager, 0))
+            return self.pick()
+
+        self._reserved[manager] = self._reserved.get(manager, 0) + 1
+        self._adjust(manager, 1)
+        return manager
+
+    def _unreserve(self, manager: str) -> bool:
+        if self._reserved.get(manager, 0) <= 0:
+            return False
+        self._reserved[manager] -= 1
+        if not self._reserved[manager]:
+            del self._reserved[manager]
+        return True
+
+    def release(self, manager: str) -> None:
+        """Give back a reservation whose claim was never created"""
+        if self._unreserve(manager):
+            self._adjust(manager, -1)
+
+    def assigned(self, claim_id: str, manager: str) -> None:
+        """Tie a reservation to the claim created with it.
+
+        The claim is committed and already counted, so its create message
+        is skipped when it arrives.
+        """
+        if self._unreserve(manager):
+            self._created[claim_id] = time.monotonic()
+
+    def apply(self, message: Dict[str, Any]) -> None:
+        """Change feed listener moving load between managers"""
+        new_manager = message.get("assignedCaseManager")
+        new_open = is_open(message.get("status"))
+
+        if message["type"] == "created":
+            if self._created.pop(message["claim_id"], None) is not None:
+                return
+            if new_manager and new_open:
+                self._adjust(new_manager, 1)
+            return
+
+        previous = message.get("previous") or {}
+        old_manager = previous.get("assignedCaseManager")
+        old_open = is_open(previous.get("status"))
+        if (old_manager, old_open) == (new_manager, new_open):
+            return
+        if old_manager and old_open:
+            self._adjust(old_manager, -1)
+        if new_manager and new_open:
+            self._adjust(new_manager, 1)
+
+    async def reload(self, count_loads: LoadCounter) -> None:
+        cutoff = time.monotonic() - CREATED_MESSAGE_TIMEOUT_SECONDS
+        self._created = {claim_id: at for claim_id, at in self._created.items() if at > cutoff}
+        self.replace_loads(await count_loads())
+        logger.info(f"Work queue loads: {self.snapshot()['managers']}")
+
+    async def start(self, count_loads: LoadCounter) -> None:
+        """Load current loads and resync them periodically"""
+        try:
+            await self.reload(count_loads)
+        except Exception as e:
+            logger.error(f"Error loading case manager loads: {str(e)}")
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(count_loads))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, count_loads: LoadCounter) -> None:
+        while True:
+            await asyncio.sleep(settings.work_queue_reload_seconds)
+            try:
+                await self.reload(count_loads)
+            except Exception as e:
+                logger.error(f"Error reloading case manager loads: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "managers": {manager: self._loads.get(manager, 0) for manager in self.managers},
+            "unconfigured": {
+                manager: load for manager, load in self._loads.items()
+                if manager not in self.managers and load
+            }
+        }
+
+
+# Global case manager work queue
+work_queue = WorkQueue()
@@ -6,6 +6,7 @@ Generates Prisma client and starts the FastAPI application
 
 import os
 import sys
+import math
 import logging
 
 # Configure logging
@@ -15,6 +16,136 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Estimated resident memory per worker, including its Prisma query engine process
+DEFAULT_WORKER_MEMORY_MB = 350
+
+# Memory kept free for the gunicorn master, the OS and request spikes
+RESERVED_MEMORY_MB = 256
+
+def env_int(name, default):
+    """Read an integer environment variable, falling back on missing or bad values"""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Ignoring non-integer {name}={value!r}")
+        return default
+
+def env_bool(name, default=False):
+    """Read a boolean environment variable"""
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value in ("1", "true", "yes", "on")
+
+def available_cpus():
+    """CPUs this process may use, honoring affinity and cgroup quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    
+    # Container CPU limits (cgroup v2 first, then v1)
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+def available_memory_mb():
+    """Memory available to this container or host in MB, None if unknown"""
+    # Container memory limits (cgroup v2 first, then v1)
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            # Unlimited shows as "max" or a huge page-aligned number
+            if value != "max" and int(value) < 1 << 60:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            continue
+    
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def worker_count():
+    """Number of gunicorn workers from WEB_CONCURRENCY or CPU and memory"""
+    explicit = env_int("WEB_CONCURRENCY", 0)
+    if explicit > 0:
+        return explicit
+    
+    cpus = available_cpus()
+    # Async workers rarely saturate a core, one extra covers blocking work
+    workers = cpus * env_int("WORKERS_PER_CORE", 1) + 1
+    
+    memory_mb = available_memory_mb()
+    if memory_mb is not None:
+        per_worker = env_int("WORKER_MEMORY_MB", DEFAULT_WORKER_MEMORY_MB)
+        workers = min(workers, max(1, (memory_mb - RESERVED_MEMORY_MB) // per_worker))
+    
+    max_workers = env_int("MAX_WORKERS", 0)
+    if max_workers > 0:
+        workers = min(workers, max_workers)
+    
+    logger.info(f"Sizing workers: cpus={cpus} memory_mb={memory_mb} workers={workers}")
+    return max(1, workers)
+
+def gunicorn_command(port):
+    """Build the gunicorn command line from the environment"""
+    workers = worker_count()
+    # Workers read this to refuse per-process state that needs a single worker
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    
+    cmd = [
+        "gunicorn",
+        "src.app:app",
+        "--worker-class", "uvicorn.workers.UvicornWorker",
+        "--workers", str(workers),
+        "--bind", f"0.0.0.0:{port}",
+        "--keep-alive", str(env_int("GUNICORN_KEEPALIVE", 5)),
+        "--timeout", str(env_int("GUNICORN_TIMEOUT", 120)),
+        "--graceful-timeout", str(env_int("GUNICORN_GRACEFUL_TIMEOUT", 30))
+    ]
+    
+    # Recycle workers after N requests to bound slow leaks, jittered so
+    # workers do not all restart at once. 0 disables recycling.
+    max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+    if max_requests > 0:
+        cmd += [
+            "--max-requests", str(max_requests),
+            "--max-requests-jitter", str(env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+        ]
+    
+    # Importing the app once in the master shares its memory between workers;
+    # connections are opened per worker in the app lifespan, after the fork
+    if env_bool("GUNICORN_PRELOAD"):
+        cmd.append("--preload")
+    
+    return cmd
+
 def start_application():
     """Start the FastAPI application with gunicorn"""
     try:
@@ -32,13 +163,7 @@ def start_application():
         port = int(os.environ.get("PORT", 8000))
         
         # Start the application
-        cmd = [
-            "gunicorn",
-            "src.app:app",
-            "--worker-class", "uvicorn.workers.UvicornWorker",
-            "--workers", "1",
-            "--bind", f"0.0.0.0:{port}"
-        ]
+        cmd = gunicorn_command(port)
 
         logger.info(f"Starting application with command: {' '.join(cmd)}")
         os.execvp(cmd[0], cmd)
@@ -50,6 +175,3 @@ def start_application():
 if __name__ == "__main__":
     logger.info("=== Starting Application ===")
     start_application()
-
-
-
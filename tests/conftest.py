@@ -0,0 +1,6 @@
+import os
+
+# Settings requires the Azure AI Foundry values; unit tests never call Azure
+os.environ.setdefault("AZURE_AI_FOUNDRY_ENDPOINT", "https://example.invalid")
+os.environ.setdefault("AZURE_AI_FOUNDRY_PROJECT_NAME", "test")
+os.environ.setdefault("AZURE_AI_FOUNDRY_API_KEY", "test")
@@ -0,0 +1,54 @@
+import asyncio
+
+from src.services.cache import EntityCache, InMemoryLRUBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_cache() -> EntityCache:
+    return EntityCache(backend=InMemoryLRUBackend(max_entries=100), ttl_seconds=60)
+
+
+def test_get_returns_cached_value():
+    async def scenario():
+        cache = make_cache()
+        version = await cache.version("claim", "c1")
+        await cache.set("claim", "c1", {"id": "c1"}, version)
+        return await cache.get("claim", "c1")
+
+    assert run(scenario()) == {"id": "c1"}
+
+
+def test_invalidate_retires_entry():
+    async def scenario():
+        cache = make_cache()
+        await cache.set("claim", "c1", {"id": "c1"}, await cache.version("claim", "c1"))
+        await cache.invalidate("claim", "c1")
+        return await cache.get("claim", "c1")
+
+    assert run(scenario()) is None
+
+
+def test_invalidating_dependency_retires_embedding_entries():
+    async def scenario():
+        cache = make_cache()
+        version = await cache.version("claim", "c1")
+        await cache.set("claim", "c1", {"id": "c1"}, version, depends_on=[("user", "u1")])
+        await cache.invalidate("user", "u1")
+        return await cache.get("claim", "c1")
+
+    assert run(scenario()) is None
+
+
+def test_set_skipped_when_entity_changed_during_load():
+    async def scenario():
+        cache = make_cache()
+        version = await cache.version("claim", "c1")
+        # A write lands between reading the version and storing the load
+        await cache.invalidate("claim", "c1")
+        await cache.set("claim", "c1", {"id": "c1", "stale": True}, version)
+        return await cache.get("claim", "c1")
+
+    assert run(scenario()) is None
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.services.cursors import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    created = datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(0.42, created, "c1")
+    assert decode_cursor(cursor, 3) == [0.42, str(created), "c1"]
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("???>>>", "~~~")
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor, 2) == ["???>>>", "~~~"]
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "e30", encode_cursor("only one"), ""])
+def test_invalid_cursors_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, 2)
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.config.config import settings
+from src.services.deadlines import add_period, compute_deadlines, resolve_jurisdiction
+
+RULES = {
+    "default": {"statute_of_limitations": "3y"},
+    "TX": {"statute_of_limitations": "2y", "notice_of_claim": "6m"},
+    "IN": {"statute_of_limitations": "2y"},
+    "ON": {"statute_of_limitations": "2y"},
+    "OR": {"statute_of_limitations": "2y"},
+    "ME": {"statute_of_limitations": "6y"},
+}
+
+
+@pytest.fixture(autouse=True)
+def deadline_rules(monkeypatch):
+    monkeypatch.setattr(settings, "deadline_rules", RULES)
+    monkeypatch.setattr(settings, "deadline_closed_statuses", ["LITIGATION", "RESOLVED_AND_CLOSED"])
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("Rear-ended in the left lane, Austin TX", "TX"),
+    ("at 5th or near, Portland, ME", "ME"),
+    ("1200 Congress Ave, Austin, TX 78701", "TX"),
+    ("Austin, TX, near the mall", "TX"),
+    ("Portland, ME.", "ME"),
+    ("CRASH ON I-95, PORTLAND ME", "ME"),
+    ("hit in the parking lot on or near the exit", "default"),
+    ("Springfield, IL", "default"),
+    ("", "default"),
+])
+def test_resolve_jurisdiction_from_location(location, expected):
+    assert resolve_jurisdiction({"location": location}, None) == expected
+
+
+def test_resolve_jurisdiction_falls_back_to_user_state():
+    user = {"physicalState": None, "mailingState": " me "}
+    assert resolve_jurisdiction({"location": "left lane on the interstate"}, user) == "ME"
+    assert resolve_jurisdiction({"location": "Austin TX"}, user) == "TX"
+    assert resolve_jurisdiction({"location": None}, {"physicalState": "CA"}) == "default"
+
+
+@pytest.mark.parametrize("start, period, expected", [
+    (datetime(2024, 1, 10), "30d", datetime(2024, 2, 9)),
+    (datetime(2024, 1, 10), "2w", datetime(2024, 1, 24)),
+    (datetime(2024, 1, 31), "1m", datetime(2024, 2, 29)),
+    (datetime(2023, 1, 31), "1m", datetime(2023, 2, 28)),
+    (datetime(2024, 11, 15), "3m", datetime(2025, 2, 15)),
+    (datetime(2024, 2, 29), "1y", datetime(2025, 2, 28)),
+    (datetime(2024, 2, 29), "4Y", datetime(2028, 2, 29)),
+])
+def test_add_period(start, period, expected):
+    assert add_period(start, period) == expected
+
+
+@pytest.mark.parametrize("period", ["", "3", "y", "3x", "-1d", "1.5y"])
+def test_add_period_rejects_bad_periods(period):
+    with pytest.raises(ValueError):
+        add_period(datetime(2024, 1, 1), period)
+
+
+def test_compute_deadlines_uses_jurisdiction_rules():
+    claim = {
+        "status": "PENDING_INFORMATION",
+        "incident": {"datetime": "2024-03-15T10:00:00", "location": "Rear-ended in the left lane, Austin TX"},
+        "user": None,
+    }
+    incident_date = datetime(2024, 3, 15, 10, tzinfo=timezone.utc)
+
+    assert compute_deadlines(claim) == [
+        {"kind": "notice_of_claim", "jurisdiction": "TX", "incidentDate": incident_date,
+         "deadline": datetime(2024, 9, 15, 10, tzinfo=timezone.utc)},
+        {"kind": "statute_of_limitations", "jurisdiction": "TX", "incidentDate": incident_date,
+         "deadline": datetime(2026, 3, 15, 10, tzinfo=timezone.utc)},
+    ]
+
+
+def test_compute_deadlines_default_rules():
+    claim = {"status": None, "incident": {"datetime": datetime(2024, 3, 15), "location": "somewhere"}}
+    deadlines = compute_deadlines(claim)
+    assert [(d["kind"], d["jurisdiction"], d["deadline"]) for d in deadlines] == [
+        ("statute_of_limitations", "default", datetime(2027, 3, 15, tzinfo=timezone.utc))
+    ]
+
+
+@pytest.mark.parametrize("claim", [
+    {"status": "RESOLVED_AND_CLOSED", "incident": {"datetime": datetime(2024, 3, 15)}},
+    {"status": "LITIGATION", "incident": {"datetime": datetime(2024, 3, 15)}},
+    {"status": "PENDING_INFORMATION", "incident": {"datetime": None}},
+    {"status": "PENDING_INFORMATION", "incident": None},
+])
+def test_compute_deadlines_empty_when_not_applicable(claim):
+    assert compute_deadlines(claim) == []
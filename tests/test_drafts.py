@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+
+from src.services.drafts import ClaimDraft, DraftStore
+
+
+def test_later_write_wins_per_field():
+    draft = ClaimDraft("c1")
+    draft.merge({"status": "A", "incident": {"location": "Austin"}}, stamp=2.0)
+    draft.merge({"status": "B", "incident": {"description": "Rear-ended"}}, stamp=1.0)
+    assert draft.updates() == {"status": "A", "incident": {"location": "Austin", "description": "Rear-ended"}}
+    assert draft.revision == 2
+
+
+def test_unset_incident_fields_are_ignored():
+    draft = ClaimDraft("c1")
+    draft.merge({"incident": {"location": "Austin"}}, stamp=1.0)
+    draft.merge({"incident": {"location": None, "witness": True}}, stamp=2.0)
+    assert draft.updates() == {"incident": {"location": "Austin", "witness": True}}
+    assert draft.field_names() == ["incident.location", "incident.witness"]
+
+
+def test_rows_round_trip():
+    draft = ClaimDraft("c1")
+    draft.merge({"status": "A", "incident": {"location": "Austin"}}, stamp=1.0)
+    rows = [
+        {"field": field, "value": json.dumps(value), "stamp": stamp, "revision": 7, "failures": 1}
+        for field, value, stamp in draft.entries()
+    ]
+    loaded = ClaimDraft.from_rows("c1", rows)
+    assert loaded.updates() == draft.updates()
+    assert (loaded.revision, loaded.failures) == (7, 1)
+
+
+def test_overlay_applies_fields_without_mutating_the_claim():
+    claim = {"id": "c1", "status": "PENDING", "incident": {"location": "Dallas", "datetime": None}}
+    draft = ClaimDraft("c1")
+    draft.merge({"incident": {"location": "Austin", "datetime": "2024-03-01T12:00:00"}}, stamp=1.0)
+    merged = DraftStore._apply(claim, draft)
+    assert merged["incident"] == {"location": "Austin", "datetime": datetime(2024, 3, 1, 12)}
+    assert merged["draft"] == {"revision": 1, "fields": ["incident.datetime", "incident.location"]}
+    assert claim["incident"]["location"] == "Dallas"
+    assert DraftStore._apply(claim, None) is claim
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.config.config import settings
+from src.services.duplicates import incident_similarity, normalize_text
+
+
+@pytest.fixture(autouse=True)
+def threshold(monkeypatch):
+    monkeypatch.setattr(settings, "duplicate_similarity_threshold", 0.75)
+
+
+def existing(location=None, description=None):
+    return SimpleNamespace(location=location, description=description)
+
+
+def test_normalize_text():
+    assert normalize_text("  Rear-ended at I-35,  Austin! ") == "rear ended at i 35 austin"
+    assert normalize_text(None) == ""
+
+
+def test_same_incident_reworded_is_above_threshold():
+    score = incident_similarity(
+        {"location": "I-35 & 6th St, Austin TX", "description": "Rear-ended at a red light"},
+        existing("I-35 and 6th St, Austin, TX", "rear ended at red light")
+    )
+    assert score >= settings.duplicate_similarity_threshold
+
+
+def test_different_incident_is_below_threshold():
+    score = incident_similarity(
+        {"location": "I-35 & 6th St, Austin TX", "description": "Rear-ended at a red light"},
+        existing("Parking garage, Dallas", "Slipped on a wet floor near the elevator")
+    )
+    assert score < settings.duplicate_similarity_threshold
+
+
+def test_missing_fields_are_left_out_of_the_weighting():
+    assert incident_similarity({"description": "Hit by a cyclist"}, existing("Austin", "hit by a cyclist")) == 1.0
+    # Two bare incidents on the same date are not duplicates
+    assert incident_similarity({}, existing()) == 0.0
+    assert incident_similarity({"location": "Austin"}, existing(description="Austin")) == 0.0
@@ -0,0 +1,29 @@
+import pytest
+
+from src.services.etags import claim_etag, etag_matches, make_etag, user_etag
+
+ETAG = make_etag("claim", "c1", 1700000000000)
+
+
+def test_etag_is_weak_and_stable():
+    assert ETAG.startswith('W/"')
+    assert ETAG == make_etag("claim", "c1", 1700000000000)
+    assert ETAG != make_etag("claim", "c1", 1700000000001)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (ETAG, True),
+    (ETAG[2:], True),
+    (f'W/"other", {ETAG}', True),
+    ("*", True),
+    (' * ', True),
+    ('W/"other"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+def test_entity_etags_differ_by_kind():
+    assert claim_etag("x", (5,)) != user_etag("x", 5)
@@ -0,0 +1,40 @@
+import pytest
+
+from src.config.config import settings
+from src.services.identity import (
+    KIND_EMAIL,
+    KIND_ID,
+    KIND_PHONE,
+    KIND_UNKNOWN,
+    classify_identifier,
+    normalize_phone,
+)
+
+
+@pytest.fixture(autouse=True)
+def country_code(monkeypatch):
+    monkeypatch.setattr(settings, "default_phone_country_code", "1")
+
+
+@pytest.mark.parametrize("identifier, expected", [
+    ("0B6A4D1E-7C2F-4F3A-9A1B-2C3D4E5F6A7B", (KIND_ID, "0b6a4d1e-7c2f-4f3a-9a1b-2c3d4e5f6a7b")),
+    ("  Jane.Doe@Example.COM ", (KIND_EMAIL, "jane.doe@example.com")),
+    ("(512) 555-0100", (KIND_PHONE, "+15125550100")),
+    ("+44 20 7946 0958", (KIND_PHONE, "+442079460958")),
+    ("jane", (KIND_UNKNOWN, "jane")),
+    ("12-34", (KIND_UNKNOWN, "12-34")),
+])
+def test_classify_identifier(identifier, expected):
+    assert classify_identifier(identifier) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("512-555-0100", "+15125550100"),
+    ("+1 512 555 0100", "+15125550100"),
+    ("0044 20 7946 0958", "+442079460958"),
+    ("15125550100", "+15125550100"),
+    ("12345", None),
+    ("+1234567890123456", None),
+])
+def test_normalize_phone(value, expected):
+    assert normalize_phone(value) == expected
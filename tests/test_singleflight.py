@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from src.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", load) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "shared": 4}
+
+
+def test_error_reaches_every_caller():
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database down")
+
+    async def scenario():
+        flight = SingleFlight()
+        return flight, await asyncio.gather(*(flight.do("key", load) for _ in range(3)), return_exceptions=True)
+
+    flight, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["started"] == 1
+
+
+def test_finished_call_is_not_reused():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        flight = SingleFlight()
+        return await flight.do("key", load), await flight.do("key", load)
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+
+def test_forget_starts_a_new_call():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "stale"
+
+        first = asyncio.ensure_future(flight.do("key", slow))
+        await asyncio.sleep(0)
+        flight.forget("key")
+        second = await flight.do("key", lambda: asyncio.sleep(0, result="fresh"))
+        release.set()
+        return await first, second
+
+    assert asyncio.run(scenario()) == ("stale", "fresh")
@@ -0,0 +1,85 @@
+from src.services.typeahead import CANDIDATE_LIMIT, TypeaheadIndex
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def make_index():
+    index = TypeaheadIndex(fuzzy_threshold=0.3)
+    for entry_id, name, group in [
+        ("1", "St. Mercy Hospital", "hospital"),
+        ("2", "Mercer & Sons Law Firm", "law firm"),
+        ("3", "Mercy Urgent Care", "hospital"),
+        ("4", "Allstate Insurance", "insurer"),
+    ]:
+        index.upsert(entry_id, name, {"id": entry_id, "name": name}, group=group)
+    return index
+
+
+def test_prefix_matches_any_word():
+    results = make_index().search("merc", 10)
+    assert set(ids(results)) == {"1", "2", "3"}
+    assert all(result["match"] == "prefix" for result in results)
+
+
+def test_prefix_at_start_of_name_ranks_first():
+    results = make_index().search("mercy", 10)
+    assert ids(results) == ["3", "1"]
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_multi_word_query_needs_every_word():
+    index = make_index()
+    assert ids(index.search("mercy hosp", 10)) == ["1"]
+    assert ids(index.search("hosp st", 10)) == ["1"]
+
+
+def test_typo_falls_back_to_trigrams():
+    results = make_index().search("alstate insurence", 10)
+    assert ids(results) == ["4"]
+    assert results[0]["match"] == "fuzzy"
+
+
+def test_group_limits_results():
+    index = make_index()
+    assert set(ids(index.search("merc", 10, group="hospital"))) == {"1", "3"}
+    assert ids(index.search("merc", 10, group="law firm")) == ["2"]
+    assert index.search("merc", 10, group="unknown") == []
+
+
+def test_group_search_is_not_cut_by_other_groups():
+    index = TypeaheadIndex()
+    for i in range(CANDIDATE_LIMIT * 2):
+        index.upsert(f"firm-{i}", f"Smith Firm {i}", {"id": f"firm-{i}"}, group="law firm")
+    index.upsert("hospital", "Smithfield Hospital", {"id": "hospital"}, group="hospital")
+
+    assert ids(index.search("smith", 5, group="hospital")) == ["hospital"]
+
+
+def test_upsert_replaces_name_and_group():
+    index = make_index()
+    index.upsert("1", "Riverside Clinic", {"id": "1", "name": "Riverside Clinic"}, group="clinic")
+
+    assert len(index) == 4
+    assert ids(index.search("mercy", 10)) == ["3"]
+    assert ids(index.search("river", 10)) == ["1"]
+    assert ids(index.search("river", 10, group="hospital")) == []
+    assert ids(index.search("river", 10, group="clinic")) == ["1"]
+
+
+def test_remove_drops_prefix_and_fuzzy_matches():
+    index = make_index()
+    index.remove("4")
+    index.remove("missing")
+
+    assert len(index) == 3
+    assert index.search("allstate", 10) == []
+    assert index.search("alstate insurence", 10) == []
+
+
+def test_limit_and_empty_query():
+    index = make_index()
+    assert len(index.search("merc", 2)) == 2
+    assert index.search("", 10) == []
+    assert index.search("merc", 0) == []
@@ -0,0 +1,81 @@
+import pytest
+
+from src.config.config import settings
+from src.services.workqueue import WorkQueue
+
+
+@pytest.fixture(autouse=True)
+def managers(monkeypatch):
+    monkeypatch.setattr(settings, "case_managers", ["ana", "ben", "cy"])
+    monkeypatch.setattr(settings, "work_queue_closed_statuses", ["RESOLVED_AND_CLOSED"])
+
+
+def make_queue(loads):
+    queue = WorkQueue()
+    queue.replace_loads(loads)
+    return queue
+
+
+def created(claim_id, manager, status=None):
+    return {"type": "created", "claim_id": claim_id, "assignedCaseManager": manager, "status": status}
+
+
+def updated(claim_id, manager, status, previous_manager, previous_status):
+    return {
+        "type": "updated",
+        "claim_id": claim_id,
+        "assignedCaseManager": manager,
+        "status": status,
+        "previous": {"assignedCaseManager": previous_manager, "status": previous_status}
+    }
+
+
+def test_pick_balances_by_load():
+    queue = make_queue({"ana": 2, "ben": 0, "cy": 1})
+    assert [queue.pick() for _ in range(4)] == ["ben", "ben", "cy", "ana"]
+    assert queue.snapshot()["managers"] == {"ana": 3, "ben": 2, "cy": 2}
+
+
+def test_pick_without_managers(monkeypatch):
+    monkeypatch.setattr(settings, "case_managers", [])
+    assert WorkQueue().pick() is None
+
+
+def test_assigned_claim_is_counted_once():
+    queue = make_queue({"ana": 0, "ben": 1, "cy": 1})
+    manager = queue.pick()
+    queue.assigned("c1", manager)
+    # The create message for our own claim arrives over the change feed
+    queue.apply(created("c1", manager))
+    assert queue.snapshot()["managers"]["ana"] == 1
+
+
+def test_release_returns_the_reservation():
+    queue = make_queue({"ana": 0, "ben": 1, "cy": 1})
+    queue.release(queue.pick())
+    assert queue.snapshot()["managers"] == {"ana": 0, "ben": 1, "cy": 1}
+    # A second release has no reservation left to give back
+    queue.release("ana")
+    assert queue.snapshot()["managers"]["ana"] == 0
+
+
+def test_replace_loads_keeps_pending_reservations():
+    queue = make_queue({"ana": 0, "ben": 5, "cy": 5})
+    queue.pick()
+    queue.replace_loads({"ana": 0, "ben": 5, "cy": 5})
+    assert queue.snapshot()["managers"]["ana"] == 1
+
+
+def test_apply_moves_load_from_other_workers():
+    queue = make_queue({"ana": 1, "ben": 1, "cy": 0})
+    queue.apply(created("c1", "cy"))
+    queue.apply(updated("c2", "ben", "PENDING_INFORMATION", "ana", "PENDING_INFORMATION"))
+    queue.apply(updated("c3", "ben", "RESOLVED_AND_CLOSED", "ben", "PENDING_INFORMATION"))
+    queue.apply(created("c4", "cy", "RESOLVED_AND_CLOSED"))
+    assert queue.snapshot()["managers"] == {"ana": 0, "ben": 1, "cy": 1}
+
+
+def test_unconfigured_managers_are_never_picked():
+    queue = make_queue({"ana": 3, "ben": 3, "cy": 3, "dee": 2})
+    assert queue.pick() != "dee"
+    assert queue.snapshot()["unconfigured"] == {"dee": 2}